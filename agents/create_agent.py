@@ -5,6 +5,7 @@ from typing import Optional, List, Any
 from crewai.knowledge.source.string_knowledge_source import StringKnowledgeSource
 from .tools_handler import handle_extra_tools
 from config.config import config
+from services.ollama_router import ollama_router
 from .tools.human_tool import HumanTool
 
 
@@ -108,10 +109,15 @@ class CreateAgent:
                     string_source,
                 ],
                 use_system_prompt=True,
-                llm=LLM(model=config.AGENT_LLM_OLLAMA, base_url=config.OLLAMA_URL),
+                llm=LLM(
+                    model=config.AGENT_LLM_OLLAMA,
+                    base_url=ollama_router.base_url_for(config.AGENT_LLM_OLLAMA),
+                ),
                 function_calling_llm=LLM(
                     model=config.AGENT_FUNCTION_CALLING_LLM_OLLAMA,
-                    base_url=config.OLLAMA_URL,
+                    base_url=ollama_router.base_url_for(
+                        config.AGENT_FUNCTION_CALLING_LLM_OLLAMA
+                    ),
                 ),
             )
         except Exception as e:
@@ -6,6 +6,7 @@ from crewai.memory.storage.ltm_sqlite_storage import LTMSQLiteStorage
 from crewai.knowledge.source.string_knowledge_source import StringKnowledgeSource
 from agents.agentops_listener import AgentOpsListener
 from config.config import config
+from services.ollama_router import ollama_router
 
 
 class CreateCrew:
@@ -116,15 +117,17 @@ class CreateCrew:
                 planning=True,
                 manager_llm=LLM(
                     model=config.CREW_MANAGER_LLM_OLLAMA,
-                    base_url=config.OLLAMA_URL,
+                    base_url=ollama_router.base_url_for(config.CREW_MANAGER_LLM_OLLAMA),
                 ),
                 planning_llm=LLM(
                     model=config.CREW_PLANNING_LLM_OLLAMA,
-                    base_url=config.OLLAMA_URL,
+                    base_url=ollama_router.base_url_for(
+                        config.CREW_PLANNING_LLM_OLLAMA
+                    ),
                 ),
                 chat_llm=LLM(
                     model=config.CREW_CHAT_LLM_OLLAMA,
-                    base_url=config.OLLAMA_URL,
+                    base_url=ollama_router.base_url_for(config.CREW_CHAT_LLM_OLLAMA),
                 ),
                 output_log_file="logs/crew-agent.json",
             )
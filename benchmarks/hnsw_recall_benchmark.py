@@ -0,0 +1,143 @@
+"""
+Recall@k and query latency of Chroma's HNSW index across parameter grids.
+
+Each synthetic corpus (normalised Gaussian clusters, like sentence embeddings)
+is indexed once per (M, construction_ef) pair; every search_ef is then applied
+at runtime the same way PUT /company/search_ef does. Results are compared with
+exact cosine top-k from NumPy brute force.
+
+Usage:
+    python -m benchmarks.hnsw_recall_benchmark --sizes 5000 50000 --M 8 16 32 \\
+        --construction-ef 100 200 --search-ef 10 50 100 200 400
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import chromadb
+import numpy as np
+from chromadb.config import Settings
+from utils.hnsw_params import hnsw_metadata, set_search_ef
+
+
+def make_corpus(rng, size: int, dim: int, clusters: int) -> np.ndarray:
+    """Unit vectors scattered around random cluster centres"""
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(clusters, size=size)] + rng.normal(
+        scale=0.6, size=(size, dim)
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+def exact_top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force cosine top-k row indices for each query"""
+    scores = queries @ corpus.T
+    top = np.argpartition(-scores, k, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def build_collection(client, corpus: np.ndarray, M: int, construction_ef: int):
+    """Index the corpus and return (collection, build seconds)"""
+    collection = client.create_collection(
+        f"hnsw_bench_{len(corpus)}_{M}_{construction_ef}",
+        metadata=hnsw_metadata({"M": M, "construction_ef": construction_ef}),
+    )
+    batch_size = client.get_max_batch_size()
+    start = time.perf_counter()
+    for offset in range(0, len(corpus), batch_size):
+        batch = corpus[offset : offset + batch_size]
+        collection.add(
+            ids=[str(index) for index in range(offset, offset + len(batch))],
+            embeddings=batch,
+        )
+    return collection, time.perf_counter() - start
+
+
+def measure(collection, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    """Run queries one at a time, as the API does, and score them"""
+    collection.query(query_embeddings=queries[:1], n_results=k)  # warm-up
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        result = collection.query(
+            query_embeddings=query[None, :], n_results=k, include=[]
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += len({int(i) for i in result["ids"][0]} & set(expected.tolist()))
+
+    return {
+        "recall": hits / truth.size,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=50)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--M", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--construction-ef", type=int, nargs="+", default=[100, 200])
+    parser.add_argument(
+        "--search-ef", type=int, nargs="+", default=[10, 25, 50, 100, 200]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    results = []
+    print(
+        f"{'size':>7} {'M':>3} {'c_ef':>5} {'build_s':>8} {'s_ef':>5} "
+        f"{'recall@' + str(args.k):>9} {'p50_ms':>7} {'p99_ms':>7}"
+    )
+
+    with tempfile.TemporaryDirectory() as directory:
+        client = chromadb.PersistentClient(
+            path=directory, settings=Settings(anonymized_telemetry=False)
+        )
+        for size in args.sizes:
+            corpus = make_corpus(rng, size, args.dim, args.clusters)
+            # Queries are perturbed corpus points, so neighbours are meaningful
+            queries = corpus[rng.integers(size, size=args.queries)] + rng.normal(
+                scale=0.05, size=(args.queries, args.dim)
+            ).astype(np.float32)
+            queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+            truth = exact_top_k(corpus, queries, args.k)
+
+            for M in args.M:
+                for construction_ef in args.construction_ef:
+                    collection, build_seconds = build_collection(
+                        client, corpus, M, construction_ef
+                    )
+                    for search_ef in args.search_ef:
+                        set_search_ef(collection, search_ef)
+                        row = {
+                            "size": size,
+                            "M": M,
+                            "construction_ef": construction_ef,
+                            "build_s": build_seconds,
+                            "search_ef": search_ef,
+                            **measure(collection, queries, truth, args.k),
+                        }
+                        results.append(row)
+                        print(
+                            f"{size:>7} {M:>3} {construction_ef:>5} {build_seconds:>8.2f} "
+                            f"{search_ef:>5} {row['recall']:>9.3f} {row['p50_ms']:>7.2f} {row['p99_ms']:>7.2f}"
+                        )
+                    client.delete_collection(collection.name)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump({"args": vars(args), "results": results}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of the in-process NumPy MMR re-ranker against LangChain's.
+
+Both implementations re-rank the same synthetic candidate embeddings, so the
+numbers isolate re-ranking cost from Chroma and Ollama latency. Selections are
+checked for agreement on every run.
+
+Usage:
+    python -m benchmarks.mmr_benchmark --fetch-k 100 250 500 1000 2000 --dim 1024
+"""
+
+import argparse
+import time
+import numpy as np
+from langchain_chroma.vectorstores import (
+    maximal_marginal_relevance as langchain_mmr,
+)
+from utils.mmr import maximal_marginal_relevance
+
+
+def time_call(fn, repeats: int) -> float:
+    """Return the median wall time of fn() in milliseconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--fetch-k", type=int, nargs="+", default=[100, 250, 500, 1000, 2000]
+    )
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'fetch_k':>8} {'langchain_ms':>14} {'numpy_ms':>10} {'speedup':>8}  same")
+
+    for fetch_k in args.fetch_k:
+        candidates = rng.normal(size=(fetch_k, args.dim)).astype(np.float32)
+        query = rng.normal(size=args.dim).astype(np.float32)
+        # Chroma hands back embeddings as a list of rows
+        candidate_rows = list(candidates)
+
+        langchain_ms = time_call(
+            lambda: langchain_mmr(
+                query, candidate_rows, k=args.k, lambda_mult=args.lambda_mult
+            ),
+            args.repeats,
+        )
+        numpy_ms = time_call(
+            lambda: maximal_marginal_relevance(
+                query, candidate_rows, k=args.k, lambda_mult=args.lambda_mult
+            ),
+            args.repeats,
+        )
+        same = langchain_mmr(
+            query, candidate_rows, k=args.k, lambda_mult=args.lambda_mult
+        ) == maximal_marginal_relevance(
+            query, candidate_rows, k=args.k, lambda_mult=args.lambda_mult
+        )
+
+        print(
+            f"{fetch_k:>8} {langchain_ms:>14.2f} {numpy_ms:>10.2f} {langchain_ms / numpy_ms:>7.1f}x  {same}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+Offline retrieval benchmark for ChromaDBService with a deterministic embedder.
+
+Runs the real service (Chroma, lexical and dedup indexes, LangChain wrappers)
+against a throwaway store, with HashingEmbeddingClient standing in for Ollama,
+over synthetic topic corpora. Reports ingest throughput, query p50/p99 per
+search type, MMR cost over plain similarity, delete-by-metadata-id latency and
+memory, and saves everything as JSON so runs can be compared.
+
+Usage:
+    python -m benchmarks.retrieval_benchmark --docs 1000 10000 --output after.json \\
+        --baseline before.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+# Point every on-disk store at a throwaway directory before the service is imported
+WORK_DIR = tempfile.mkdtemp(prefix="retrieval_bench_")
+os.environ["CHROMA_DB_PATH"] = os.path.join(WORK_DIR, "chroma")
+os.environ["CHROMA_SHARD_PATHS"] = ""
+os.environ["LEXICAL_INDEX_PATH"] = os.path.join(WORK_DIR, "lexical", "lexical.db")
+os.environ["DEDUP_INDEX_PATH"] = os.path.join(WORK_DIR, "dedup", "dedup.db")
+os.environ["COLLECTION_VERSIONS_PATH"] = os.path.join(
+    WORK_DIR, "versions", "versions.db"
+)
+os.environ["EMBEDDING_CACHE_ENABLED"] = "False"
+
+import chromadb  # noqa: E402
+from services.vector_db import chroma_service  # noqa: E402
+from utils.hashing_embedding_client import HashingEmbeddingClient  # noqa: E402
+
+# Metrics where a higher number is better, for the baseline comparison
+HIGHER_IS_BETTER = {"ingest_docs_per_s"}
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if platform.system() == "Darwin" else peak / 2**10
+
+
+def disk_mb(path: str) -> float:
+    return sum(f.stat().st_size for f in Path(path).rglob("*") if f.is_file()) / 2**20
+
+
+def percentiles(latencies: list[float]) -> dict:
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+class SyntheticCorpus:
+    """Documents drawn from per-topic word distributions over a made-up vocabulary"""
+
+    def __init__(self, seed: int, vocabulary: int = 5000, topics: int = 40):
+        self.rng = np.random.default_rng(seed)
+        letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+        self.words = [
+            "".join(self.rng.choice(letters, size=self.rng.integers(3, 10)))
+            for _ in range(vocabulary)
+        ]
+        self.topic_words = [
+            self.rng.choice(vocabulary, size=200, replace=False) for _ in range(topics)
+        ]
+
+    def text(self, topic: int, length: int) -> str:
+        # Mostly topic vocabulary, with some background noise
+        own = self.rng.choice(self.topic_words[topic], size=length)
+        noise = self.rng.integers(len(self.words), size=length // 4)
+        return " ".join(self.words[i] for i in np.concatenate([own, noise]))
+
+    def documents(self, count: int, prefix: str) -> list[dict]:
+        return [
+            {
+                "id": f"{prefix}-{i}",
+                "page_content": self.text(topic := i % len(self.topic_words), 60),
+                "metadata": {"topic": topic, "source": "benchmark"},
+            }
+            for i in range(count)
+        ]
+
+    def queries(self, count: int) -> list[str]:
+        return [self.text(i % len(self.topic_words), 8) for i in range(count)]
+
+
+def bench_size(corpus: SyntheticCorpus, size: int, args) -> dict:
+    company_id = f"bench{size}"
+    documents = corpus.documents(size, company_id)
+    result = {"docs": size, "rss_before_mb": round(rss_mb(), 1)}
+
+    start = time.perf_counter()
+    for offset in range(0, size, args.ingest_batch):
+        chroma_service.add_documents_to_collection_langchain(
+            company_id,
+            "live",
+            documents[offset : offset + args.ingest_batch],
+            dedup_policy=args.dedup_policy,
+        )
+    elapsed = time.perf_counter() - start
+    result["ingest_s"] = round(elapsed, 3)
+    result["ingest_docs_per_s"] = round(size / elapsed, 1)
+    result["rss_after_ingest_mb"] = round(rss_mb(), 1)
+
+    queries = corpus.queries(args.queries)
+    for search_type in args.search_types:
+        chroma_service.query_with_langchain(
+            company_id, queries[0], "live", k=args.k, search_type=search_type
+        )  # warm-up
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            chroma_service.query_with_langchain(
+                company_id,
+                query,
+                "live",
+                k=args.k,
+                search_type=search_type,
+                fetch_k=args.fetch_k,
+            )
+            latencies.append((time.perf_counter() - start) * 1000)
+        result[search_type] = percentiles(latencies)
+
+    if "mmr" in result and "similarity" in result:
+        result["mmr_overhead_p50_ms"] = round(
+            result["mmr"]["p50_ms"] - result["similarity"]["p50_ms"], 3
+        )
+
+    # Deletes resolve vector IDs through the metadata["id"] index
+    targets = np.random.default_rng(args.seed).choice(
+        size, size=min(args.deletes, size), replace=False
+    )
+    latencies = []
+    for index in targets:
+        start = time.perf_counter()
+        chroma_service.delete_document(company_id, f"{company_id}-{index}", "live")
+        latencies.append((time.perf_counter() - start) * 1000)
+    result["delete_by_id"] = percentiles(latencies)
+
+    result["rss_after_mb"] = round(rss_mb(), 1)
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+    # Stores are shared by every size in the run, so this grows run over run
+    result["store_disk_mb"] = round(disk_mb(WORK_DIR), 1)
+    return result
+
+
+def flatten(result: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in result.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def compare(results: list[dict], baseline_path: str):
+    """Print the relative change of every metric against a saved run"""
+    with open(baseline_path) as file:
+        baseline = {run["docs"]: flatten(run) for run in json.load(file)["results"]}
+
+    print(f"\nChange vs {baseline_path} (+ is better):")
+    for run in results:
+        before = baseline.get(run["docs"])
+        if before is None:
+            continue
+        for metric, value in flatten(run).items():
+            old = before.get(metric)
+            if metric == "docs" or not isinstance(value, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            if metric not in HIGHER_IS_BETTER:
+                change = -change
+            print(
+                f"  docs={run['docs']:<7} {metric:<28} {old:>10} -> {value:<10} {change:+6.1f}%"
+            )
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--deletes", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument(
+        "--search-types", nargs="+", default=["similarity", "mmr", "hybrid"]
+    )
+    parser.add_argument("--ingest-batch", type=int, default=1000)
+    parser.add_argument(
+        "--dedup-policy", default="off", choices=["skip", "merge", "replace", "off"]
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="retrieval_benchmark.json")
+    parser.add_argument("--baseline", help="Earlier --output file to compare against")
+    args = parser.parse_args()
+
+    chroma_service.use_embedding_client(HashingEmbeddingClient(args.dim, args.seed))
+    corpus = SyntheticCorpus(args.seed)
+
+    results = []
+    for size in args.docs:
+        result = bench_size(corpus, size, args)
+        results.append(result)
+        print(
+            f"docs={size:<7} ingest {result['ingest_docs_per_s']:>9,.1f} docs/s  "
+            + "  ".join(
+                f"{search_type} p50/p99 {result[search_type]['p50_ms']:.2f}/{result[search_type]['p99_ms']:.2f} ms"
+                for search_type in args.search_types
+            )
+            + f"  delete p50 {result['delete_by_id']['p50_ms']:.2f} ms  rss {result['rss_after_mb']:.0f} MB"
+        )
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "chromadb": chromadb.__version__,
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        compare(results, args.baseline)
+
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for per-request LangChain Chroma wrapper setup.
+
+Compares building a fresh ``Chroma`` wrapper and retriever on every request
+(the previous behaviour) with the cached lookup in ChromaDBService.
+
+Usage:
+    python -m benchmarks.vector_store_cache_benchmark --requests 20000 --threads 8
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Point the service at a throwaway store before it is imported
+os.environ.setdefault("CHROMA_DB_PATH", tempfile.mkdtemp(prefix="chroma_bench_"))
+os.environ.setdefault("EMBEDDING_CACHE_ENABLED", "False")
+
+from langchain_chroma import Chroma  # noqa: E402
+from services.vector_db import chroma_service  # noqa: E402
+
+
+def uncached_setup(company_id: str, data_type: str):
+    collection = chroma_service.get_or_create_company_collection(company_id, data_type)
+    vector_store = Chroma(
+        client=chroma_service.shards.client_for_collection(collection.name),
+        collection_name=collection.name,
+        embedding_function=chroma_service.embeddings,
+    )
+    return vector_store.as_retriever(search_type="mmr", search_kwargs={"k": 10})
+
+
+def cached_setup(company_id: str, data_type: str):
+    return chroma_service.get_retriever(
+        company_id=company_id, data_type=data_type, k=10, search_type="mmr"
+    )
+
+
+def run(label: str, setup, requests: int, threads: int, tenants: int) -> dict:
+    args = [(f"bench{i % tenants}", "live") for i in range(requests)]
+
+    start = time.perf_counter()
+    if threads <= 1:
+        for company_id, data_type in args:
+            setup(company_id, data_type)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda a: setup(*a), args))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "label": label,
+        "requests": requests,
+        "threads": threads,
+        "elapsed_s": round(elapsed, 4),
+        "requests_per_s": round(requests / elapsed, 1),
+        "mean_us": round(elapsed / requests * 1e6, 2),
+    }
+    print(
+        f"{label:<10} {result['requests_per_s']:>12,.1f} req/s  {result['mean_us']:>10.2f} us/req"
+    )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--tenants", type=int, default=50)
+    args = parser.parse_args()
+
+    # Warm collection handles so both runs measure wrapper setup only
+    for i in range(args.tenants):
+        chroma_service.get_or_create_company_collection(f"bench{i}", "live")
+
+    uncached = run(
+        "uncached", uncached_setup, args.requests, args.threads, args.tenants
+    )
+    cached = run("cached", cached_setup, args.requests, args.threads, args.tenants)
+    print(f"speedup    {uncached['elapsed_s'] / cached['elapsed_s']:.1f}x")
+    print(chroma_service.get_vector_store_cache_stats())
+
+
+if __name__ == "__main__":
+    main()
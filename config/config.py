@@ -17,6 +17,92 @@ class Config:
     BASE_URL = f"http://{APP_HOST}:{APP_PORT}"
     CHROMA_DB_PATH = os.getenv("CHROMA_DB_PATH", "./chroma_db")
     CHROMA_ALLOW_RESET = os.getenv("CHROMA_ALLOW_RESET", "True").lower() == "true"
+    # Comma-separated shard directories; tenants are spread over them by consistent hash
+    CHROMA_SHARD_PATHS = [
+        path.strip()
+        for path in os.getenv("CHROMA_SHARD_PATHS", "").split(",")
+        if path.strip()
+    ] or [CHROMA_DB_PATH]
+    CHROMA_SHARD_VNODES = int(os.getenv("CHROMA_SHARD_VNODES", 128))
+    # HNSW parameters for new collections; tenants can override them per collection
+    CHROMA_HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", 100))
+    CHROMA_HNSW_M = int(os.getenv("CHROMA_HNSW_M", 16))
+    CHROMA_HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", 100))
+    CHROMA_COLLECTION_CACHE_SIZE = int(os.getenv("CHROMA_COLLECTION_CACHE_SIZE", 2048))
+    CHROMA_VECTOR_STORE_CACHE_SIZE = int(
+        os.getenv("CHROMA_VECTOR_STORE_CACHE_SIZE", 1024)
+    )
+    CHROMA_RETRIEVER_CACHE_SIZE = int(os.getenv("CHROMA_RETRIEVER_CACHE_SIZE", 4096))
+    CHROMA_EXECUTOR_MAX_WORKERS = int(os.getenv("CHROMA_EXECUTOR_MAX_WORKERS", 8))
+
+    # Streaming ingest configuration
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", 256))
+    INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", 4))
+    INGEST_JOB_HISTORY_SIZE = int(os.getenv("INGEST_JOB_HISTORY_SIZE", 1000))
+    LIST_DOCUMENTS_PAGE_SIZE = int(os.getenv("LIST_DOCUMENTS_PAGE_SIZE", 500))
+
+    # Parquet export/import of collections
+    COLLECTION_TRANSFER_BATCH_SIZE = int(
+        os.getenv("COLLECTION_TRANSFER_BATCH_SIZE", 5000)
+    )
+    COLLECTION_TRANSFER_DIR = os.getenv("COLLECTION_TRANSFER_DIR") or None
+    COLLECTION_EXPORT_COMPRESSION = os.getenv("COLLECTION_EXPORT_COMPRESSION", "zstd")
+
+    # Hybrid (BM25 + vector) retrieval configuration
+    LEXICAL_INDEX_ENABLED = os.getenv("LEXICAL_INDEX_ENABLED", "True").lower() == "true"
+    LEXICAL_INDEX_PATH = os.getenv("LEXICAL_INDEX_PATH", "./lexical_index/lexical.db")
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))
+    CHAT_RETRIEVAL_SEARCH_TYPE = os.getenv("CHAT_RETRIEVAL_SEARCH_TYPE", "mmr")
+
+    # Ingest-time deduplication ("skip", "merge", "replace" or "off"). Opt-in:
+    # skipped duplicates are not stored under the caller's id
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "True").lower() == "true"
+    DEDUP_POLICY = os.getenv("DEDUP_POLICY", "off")
+    DEDUP_INDEX_PATH = os.getenv("DEDUP_INDEX_PATH", "./dedup_index/dedup.db")
+    DEDUP_SIMILARITY_THRESHOLD = float(os.getenv("DEDUP_SIMILARITY_THRESHOLD", 0.9))
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 128))
+    DEDUP_LSH_BANDS = int(os.getenv("DEDUP_LSH_BANDS", 16))
+    DEDUP_SHINGLE_SIZE = int(os.getenv("DEDUP_SHINGLE_SIZE", 3))
+
+    # Write counters shared by every process, used to invalidate cached answers
+    COLLECTION_VERSIONS_PATH = os.getenv(
+        "COLLECTION_VERSIONS_PATH", "./collection_versions/versions.db"
+    )
+
+    # Semantic answer cache configuration
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "True").lower() == "true"
+    ANSWER_CACHE_SIMILARITY_THRESHOLD = float(
+        os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", 0.95)
+    )
+    ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", 3600))
+    ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE = int(
+        os.getenv("ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE", 512)
+    )
+    ANSWER_CACHE_MAX_SCOPES = int(os.getenv("ANSWER_CACHE_MAX_SCOPES", 1024))
+
+    # Chat session store: "sqlite" for one host, "redis" to share across hosts
+    SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "sqlite").lower()
+    SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "./session_store/sessions.db")
+    SESSION_STORE_REDIS_URL = os.getenv(
+        "SESSION_STORE_REDIS_URL", "redis://127.0.0.1:6379/0"
+    )
+    SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", 3600))
+    SESSION_SWEEP_INTERVAL_SECONDS = float(
+        os.getenv("SESSION_SWEEP_INTERVAL_SECONDS", 60)
+    )
+
+    # Token-budgeted context assembly
+    CONTEXT_TOKENIZER_ENCODING = os.getenv("CONTEXT_TOKENIZER_ENCODING", "cl100k_base")
+    CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 3072))
+    # Per-model overrides, e.g. "gemma3=8192,openhermes=4096"
+    CONTEXT_TOKEN_BUDGETS = {
+        model.strip(): int(budget)
+        for model, budget in (
+            entry.split("=", 1)
+            for entry in os.getenv("CONTEXT_TOKEN_BUDGETS", "").split(",")
+            if "=" in entry
+        )
+    }
 
     # Kafka related configuration
     KAFKA_BOOTSTRAP_SERVERS = os.getenv("KAFKA_BOOTSTRAP_SERVERS", "localhost:9092")
@@ -35,6 +121,67 @@ class Config:
     # LLM configuration
     OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 
+    # LLM backend routing
+    # Ollama servers that LLM calls (chat, tools, agents) are spread over
+    OLLAMA_LLM_BACKENDS = [
+        url.strip()
+        for url in os.getenv("OLLAMA_LLM_BACKENDS", "").split(",")
+        if url.strip()
+    ] or (
+        [OLLAMA_URL]
+        if APP_ENV == "development"
+        else [
+            "http://localhost:11434",
+            "http://localhost:11435",
+            "http://localhost:11436",
+        ]
+    )
+    OLLAMA_ROUTER_EWMA_ALPHA = float(os.getenv("OLLAMA_ROUTER_EWMA_ALPHA", 0.2))
+    OLLAMA_ROUTER_HEALTH_INTERVAL = float(
+        os.getenv("OLLAMA_ROUTER_HEALTH_INTERVAL", 10)
+    )
+    OLLAMA_ROUTER_HEALTH_TIMEOUT = float(os.getenv("OLLAMA_ROUTER_HEALTH_TIMEOUT", 2))
+    OLLAMA_ROUTER_FAILURE_THRESHOLD = int(
+        os.getenv("OLLAMA_ROUTER_FAILURE_THRESHOLD", 3)
+    )
+    # Extra cost of sending a request to a backend that must load the model first
+    OLLAMA_ROUTER_COLD_LOAD_MS = float(os.getenv("OLLAMA_ROUTER_COLD_LOAD_MS", 20000))
+    # Backends that keep a model loaded: "llama3.2=http://host:11434|http://host:11435,gemma3=..."
+    OLLAMA_WARM_POOLS = {
+        model.strip(): [url.strip() for url in urls.split("|") if url.strip()]
+        for model, urls in (
+            entry.split("=", 1)
+            for entry in os.getenv("OLLAMA_WARM_POOLS", "").split(",")
+            if "=" in entry
+        )
+    }
+    OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE") or None
+
+    # Embedding client configuration
+    OLLAMA_EMBEDDING_MODEL = os.getenv("OLLAMA_EMBEDDING_MODEL", "mxbai-embed-large")
+    OLLAMA_EMBEDDING_BATCH_SIZE = int(os.getenv("OLLAMA_EMBEDDING_BATCH_SIZE", 64))
+    OLLAMA_EMBEDDING_MAX_CONCURRENCY = int(
+        os.getenv("OLLAMA_EMBEDDING_MAX_CONCURRENCY", 4)
+    )
+    OLLAMA_EMBEDDING_MAX_RETRIES = int(os.getenv("OLLAMA_EMBEDDING_MAX_RETRIES", 3))
+    OLLAMA_EMBEDDING_RETRY_BACKOFF = float(
+        os.getenv("OLLAMA_EMBEDDING_RETRY_BACKOFF", 0.5)
+    )
+    OLLAMA_EMBEDDING_TIMEOUT = float(os.getenv("OLLAMA_EMBEDDING_TIMEOUT", 120))
+    EMBEDDING_CACHE_ENABLED = (
+        os.getenv("EMBEDDING_CACHE_ENABLED", "True").lower() == "true"
+    )
+    EMBEDDING_CACHE_PATH = os.getenv(
+        "EMBEDDING_CACHE_PATH", "./embedding_cache/embeddings.db"
+    )
+    EMBEDDING_CACHE_MAX_ENTRIES = int(
+        os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", 1_000_000)
+    )
+    # Seconds between batched last_used writes for cache hits
+    EMBEDDING_CACHE_TOUCH_INTERVAL = float(
+        os.getenv("EMBEDDING_CACHE_TOUCH_INTERVAL", 30)
+    )
+
     AGENT_LLM_OLLAMA = os.getenv("AGENT_LLM_OLLAMA", "")
     AGENT_FUNCTION_CALLING_LLM_OLLAMA = os.getenv(
         "AGENT_FUNCTION_CALLING_LLM_OLLAMA", ""
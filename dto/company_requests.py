@@ -44,6 +44,7 @@ class AddDocumentRequest(BaseModel):
     company_id: str
     documents: list[dict]
     data_type: str = "test"  # "live", "test" or "hold" and "corrections"
+    dedup_policy: str = None  # "skip", "merge", "replace" or "off"
 
 
 class QueryRequest(BaseModel):
@@ -53,6 +54,8 @@ class QueryRequest(BaseModel):
     k: int = 1
     metadata_filter: dict = None
     search_type: str = "mmr"
+    fetch_k: int = Field(20, gt=0, le=2000)  # candidates re-ranked by MMR
+    lambda_mult: float = Field(0.5, ge=0, le=1)  # 0 = diverse, 1 = relevant
 
 
 class DeleteDocumentRequest(BaseModel):
@@ -61,6 +64,48 @@ class DeleteDocumentRequest(BaseModel):
     data_type: str = "test"
 
 
+class UpdateDocumentMetadataRequest(BaseModel):
+    company_id: str
+    metadata_id: str
+    metadata: Dict[str, Any]
+    data_type: str = "test"
+    merge: bool = False  # merge into existing metadata instead of replacing
+
+
+class MetadataUpdate(BaseModel):
+    metadata_id: str
+    metadata: Dict[str, Any]
+
+
+class BulkUpdateDocumentMetadataRequest(BaseModel):
+    company_id: str
+    updates: list[MetadataUpdate]
+    data_type: str = "test"
+    merge: bool = False
+
+
+class TransferDocumentsRequest(BaseModel):
+    company_id: str
+    source_data_type: str = "test"
+    target_data_type: str = "live"
+    metadata_filter: dict = None  # Chroma where-filter; all documents when omitted
+    move: bool = False  # delete from the source after copying
+
+
+class CollectionHnswRequest(BaseModel):
+    company_id: str
+    data_type: str = "test"
+    construction_ef: int = Field(None, gt=0)  # build-time; new collections only
+    M: int = Field(None, gt=0)  # graph degree; new collections only
+    search_ef: int = Field(None, gt=0)  # candidates explored per query
+
+
+class SearchEfRequest(BaseModel):
+    company_id: str
+    data_type: str = "test"
+    search_ef: int = Field(..., gt=0)
+
+
 # {
 #     "company_id": "123",
 #     "user_id": "user_456",
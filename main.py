@@ -4,6 +4,7 @@ from config.config import config
 from core.logging import get_logger
 from core.middleware import setup_cors, log_requests
 from routers import api_router, rabbitmq_router
+from services.async_vector_db import async_chroma_service
 from utils.exceptions.custom_exceptions import CustomException
 from utils.exception_handler import (
     global_exception_handler,
@@ -56,3 +57,4 @@ async def root():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down AI Core API...")
+    await async_chroma_service.aclose()
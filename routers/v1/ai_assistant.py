@@ -1,4 +1,6 @@
 from fastapi import APIRouter
+from services.answer_cache import answer_cache
+from services.ollama_router import ollama_router
 from services.tools_communicator import tools_communicator
 from utils.response_handler import success_response
 from dto.ai_assistant_requests import (
@@ -126,3 +128,15 @@ async def mistral_chat(request: AIMistralQueryRequest):
         num_gpu=request.num_gpu,
     )
     return success_response(response)
+
+
+@router.get("/answer_cache/stats")
+async def answer_cache_stats():
+    """Returns hit rate, size and eviction counters of the semantic answer cache"""
+    return success_response(answer_cache.stats())
+
+
+@router.get("/ollama_backends/stats")
+async def ollama_backend_stats():
+    """Returns health, in-flight requests, EWMA latency and failures per Ollama backend"""
+    return success_response(ollama_router.stats())
@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from starlette.concurrency import iterate_in_threadpool
+from services.chatbot_state_store import session_store
 from services.chat_service import (
     start_conversation_service,
     chat_service,
     feedback_service,
+    stream_start_conversation_service,
+    stream_chat_service,
 )
+
 # from services.chat_service_vllm import (
 #     start_conversation_service_vllm,
 #     chat_service_vllm,
 #     feedback_service_vllm,
 # )
 from utils.response_handler import success_response
+from utils.sse import to_sse_event
 from dto.chatbot_requests import ChatRequest, FeedbackRequest, StartRequest
 
 # Initialize FastAPI router
@@ -52,6 +60,97 @@ async def feedback(req: FeedbackRequest):
     return success_response(data=result)
 
 
+@router.get("/sessions/stats")
+async def session_stats():
+    """Live chat sessions, their stored size and store hit/miss/expiry counters"""
+    return success_response(data=session_store.stats())
+
+
+def _start_events(req: StartRequest, client_ip: str):
+    return stream_start_conversation_service(
+        client_ip=client_ip,
+        message=req.message,
+        company_id=req.company_id,
+        user_id=req.user_id,
+        data_type=req.data_type,
+        custom_user_instructions=req.custom_user_instructions,
+        company_name=req.company_name,
+        company_website=req.company_website,
+        assistant_role=req.assistant_role,
+        assistant_name=req.assistant_name,
+        main_domains=req.main_domains,
+        sub_domains=req.sub_domains,
+        support_contact_emails=req.support_contact_emails,
+        support_phone_numbers=req.support_phone_numbers,
+        support_page_url=req.support_page_url,
+        help_center_url=req.help_center_url,
+    )
+
+
+def _sse_response(events):
+    return StreamingResponse(
+        (to_sse_event(event, data) for event, data in events),
+        media_type="text/event-stream",
+        # Keep proxies such as nginx from buffering the tokens
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/start/stream")
+async def start_conversation_stream(req: StartRequest, request: Request):
+    """Same as /start, streamed as server-sent events.
+
+    *** events ***
+    start (thread_id), token (one per generated chunk), then interrupt or end with the /start payload, or error.
+    """
+    return _sse_response(_start_events(req, request.client.host))
+
+
+@router.post("/message/stream")
+async def chat_stream(req: ChatRequest):
+    """Same as /message, streamed as server-sent events: token, then interrupt, end or error."""
+    return _sse_response(stream_chat_service(req.thread_id, req.message))
+
+
+@router.websocket("/ws")
+async def chat_websocket(websocket: WebSocket):
+    """Token streaming over one connection for a whole conversation.
+
+    *** frames ***
+    Send {"action": "start", ...StartRequest} or {"action": "message", ...ChatRequest};
+    each event comes back as {"event": ..., "data": ...} as on the SSE routes.
+    """
+    await websocket.accept()
+    try:
+        while True:
+            payload = await websocket.receive_json()
+            action = payload.pop("action", None)
+            try:
+                if action == "start":
+                    events = _start_events(
+                        StartRequest(**payload), websocket.client.host
+                    )
+                elif action == "message":
+                    req = ChatRequest(**payload)
+                    events = stream_chat_service(req.thread_id, req.message)
+                else:
+                    raise ValueError("action must be 'start' or 'message'")
+            except ValueError as e:
+                await websocket.send_json(
+                    {"event": "error", "data": {"message": str(e)}}
+                )
+                continue
+
+            try:
+                async for event, data in iterate_in_threadpool(events):
+                    await websocket.send_json({"event": event, "data": data})
+            finally:
+                # Stop the graph run and release its backend if the client left
+                events.close()
+    except WebSocketDisconnect:
+        logger.info("Chat WebSocket disconnected")
+
+
 # @router.post("/start-vllm")
 # async def start_conversation(req: StartRequest, request: Request):
 #     client_ip = request.client.host
@@ -1,13 +1,28 @@
-from fastapi import APIRouter
+import os
+import tempfile
+from typing import Optional
+from fastapi import APIRouter, Query, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from config.config import config
 from dto.company_requests import (
     AddDocumentRequest,
     QueryRequest,
     DeleteDocumentRequest,
+    UpdateDocumentMetadataRequest,
+    BulkUpdateDocumentMetadataRequest,
+    TransferDocumentsRequest,
+    CollectionHnswRequest,
+    SearchEfRequest,
     ChatFeedbackRequest,
     CompanyFeedbackRequest,
     UserFeedbackRequest,
 )
+from services.async_vector_db import async_chroma_service
 from services.vector_db import chroma_service
+from utils.exceptions.custom_exceptions import CustomException
+from utils.ndjson import iter_ndjson, to_ndjson_line
 from utils.response_handler import success_response
 
 router = APIRouter(prefix="/company", tags=["Company Vector Operations v.1"])
@@ -17,27 +32,130 @@ router = APIRouter(prefix="/company", tags=["Company Vector Operations v.1"])
 @router.post("/add_document")
 async def add_document(request: AddDocumentRequest):
     """Adds a document with a vector to the company's collection under 'live', 'test', or 'hold' and 'corrections'."""
-    result = chroma_service.add_documents_to_collection_langchain(
+    result = await async_chroma_service.add_documents_to_collection_langchain(
         company_id=request.company_id,
         data_type=request.data_type,
         documents=request.documents,
+        dedup_policy=request.dedup_policy,
     )
     # Call the service method to add the document
     return success_response(data=result)
 
 
+# Route for streaming large document loads into the collection
+@router.post("/add_documents_stream/{company_id}/{data_type}")
+async def add_documents_stream(
+    company_id: str,
+    data_type: str,
+    request: Request,
+    job_id: str = None,
+    dedup_policy: str = None,
+):
+    """Streams an NDJSON body (one {"page_content", "metadata", "id"} object per line) into the company's collection.
+
+    Documents are embedded and written in fixed-size chunks through a bounded queue, so memory stays
+    constant for large loads. Poll /company/ingest_progress/{job_id} for progress while the upload runs.
+    Duplicates are handled per dedup_policy ("skip", "merge", "replace" or "off").
+    """
+    pipeline = await async_chroma_service.create_ingest_pipeline(
+        company_id, data_type, job_id, dedup_policy
+    )
+    chunk = []
+    line_number = 0
+
+    try:
+        async for document in iter_ndjson(request.stream()):
+            line_number += 1
+            if "page_content" not in document or "id" not in document:
+                raise CustomException(
+                    400, f"Document {line_number} requires 'page_content' and 'id'"
+                )
+            chunk.append(document)
+            if len(chunk) >= config.INGEST_CHUNK_SIZE:
+                await run_in_threadpool(pipeline.submit, chunk)
+                chunk = []
+
+        if chunk:
+            await run_in_threadpool(pipeline.submit, chunk)
+    except Exception:
+        await run_in_threadpool(pipeline.close, False)
+        raise
+
+    return success_response(data=await run_in_threadpool(pipeline.close))
+
+
+def _transfer_file_path() -> str:
+    """Reserve a temporary file for a collection export or import"""
+    fd, path = tempfile.mkstemp(suffix=".parquet", dir=config.COLLECTION_TRANSFER_DIR)
+    os.close(fd)
+    return path
+
+
+# Route for exporting a collection with its embeddings
+@router.get("/export/{company_id}/{data_type}")
+async def export_collection(company_id: str, data_type: str):
+    """Downloads the collection's ids, documents, metadata and embeddings as a Parquet file.
+
+    The file can be loaded into any node with /company/import/{company_id}/{data_type} without re-embedding.
+    """
+    path = _transfer_file_path()
+    try:
+        await async_chroma_service.export_collection(company_id, data_type, path)
+    except Exception:
+        os.remove(path)
+        raise
+
+    return FileResponse(
+        path,
+        media_type="application/vnd.apache.parquet",
+        filename=f"company_{company_id}_{data_type}.parquet",
+        background=BackgroundTask(os.remove, path),
+    )
+
+
+# Route for importing a collection export
+@router.post("/import/{company_id}/{data_type}")
+async def import_collection(company_id: str, data_type: str, request: Request):
+    """Bulk-loads a Parquet export (sent as the raw request body) into the company's collection.
+
+    Stored embeddings are written as-is, so the embedding model is never called. Rows are upserted by vector ID.
+    """
+    path = _transfer_file_path()
+    try:
+        with open(path, "wb") as file:
+            async for chunk in request.stream():
+                await run_in_threadpool(file.write, chunk)
+
+        result = await async_chroma_service.import_collection(
+            company_id, data_type, path
+        )
+    finally:
+        os.remove(path)
+
+    return success_response(data=result)
+
+
+# Route for checking progress of a streaming ingest job
+@router.get("/ingest_progress/{job_id}")
+async def ingest_progress(job_id: str):
+    """Returns received/embedded/written counts for a streaming ingest job."""
+    return success_response(async_chroma_service.get_ingest_progress(job_id))
+
+
 # Route for querying documents from a collection
 @router.post("/query")
 async def query_documents(request: QueryRequest):
     """Queries the nearest documents from the company's collection filtering by 'live', 'test', or 'hold' and 'corrections'."""
     return success_response(
-        chroma_service.query_with_langchain(
+        await async_chroma_service.query_with_langchain(
             request.company_id,
             request.query,
             request.data_type,
             k=request.k,
             metadata_filter=request.metadata_filter,
             search_type=request.search_type,
+            fetch_k=request.fetch_k,
+            lambda_mult=request.lambda_mult,
         )
     )
 
@@ -47,35 +165,184 @@ async def query_documents(request: QueryRequest):
 async def delete_document(request: DeleteDocumentRequest):
     """Deletes a document from a company's collection under 'live', 'test', or 'hold' and 'corrections'."""
     return success_response(
-        chroma_service.delete_document(
+        await async_chroma_service.delete_document(
             request.company_id, request.metadata_id, request.data_type
         )
     )
 
 
+# Route for updating a document's metadata without re-embedding it
+@router.put("/update_document_metadata")
+async def update_document_metadata(request: UpdateDocumentMetadataRequest):
+    """Updates the metadata of a document identified by its metadata id, keeping the stored embedding."""
+    return success_response(
+        await async_chroma_service.update_document_metadata_langchain(
+            company_id=request.company_id,
+            data_type=request.data_type,
+            metadata_id=request.metadata_id,
+            new_metadata=request.metadata,
+            merge=request.merge,
+        )
+    )
+
+
+# Route for updating metadata of many documents in one request
+@router.put("/update_documents_metadata")
+async def update_documents_metadata(request: BulkUpdateDocumentMetadataRequest):
+    """Updates the metadata of many documents by metadata id, keeping their stored embeddings."""
+    return success_response(
+        await async_chroma_service.update_documents_metadata_bulk(
+            company_id=request.company_id,
+            data_type=request.data_type,
+            updates=[update.model_dump() for update in request.updates],
+            merge=request.merge,
+        )
+    )
+
+
+# Route for copying or moving documents between a company's collections
+@router.post("/transfer_documents")
+async def transfer_documents(request: TransferDocumentsRequest):
+    """Copies (or moves) documents between a company's collections, e.g. promoting 'test' to 'live'.
+
+    Stored embeddings are transferred as-is, so nothing is re-embedded. Use metadata_filter to select a subset.
+    """
+    return success_response(
+        await async_chroma_service.transfer_documents(
+            company_id=request.company_id,
+            source_data_type=request.source_data_type,
+            target_data_type=request.target_data_type,
+            metadata_filter=request.metadata_filter,
+            move=request.move,
+        )
+    )
+
+
 # Route for listing all collections in ChromaDB
 @router.get("/list_collections")
 async def list_collections():
     """Lists all collections stored in ChromaDB"""
-    return success_response({"collections": chroma_service.list_all_collections()})
+    return success_response(
+        {"collections": await async_chroma_service.list_all_collections()}
+    )
+
+
+# Route for inspecting the shared embedding cache
+@router.get("/embedding_cache/stats")
+async def embedding_cache_stats():
+    """Returns hit/miss counters and size of the embedding cache"""
+    return success_response(chroma_service.get_embedding_cache_stats())
+
+
+# Route for inspecting the collection handle, LangChain wrapper and retriever caches
+@router.get("/vector_store_cache/stats")
+async def vector_store_cache_stats():
+    """Returns size and hit/eviction counters of the collection, vector store and retriever caches"""
+    return success_response(chroma_service.get_vector_store_cache_stats())
+
+
+# Route for creating a collection with tenant-specific HNSW parameters
+@router.post("/collection_hnsw")
+async def configure_collection_hnsw(request: CollectionHnswRequest):
+    """Creates a collection with the given HNSW parameters, or updates search_ef of an existing one"""
+    hnsw_params = request.model_dump(
+        include={"construction_ef", "M", "search_ef"}, exclude_none=True
+    )
+    await async_chroma_service.get_or_create_company_collection(
+        request.company_id, request.data_type, hnsw_params
+    )
+    return success_response(
+        await async_chroma_service.get_collection_hnsw_params(
+            request.company_id, request.data_type
+        )
+    )
+
+
+# Route for reading a collection's HNSW parameters
+@router.get("/collection_hnsw/{company_id}/{data_type}")
+async def get_collection_hnsw(company_id: str, data_type: str):
+    """Returns construction_ef, M and search_ef of a company's collection"""
+    return success_response(
+        await async_chroma_service.get_collection_hnsw_params(company_id, data_type)
+    )
+
+
+# Route for trading recall against latency on a live collection
+@router.put("/search_ef")
+async def set_search_ef(request: SearchEfRequest):
+    """Sets search_ef of a company's collection without rebuilding its index"""
+    return success_response(
+        await async_chroma_service.set_collection_search_ef(
+            request.company_id, request.data_type, request.search_ef
+        )
+    )
+
+
+# Route for inspecting how collections are spread over the Chroma shards
+@router.get("/shards/stats")
+async def shard_stats():
+    """Returns the shard directories and the number of collections on each"""
+    return success_response(await async_chroma_service.get_shard_stats())
+
+
+# Route for moving collections onto their home shard after shards are added
+@router.post("/rebalance_shards")
+async def rebalance_shards(dry_run: bool = False):
+    """Moves misplaced collections to the shard their company hashes to"""
+    return success_response(await async_chroma_service.rebalance_shards(dry_run))
 
 
 # Route for deleting all collections for a given company
 @router.delete("/delete_company/{company_id}")
 async def delete_company_collections(company_id: str):
     """Deletes live, test, corrections and hold collections for a given company"""
-    return success_response(chroma_service.delete_company_collection(company_id))
+    return success_response(
+        await async_chroma_service.delete_company_collection(company_id)
+    )
 
 
 # New Route for listing all documents in a collection
 @router.get("/list_documents/{company_id}/{data_type}")
-async def list_all_documents_in_collection(company_id: str, data_type: str):
-    """Lists all documents in the company's collection under the specified 'live', 'test', or 'hold' and 'corrections'."""
+async def list_all_documents_in_collection(
+    company_id: str,
+    data_type: str,
+    limit: Optional[int] = Query(None, gt=0),
+    offset: int = Query(0, ge=0),
+    stream: bool = False,
+):
+    """Lists documents in the company's collection under the specified 'live', 'test', or 'hold' and 'corrections'.
 
-    return success_response(
-        data=chroma_service.list_all_documents_in_collection_langchain(
-            company_id, data_type
+    *** limit / offset ***
+    Returns one page of documents together with the offset of the next page (null on the last page).
+
+    *** stream ***
+    Streams every document as NDJSON, fetching the collection page by page.
+    """
+    if stream:
+        return StreamingResponse(
+            (
+                to_ndjson_line(document)
+                for document in chroma_service.iter_documents_in_collection(
+                    company_id, data_type
+                )
+            ),
+            media_type="application/x-ndjson",
         )
+
+    documents = await async_chroma_service.list_all_documents_in_collection_langchain(
+        company_id, data_type, limit=limit, offset=offset
+    )
+
+    if limit is None:
+        return success_response(data=documents)
+
+    return success_response(
+        data={
+            "documents": documents,
+            "limit": limit,
+            "offset": offset,
+            "next_offset": offset + limit if len(documents) == limit else None,
+        }
     )
 
 
@@ -86,7 +353,7 @@ async def delete_documents_from_collection_by_metadata(
 ):
 
     return success_response(
-        chroma_service.delete_documents_from_collection_langchain_metadata(
+        await async_chroma_service.delete_documents_from_collection_langchain_metadata(
             company_id, data_type, metadata_filter
         )
     )
@@ -95,7 +362,7 @@ async def delete_documents_from_collection_by_metadata(
 @router.post("/feedback/store")
 async def store_chat_feedback(request: ChatFeedbackRequest):
     """Store user feedback with chat conversation history"""
-    result = chroma_service.add_chat_feedback(
+    result = await async_chroma_service.add_chat_feedback(
         company_id=request.company_id,
         user_id=request.user_id,
         chat_content=request.chat_content,
@@ -110,7 +377,7 @@ async def store_chat_feedback(request: ChatFeedbackRequest):
 async def get_company_feedback(request: CompanyFeedbackRequest):
     """Retrieve feedback entries for a specific company"""
 
-    results = chroma_service.get_company_feedbacks(
+    results = await async_chroma_service.get_company_feedbacks(
         company_id=request.company_id, k=request.k, filters=request.filters
     )
     return success_response(
@@ -125,7 +392,7 @@ async def get_company_feedback(request: CompanyFeedbackRequest):
 @router.post("/feedback/user")
 async def get_user_feedback(request: UserFeedbackRequest):
     """Retrieve feedback entries for a specific user"""
-    results = chroma_service.get_user_feedbacks(
+    results = await async_chroma_service.get_user_feedbacks(
         company_id=request.company_id,
         user_id=request.user_id,
         k=request.k,
@@ -144,5 +411,5 @@ async def get_user_feedback(request: UserFeedbackRequest):
 @router.delete("/feedback/user/{company_id}/{user_id}")
 async def delete_user_feedback(company_id: str, user_id: str):
     """Delete all feedback entries for a specific user"""
-    result = chroma_service.delete_user_feedback(company_id, user_id)
+    result = await async_chroma_service.delete_user_feedback(company_id, user_id)
     return success_response(result)
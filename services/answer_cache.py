@@ -0,0 +1,96 @@
+import json
+from typing import Any, NamedTuple
+from config.config import config
+from services.vector_db import chroma_service
+from utils.semantic_cache import SemanticCache
+
+
+class AnswerLookup(NamedTuple):
+    answer: Any
+    scope: tuple
+    version: tuple
+    embedding: list
+
+
+class AnswerCacheService:
+    """Semantic cache of generated answers per (company_id, data_type, model)"""
+
+    def __init__(self):
+        self.enabled = config.ANSWER_CACHE_ENABLED
+        self.cache = SemanticCache(
+            similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+            max_entries_per_scope=config.ANSWER_CACHE_MAX_ENTRIES_PER_SCOPE,
+            max_scopes=config.ANSWER_CACHE_MAX_SCOPES,
+        )
+
+    @staticmethod
+    def _version(company_id: str, data_type: str) -> tuple:
+        """Write counters of every collection an answer is retrieved from"""
+        return chroma_service.get_collection_versions(
+            [
+                f"company_{company_id}_{data_type}",
+                f"company_{company_id}_corrections",
+                chroma_service._get_feedback_collection_name(company_id),
+            ]
+        )
+
+    def lookup(
+        self,
+        company_id: str,
+        user_id: str,
+        data_type: str,
+        model: str,
+        query: str,
+        params: dict = None,
+    ) -> AnswerLookup:
+        """
+        Find a cached answer for the query or a semantically equivalent one.
+
+        Exact repeats are served without embedding the query; otherwise the
+        query is embedded once and compared against the scope's entries.
+
+        :param company_id: The ID of the company.
+        :param user_id: The asking user when answers draw on their private feedback, else None.
+        :param data_type: The collection type the answer is grounded in.
+        :param model: Name of the generating model.
+        :param query: The user's query.
+        :param params: Generation settings that change the answer (k, filters, ...).
+        :return: AnswerLookup whose answer is None on a miss; pass it to store.
+        """
+        scope = (
+            company_id,
+            user_id,
+            data_type,
+            model,
+            json.dumps(params or {}, sort_keys=True, default=str),
+        )
+        version = self._version(company_id, data_type)
+
+        if not self.enabled:
+            return AnswerLookup(None, scope, version, None)
+
+        answer = self.cache.get_exact(scope, version, query)
+        if answer is not None:
+            return AnswerLookup(answer, scope, version, None)
+
+        embedding = chroma_service.embeddings.embed_query(query)
+        return AnswerLookup(
+            self.cache.get(scope, version, query, embedding), scope, version, embedding
+        )
+
+    def store(self, lookup: AnswerLookup, query: str, answer: Any):
+        """Cache an answer generated after a missed lookup"""
+        if not self.enabled or lookup.embedding is None:
+            return
+        self.cache.put(lookup.scope, lookup.version, query, lookup.embedding, answer)
+
+    def stats(self) -> dict:
+        """Return hit rate, size and eviction counters"""
+        if not self.enabled:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+
+# Singleton instance
+answer_cache = AnswerCacheService()
@@ -0,0 +1,267 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from config.config import config
+from services.vector_db import ChromaDBService, chroma_service
+from utils.async_ollama_embedding_client import (
+    AsyncOllamaEmbeddingClient,
+    ThreadedEmbeddingClient,
+)
+from utils.ollama_embedding_client import OllamaEmbeddingClient
+
+
+class AsyncChromaDBService:
+    """
+    Async facade over ChromaDBService for FastAPI routes.
+
+    Embeddings are fetched with a non-blocking httpx client, and every Chroma
+    read or write runs on a dedicated, bounded thread pool. A slow ingest or
+    HNSW query therefore ties up one pool worker instead of the event loop.
+    """
+
+    def __init__(self, service: ChromaDBService):
+        self.service = service
+        self._embedding_source = None
+        self._embedding_client = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.CHROMA_EXECUTOR_MAX_WORKERS,
+            thread_name_prefix="chroma",
+        )
+
+    @property
+    def embedding_client(self):
+        """
+        Async client matching the service's embedding client.
+
+        An Ollama client gets a non-blocking httpx twin with the same model,
+        URL, batching and cache; anything installed with use_embedding_client
+        is run on worker threads, so both paths embed the same way.
+        """
+        source = self.service.embedding_client
+        if source is not self._embedding_source:
+            if isinstance(source, OllamaEmbeddingClient):
+                self._embedding_client = AsyncOllamaEmbeddingClient(
+                    source.model,
+                    base_url=source.base_url,
+                    batch_size=source.batch_size,
+                    max_concurrency=source.max_concurrency,
+                    max_retries=source.max_retries,
+                    retry_backoff=source.retry_backoff,
+                    timeout=source.timeout,
+                    cache=source.cache,
+                )
+            else:
+                self._embedding_client = ThreadedEmbeddingClient(source)
+            self._embedding_source = source
+        return self._embedding_client
+
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking service call on the Chroma executor"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def add_documents_to_collection_langchain(
+        self,
+        company_id: str,
+        data_type: str,
+        documents: list[dict],
+        dedup_policy: str = None,
+    ):
+        # Dedup first so duplicates never reach the embedding model
+        plan = await self._run(
+            self.service.plan_documents_ingest,
+            company_id,
+            data_type,
+            documents,
+            dedup_policy,
+        )
+        try:
+            embeddings = await self.embedding_client.embed(plan.documents)
+        except Exception:
+            await self._run(
+                self.service.abort_documents_ingest, company_id, data_type, plan
+            )
+            raise
+        return await self._run(
+            self.service.commit_documents_ingest,
+            company_id,
+            data_type,
+            plan,
+            embeddings=embeddings,
+        )
+
+    async def query_with_langchain(
+        self,
+        company_id: str,
+        query: str,
+        data_type: str,
+        k: int = 5,
+        metadata_filter: dict = None,
+        search_type: str = "similarity",
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+    ):
+        # Score-threshold search goes through a LangChain retriever, which
+        # embeds the query itself
+        embedding = (
+            await self.embedding_client.embed_one(query)
+            if search_type in ("similarity", "mmr", "hybrid")
+            else None
+        )
+        return await self._run(
+            self.service.query_with_langchain,
+            company_id,
+            query,
+            data_type,
+            k=k,
+            metadata_filter=metadata_filter or {},
+            search_type=search_type,
+            fetch_k=fetch_k,
+            lambda_mult=lambda_mult,
+            embedding=embedding,
+        )
+
+    async def create_ingest_pipeline(
+        self,
+        company_id: str,
+        data_type: str,
+        job_id: str = None,
+        dedup_policy: str = None,
+    ):
+        return await self._run(
+            self.service.create_ingest_pipeline,
+            company_id,
+            data_type,
+            job_id,
+            dedup_policy,
+        )
+
+    def get_ingest_progress(self, job_id: str) -> dict:
+        return self.service.get_ingest_progress(job_id)
+
+    async def delete_document(self, company_id: str, metadata_id: str, data_type: str):
+        return await self._run(
+            self.service.delete_document, company_id, metadata_id, data_type
+        )
+
+    async def update_document_metadata_langchain(self, **kwargs):
+        return await self._run(
+            self.service.update_document_metadata_langchain, **kwargs
+        )
+
+    async def update_documents_metadata_bulk(self, **kwargs):
+        return await self._run(self.service.update_documents_metadata_bulk, **kwargs)
+
+    async def export_collection(self, company_id: str, data_type: str, path: str):
+        return await self._run(
+            self.service.export_collection, company_id, data_type, path
+        )
+
+    async def import_collection(self, company_id: str, data_type: str, path: str):
+        return await self._run(
+            self.service.import_collection, company_id, data_type, path
+        )
+
+    async def transfer_documents(self, **kwargs):
+        return await self._run(self.service.transfer_documents, **kwargs)
+
+    async def list_all_collections(self):
+        return await self._run(self.service.list_all_collections)
+
+    async def get_or_create_company_collection(
+        self, company_id: str, data_type: str, hnsw_params: dict = None
+    ):
+        return await self._run(
+            self.service.get_or_create_company_collection,
+            company_id,
+            data_type,
+            hnsw_params,
+        )
+
+    async def get_collection_hnsw_params(self, company_id: str, data_type: str):
+        return await self._run(
+            self.service.get_collection_hnsw_params, company_id, data_type
+        )
+
+    async def set_collection_search_ef(
+        self, company_id: str, data_type: str, search_ef: int
+    ):
+        return await self._run(
+            self.service.set_collection_search_ef, company_id, data_type, search_ef
+        )
+
+    async def rebalance_shards(self, dry_run: bool = False):
+        return await self._run(self.service.rebalance_shards, dry_run)
+
+    async def get_shard_stats(self):
+        return await self._run(self.service.get_shard_stats)
+
+    async def list_all_documents_in_collection_langchain(
+        self, company_id: str, data_type: str, limit: int = None, offset: int = 0
+    ):
+        return await self._run(
+            self.service.list_all_documents_in_collection_langchain,
+            company_id,
+            data_type,
+            limit=limit,
+            offset=offset,
+        )
+
+    async def delete_company_collection(self, company_id: str):
+        return await self._run(self.service.delete_company_collection, company_id)
+
+    async def delete_documents_from_collection_langchain_metadata(
+        self, company_id: str, data_type: str, metadata_filter: dict
+    ):
+        return await self._run(
+            self.service.delete_documents_from_collection_langchain_metadata,
+            company_id,
+            data_type,
+            metadata_filter,
+        )
+
+    async def add_chat_feedback(self, **kwargs):
+        return await self._run(self.service.add_chat_feedback, **kwargs)
+
+    async def get_company_feedbacks(
+        self, company_id: str, query: str = None, k: int = 20, filters: dict = None
+    ):
+        return await self._run(
+            self.service.get_company_feedbacks,
+            company_id=company_id,
+            query=query,
+            k=k,
+            filters=filters,
+        )
+
+    async def get_user_feedbacks(
+        self,
+        company_id: str,
+        user_id: str,
+        query: str = None,
+        k: int = 10,
+        filters: dict = None,
+    ):
+        return await self._run(
+            self.service.get_user_feedbacks,
+            company_id=company_id,
+            user_id=user_id,
+            query=query,
+            k=k,
+            filters=filters,
+        )
+
+    async def delete_user_feedback(self, company_id: str, user_id: str):
+        return await self._run(self.service.delete_user_feedback, company_id, user_id)
+
+    async def aclose(self):
+        """Release pooled connections and executor threads"""
+        if self._embedding_client is not None:
+            await self._embedding_client.aclose()
+        self._executor.shutdown(wait=False)
+
+
+# Singleton instance
+async_chroma_service = AsyncChromaDBService(chroma_service)
@@ -1,20 +1,29 @@
 import uuid
 from loguru import logger
-from concurrent.futures import ThreadPoolExecutor
 from langgraph.graph import StateGraph, START, add_messages
+from langgraph.config import get_stream_writer
 from langgraph.types import interrupt
 from langgraph.checkpoint.memory import MemorySaver
 
 # from langchain_ollama import OllamaLLM
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
 
 from langchain.globals import set_llm_cache
 from langchain_community.cache import SQLiteCache
 from typing import Annotated, List, Union, Dict
 from config.config import Config
+from services.answer_cache import answer_cache
 from services.chatbot_state_store import session_store
+from services.ollama_router import ollama_router
 from services.vector_db import chroma_service
-from utils.multi_ollama_router import MultiOllamaRouter
+from utils.graph_state import merge_update, state_reducers
+from utils.context_builder import (
+    DEFAULT_SECTION_SHARES,
+    ContextSection,
+    build_context,
+    get_context_budget,
+)
 
 
 # Parameter	              Type	     Recommended Range	               Role
@@ -59,69 +68,86 @@ class State(Dict):
     support_phone_numbers: str
     support_page_url: str
     help_center_url: str
+    cached_response: str
+
+
+def _get_chat_budgets():
+    """Split the chat model's context budget into (documents, history)"""
+    budget = get_context_budget(Config.LLAMA_CHATBOT_LLM_OLLAMA)
+    history_budget = int(budget * DEFAULT_SECTION_SHARES["history"])
+    return budget - history_budget, history_budget
 
 
 def _execute_parallel_queries(
     query: str, company_id: str, user_id: str, data_type: str
 ):
-    """Handle parallel query execution with proper resource management"""
+    """Embed the query once and retrieve main, correction and feedback context"""
     try:
-        with ThreadPoolExecutor() as executor:
-            # Initialize retrievers for each data type
-            main_retriever_future = executor.submit(
-                chroma_service.get_by_marginal_relevance,
-                company_id=company_id,
-                data_type=data_type,
-                query=query,
-            )
-            correction_future = executor.submit(
-                chroma_service.get_by_marginal_relevance,
-                company_id=company_id,
-                data_type="corrections",
-                query=query,
-            )
-            user_feedback_future = executor.submit(
-                chroma_service.get_feedback_retriever,
-                company_id=company_id,
-                metadata_filter={
+        results = chroma_service.search_collections(
+            query,
+            {
+                "main": {
                     "company_id": company_id,
-                    "user_id": user_id,
+                    "data_type": data_type,
+                    "k": 10,
+                    "fetch_k": 100,
+                    "search_type": Config.CHAT_RETRIEVAL_SEARCH_TYPE,
                 },
-            )
+                "corrections": {
+                    "company_id": company_id,
+                    "data_type": "corrections",
+                    "k": 10,
+                    "fetch_k": 100,
+                    "search_type": Config.CHAT_RETRIEVAL_SEARCH_TYPE,
+                },
+                "feedback": {
+                    "company_id": company_id,
+                    "data_type": "feedback",
+                    "k": 10,
+                    "fetch_k": 20,
+                    "metadata_filter": chroma_service.convert_to_chroma_filter(
+                        {
+                            "company_id": company_id,
+                            "user_id": user_id,
+                        }
+                    ),
+                },
+            },
+        )
+
+        main_docs = results["main"]
+        correction_docs = results["corrections"]
+        feedback_docs = results["feedback"]
 
-            # Retrieve the retriever objects
-            main_docs = main_retriever_future.result()
-            correction_docs = correction_future.result()
-            user_feedback_retriever = user_feedback_future.result()
-
-            # Execute queries using the retrievers
-            feedback_docs = user_feedback_retriever.invoke(query)
-
-            # Build combined context with error fallbacks
-            context_sections = [
-                "Main Context: "
-                + (
-                    "\n".join([d.page_content for d in main_docs])
-                    if main_docs
-                    else "No main documents found"
+        # Pack the ranked documents into what the history leaves of the budget
+        context = build_context(
+            [
+                ContextSection(
+                    "main",
+                    "Main Context: ",
+                    [d.page_content for d in main_docs],
+                    "No main documents found",
                 ),
-                "Corrections: "
-                + (
-                    "\n".join([d.page_content for d in correction_docs])
-                    if correction_docs
-                    else "No correction data available"
+                ContextSection(
+                    "corrections",
+                    "Corrections: ",
+                    [d.page_content for d in correction_docs],
+                    "No correction data available",
                 ),
-                "User Feedback Data:\n"
-                + (
-                    "\n".join([d.page_content for d in feedback_docs])
-                    if feedback_docs
-                    else "No feedback documents found"
+                ContextSection(
+                    "feedback",
+                    "User Feedback Data:\n",
+                    [d.page_content for d in feedback_docs],
+                    "No feedback documents found",
                 ),
-            ]
-
-            combined_context = "\n\n".join(context_sections)
+            ],
+            budget=_get_chat_budgets()[0],
+        )
+        logger.debug(
+            f"Retrieved context uses {context.tokens_used}/{context.budget} tokens"
+        )
 
-            return combined_context
+        return context.text
 
     except Exception as e:
         raise
@@ -131,10 +157,25 @@ def filter_non_empty(values):
     return {key: value for key, value in values.items() if value and value.strip()}
 
 
-def model(state: State):
+def model(state: State, config: RunnableConfig):
     try:
+        # Set by the streaming services: forward tokens as they are generated
+        stream_tokens = config["configurable"].get("stream_tokens", False)
+
+        # Answer served by the semantic cache, so skip generation entirely
+        if state.get("cached_response"):
+            response = AIMessage(content=state["cached_response"])
+            if stream_tokens:
+                get_stream_writer()({"token": response.content})
+            return {
+                "generated_response": [response],
+                "conversation_history": [response],
+                "feedback_count": state.get("feedback_count", 0) + 1,
+                "cached_response": "",
+            }
+
         feedback = (
-            state["human_feedback"][-1]
+            state["human_feedback"][-1].content
             if state["human_feedback"]
             else "No feedback yet"
         )
@@ -142,6 +183,20 @@ def model(state: State):
         # Get relevant documents based on the user's current query
         relevant_documents = state.get("retrieved_context", "")
 
+        # Keep the most recent turns that fit the history budget
+        history = build_context(
+            [
+                ContextSection(
+                    "history",
+                    "",
+                    [msg.content for msg in reversed(state["conversation_history"])],
+                    share=1.0,
+                )
+            ],
+            budget=_get_chat_budgets()[1],
+        )
+        conversation_history = history.items["history"][::-1]
+
         user_instructions = {state.get("custom_user_instructions", "")}
 
         # Create a dictionary with all the values
@@ -196,7 +251,7 @@ def model(state: State):
 
         prompt = f"""
         **Context** (Use ONLY these sources. Supplement with foundational knowledge when necessary):
-        - Conversation History: {[msg.content for msg in state['conversation_history']]}
+        - Conversation History: {conversation_history}
         - Custom Instructions: {user_instructions}
         - Human Feedback: {feedback}
         - Relevant Documents: {relevant_documents}
@@ -240,32 +295,34 @@ def model(state: State):
         Be the assistant the user would want to talk to: helpful, human, and straight to the point.
         """
 
-        if Config.APP_ENV == "development":
-            # Development environment configuration
-            ollama_router = MultiOllamaRouter(["http://localhost:11434"])
+        messages = [
+            SystemMessage(
+                content="You are a helpful, empathetic, and professional AI assistant."
+            ),
+            HumanMessage(content=prompt),
+        ]
+
+        if stream_tokens:
+            writer = get_stream_writer()
+            chunks = []
+            for chunk in ollama_router.stream(
+                messages, model=Config.LLAMA_CHATBOT_LLM_OLLAMA, temperature=0.7
+            ):
+                if chunk:
+                    chunks.append(chunk)
+                    writer({"token": chunk})
+            response = AIMessage(content="".join(chunks))
         else:
-            ollama_router = MultiOllamaRouter(
-                [
-                    "http://localhost:11434",
-                    "http://localhost:11435",
-                    "http://localhost:11436",
-                ]
+            response = AIMessage(
+                content=ollama_router.invoke(
+                    messages, model=Config.LLAMA_CHATBOT_LLM_OLLAMA, temperature=0.7
+                )
             )
 
-        llm = ollama_router.get_next_llm()
-
-        response = llm.invoke(
-            [
-                SystemMessage(
-                    content="You are a helpful, empathetic, and professional AI assistant."
-                ),
-                HumanMessage(content=prompt),
-            ]
-        )
+        # Reducer fields take deltas: add_messages appends these to the state
         return {
             "generated_response": [response],
-            "conversation_history": state["conversation_history"] + [response],
-            "human_feedback": state["human_feedback"],
+            "conversation_history": [response],
             "feedback_count": state.get("feedback_count", 0) + 1,
         }
     except Exception as e:
@@ -275,8 +332,9 @@ def model(state: State):
 def retrieve_node(state: State):
     retrieved_context = ""
 
-    # Ensure the user_query is not empty or just whitespace
-    if state.get("user_query", "").strip():
+    # Ensure the user_query is not empty or just whitespace, and skip
+    # retrieval when the answer is already cached
+    if state.get("user_query", "").strip() and not state.get("cached_response"):
         # Retrieve context based on the user query and data type
         retrieved_context = _execute_parallel_queries(
             query=state["user_query"],
@@ -305,10 +363,13 @@ def end_node(state: State):
     return {
         "final_response": final_response,
         "feedback_rounds": state["feedback_count"],
-        "feedback_history": state["human_feedback"],
+        "feedback_history": [msg.content for msg in state["human_feedback"]],
     }
 
 
+# Field -> reducer, used to mirror node updates into session state
+STATE_REDUCERS = state_reducers(State)
+
 graph = StateGraph(State)
 
 # First add all nodes
@@ -329,11 +390,13 @@ graph.add_edge("human_node", "end_node")  # human_node -> end_node
 # Set finish point
 graph.set_finish_point("end_node")
 
-# Compile
-compiled_graph = graph.compile(checkpointer=MemorySaver())
+# Compile. Conversations live in session_store between turns; the
+# checkpointer only holds a thread while a turn runs (interrupt() needs one)
+checkpointer = MemorySaver()
+compiled_graph = graph.compile(checkpointer=checkpointer)
 
 
-def start_conversation_service(
+def _prepare_conversation(
     client_ip: str,
     message: str,
     company_id: str,
@@ -351,21 +414,24 @@ def start_conversation_service(
     support_page_url: str,
     help_center_url: str,
 ):
-    try:
-        thread_id = str(uuid.uuid4())
-
-        state = {
-            "conversation_history": [HumanMessage(content=message)],
-            "generated_response": [],
-            "human_feedback": [],
-            "feedback_count": 0,
-            "company_id": company_id,
-            "company_website": company_website,
-            "user_id": user_id,
+    """
+    Build the opening state of a new conversation.
+
+    :return: (thread_id, answer cache lookup, initial graph state)
+    """
+    thread_id = str(uuid.uuid4())
+
+    # Opening questions repeat a lot, so look for a cached answer first
+    cached = answer_cache.lookup(
+        company_id=company_id,
+        user_id=user_id,
+        data_type=data_type,
+        model=Config.LLAMA_CHATBOT_LLM_OLLAMA,
+        query=message,
+        params={
             "custom_user_instructions": custom_user_instructions,
-            "user_query": message,
-            "data_type": data_type,
             "company_name": company_name,
+            "company_website": company_website,
             "assistant_role": assistant_role,
             "assistant_name": assistant_name,
             "main_domains": main_domains,
@@ -374,41 +440,177 @@ def start_conversation_service(
             "support_phone_numbers": support_phone_numbers,
             "support_page_url": support_page_url,
             "help_center_url": help_center_url,
-        }
+        },
+    )
 
-        # Iterate through the graph stream and update state
-        for chunk in compiled_graph.stream(
-            state, config={"configurable": {"thread_id": thread_id}}
+    state = {
+        "conversation_history": [HumanMessage(content=message)],
+        "generated_response": [],
+        "human_feedback": [],
+        "feedback_count": 0,
+        "company_id": company_id,
+        "company_website": company_website,
+        "user_id": user_id,
+        "custom_user_instructions": custom_user_instructions,
+        "user_query": message,
+        "data_type": data_type,
+        "company_name": company_name,
+        "assistant_role": assistant_role,
+        "assistant_name": assistant_name,
+        "main_domains": main_domains,
+        "sub_domains": sub_domains,
+        "support_contact_emails": support_contact_emails,
+        "support_phone_numbers": support_phone_numbers,
+        "support_page_url": support_page_url,
+        "help_center_url": help_center_url,
+        "cached_response": cached.answer or "",
+    }
+    return thread_id, cached, state
+
+
+def _run_graph(thread_id: str, state: dict, update: dict, stream_tokens: bool = False):
+    """
+    Apply an update to a conversation and run the graph on it.
+
+    The graph starts from the updated session state on an empty checkpoint,
+    and every node update is folded into ``state`` with the schema's
+    reducers, so the session copy always matches the graph's own state. The
+    thread's checkpoints are dropped when the turn ends.
+
+    :param state: Session copy of the conversation, updated in place.
+    :param update: New input, e.g. the user's message as a one-item history.
+    :param stream_tokens: Have the model node emit its tokens as it generates.
+    :return: Iterator of ("token", text) pairs, ending with either
+        ("interrupt", interrupt value) or ("end", end_node update).
+    """
+    merge_update(state, update, STATE_REDUCERS)
+    config = {"configurable": {"thread_id": thread_id, "stream_tokens": stream_tokens}}
+    final = None
+    try:
+        for mode, chunk in compiled_graph.stream(
+            dict(state), config=config, stream_mode=["updates", "custom"]
         ):
+            if mode == "custom":
+                yield "token", chunk["token"]
+                continue
+
             for node_name, value in chunk.items():
+                if node_name == "__interrupt__":
+                    final = "interrupt", value[0].value
+                    break
+                if value:
+                    merge_update(state, value, STATE_REDUCERS)
+                if node_name == "end_node":
+                    final = "end", value
+                    break
+            if final:
+                break
+    finally:
+        checkpointer.delete_thread(thread_id)
+
+    if final:
+        yield final
+
+
+def _interrupt_payload(thread_id: str, value: dict) -> dict:
+    return {
+        "thread_id": thread_id,
+        "requires_feedback": True,
+        "response": value["generated_response"],
+        "message": value["message"],
+    }
 
-                # Ensure to update state safely (only what's necessary)
-                if node_name not in ("__interrupt__",):
-                    # Merge state cautiously to avoid overwriting necessary fields
-                    for key, val in value.items():
-                        if key in state:
-                            if isinstance(val, list):
-                                state[key].extend(val)
-                            else:
-                                state[key] = val
-                        else:
-                            state[key] = val
 
-                if node_name == "__interrupt__":
-                    interrupt_obj = value[0]
-                    session_store[thread_id] = state
-                    return {
-                        "thread_id": thread_id,
-                        "requires_feedback": True,
-                        "response": interrupt_obj.value["generated_response"],
-                        "message": interrupt_obj.value["message"],
-                    }
-                elif node_name == "end_node":
-                    return {
-                        "thread_id": thread_id,
-                        "requires_feedback": False,
-                        "result": value,
-                    }
+def _end_payload(thread_id: str, value: dict) -> dict:
+    return {
+        "thread_id": thread_id,
+        "requires_feedback": False,
+        "result": value,
+    }
+
+
+def _turn_events(thread_id: str, update: dict, stream_tokens: bool = False):
+    """Run one turn of a stored conversation, keeping session_store in sync"""
+    state = session_store.get(thread_id)
+    if state is None:
+        raise ValueError("Invalid thread_id")
+
+    for event, value in _run_graph(thread_id, state, update, stream_tokens):
+        if event == "token":
+            yield "token", {"token": value}
+        elif event == "interrupt":
+            session_store[thread_id] = state
+            yield "interrupt", _interrupt_payload(thread_id, value)
+        else:
+            # End the conversation and clear session state
+            session_store.delete(thread_id)
+            yield "end", _end_payload(thread_id, value)
+
+
+def _start_events(message: str, stream_tokens: bool = False, **conversation):
+    """Open a conversation, caching its first answer when it was generated"""
+    thread_id, cached, opening = _prepare_conversation(message=message, **conversation)
+    yield "start", {"thread_id": thread_id}
+
+    state = {}
+    for event, value in _run_graph(thread_id, state, opening, stream_tokens):
+        if event == "token":
+            yield "token", {"token": value}
+        elif event == "interrupt":
+            session_store[thread_id] = state
+            if cached.answer is None:
+                answer_cache.store(cached, message, value["generated_response"])
+            yield "interrupt", _interrupt_payload(thread_id, value)
+        else:
+            yield "end", _end_payload(thread_id, value)
+
+
+def _final_event(events) -> dict:
+    """Drain an event iterator and return the payload of its interrupt or end"""
+    for event, data in events:
+        if event in ("interrupt", "end"):
+            return data
+
+
+def start_conversation_service(
+    client_ip: str,
+    message: str,
+    company_id: str,
+    user_id: str,
+    data_type: str,
+    custom_user_instructions: str,
+    company_name: str,
+    company_website: str,
+    assistant_role: str,
+    assistant_name: str,
+    main_domains: str,
+    sub_domains: str,
+    support_contact_emails: str,
+    support_phone_numbers: str,
+    support_page_url: str,
+    help_center_url: str,
+):
+    try:
+        return _final_event(
+            _start_events(
+                client_ip=client_ip,
+                message=message,
+                company_id=company_id,
+                user_id=user_id,
+                data_type=data_type,
+                custom_user_instructions=custom_user_instructions,
+                company_name=company_name,
+                company_website=company_website,
+                assistant_role=assistant_role,
+                assistant_name=assistant_name,
+                main_domains=main_domains,
+                sub_domains=sub_domains,
+                support_contact_emails=support_contact_emails,
+                support_phone_numbers=support_phone_numbers,
+                support_page_url=support_page_url,
+                help_center_url=help_center_url,
+            )
+        )
     except Exception as e:
         print(f"Error in start_conversation_service: {e}")
         raise
@@ -416,48 +618,15 @@ def start_conversation_service(
 
 def chat_service(thread_id: str, message: str):
     try:
-        # logger.info(f"Chat Request -::::::::::::::: {thread_id}")
-        # logger.info(f"Chat Request Session Store -::::::::::::::: {session_store}")
-        if thread_id not in session_store:
-            raise ValueError("Invalid thread_id")
-
-        state = session_store[thread_id]
-        state["user_query"] = message
-        state["conversation_history"].append(HumanMessage(content=message))
-
-        # Iterate through the graph stream and update state
-        for chunk in compiled_graph.stream(
-            state, config={"configurable": {"thread_id": thread_id}}
-        ):
-            for node_name, value in chunk.items():
-
-                if node_name not in ("__interrupt__",):
-                    # Safely update the state
-                    for key, val in value.items():
-                        if key in state:
-                            if isinstance(val, list):
-                                state[key].extend(val)
-                            else:
-                                state[key] = val
-                        else:
-                            state[key] = val
-
-                if node_name == "__interrupt__":
-                    interrupt_obj = value[0]
-                    session_store[thread_id] = state
-                    return {
-                        "thread_id": thread_id,
-                        "requires_feedback": True,
-                        "response": interrupt_obj.value["generated_response"],
-                        "message": interrupt_obj.value["message"],
-                    }
-                elif node_name == "end_node":
-                    session_store.pop(thread_id, None)
-                    return {
-                        "thread_id": thread_id,
-                        "requires_feedback": False,
-                        "result": value,
-                    }
+        return _final_event(
+            _turn_events(
+                thread_id,
+                {
+                    "user_query": message,
+                    "conversation_history": [HumanMessage(content=message)],
+                },
+            )
+        )
     except Exception as e:
         print(f"Error in chat_service: {e}")
         raise
@@ -465,56 +634,84 @@ def chat_service(thread_id: str, message: str):
 
 def feedback_service(thread_id: str, feedback: str):
     try:
-        # logger.info(f"Chat Feedback Request -::::::::::::::: {thread_id}")
-        # logger.info(
-        #     f"Chat Feedback Request Session Store -::::::::::::::: {session_store}"
-        # )
-
-        if thread_id not in session_store:
-            raise ValueError("Invalid thread_id")
+        # Resume the conversation with the provided feedback
+        return _final_event(
+            _turn_events(
+                thread_id, {"user_query": feedback, "human_feedback": [feedback]}
+            )
+        )
+    except Exception as e:
+        print(f"Error in feedback_service: {e}")
+        raise
 
-        # Retrieve the current state from session store
-        state = session_store[thread_id]
 
-        state["user_query"] = feedback
+def stream_start_conversation_service(
+    client_ip: str,
+    message: str,
+    company_id: str,
+    user_id: str,
+    data_type: str,
+    custom_user_instructions: str,
+    company_name: str,
+    company_website: str,
+    assistant_role: str,
+    assistant_name: str,
+    main_domains: str,
+    sub_domains: str,
+    support_contact_emails: str,
+    support_phone_numbers: str,
+    support_page_url: str,
+    help_center_url: str,
+):
+    """
+    Start a conversation like start_conversation_service, yielding events as
+    they happen: "start" with the thread_id, a "token" per generated chunk,
+    then "interrupt" or "end" with the same payload the blocking service
+    returns, or "error".
+
+    :return: Iterator of (event, data) pairs.
+    """
+    try:
+        yield from _start_events(
+            client_ip=client_ip,
+            message=message,
+            company_id=company_id,
+            user_id=user_id,
+            data_type=data_type,
+            custom_user_instructions=custom_user_instructions,
+            company_name=company_name,
+            company_website=company_website,
+            assistant_role=assistant_role,
+            assistant_name=assistant_name,
+            main_domains=main_domains,
+            sub_domains=sub_domains,
+            support_contact_emails=support_contact_emails,
+            support_phone_numbers=support_phone_numbers,
+            support_page_url=support_page_url,
+            help_center_url=help_center_url,
+            stream_tokens=True,
+        )
+    except Exception as e:
+        logger.error(f"❌ Error in stream_start_conversation_service: {e}")
+        yield "error", {"message": str(e)}
 
-        # Append the feedback to the human_feedback list
-        state["human_feedback"].append(feedback)
 
-        # Resume the conversation with the provided feedback
-        for chunk in compiled_graph.stream(
-            state, config={"configurable": {"thread_id": thread_id}}
-        ):
-            for node_name, value in chunk.items():
-                if node_name not in ("__interrupt__",):
-                    # Safely update the state
-                    for key, val in value.items():
-                        if key in state:
-                            if isinstance(val, list):
-                                state[key].extend(val)
-                            else:
-                                state[key] = val
-                        else:
-                            state[key] = val
+def stream_chat_service(thread_id: str, message: str):
+    """
+    Continue a conversation like chat_service, yielding "token" events while
+    the reply is generated and then "interrupt", "end" or "error".
 
-                if node_name == "__interrupt__":
-                    # Return the interrupt object with updated state
-                    interrupt_obj = value[0]
-                    session_store[thread_id] = state
-                    return {
-                        "thread_id": thread_id,
-                        "requires_feedback": True,
-                        "response": interrupt_obj.value["generated_response"],
-                        "message": interrupt_obj.value["message"],
-                    }
-                elif node_name == "end_node":
-                    # End the conversation and clear session state
-                    session_store.pop(thread_id, None)
-                    return {
-                        "thread_id": thread_id,
-                        "requires_feedback": False,
-                        "result": value,
-                    }
+    :return: Iterator of (event, data) pairs.
+    """
+    try:
+        yield from _turn_events(
+            thread_id,
+            {
+                "user_query": message,
+                "conversation_history": [HumanMessage(content=message)],
+            },
+            stream_tokens=True,
+        )
     except Exception as e:
-        print(f"Error in feedback_service: {e}")
-        raise
+        logger.error(f"❌ Error in stream_chat_service: {e}")
+        yield "error", {"message": str(e)}
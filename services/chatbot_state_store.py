@@ -1,3 +1,23 @@
-from typing import Dict, Any
+from config.config import config
+from utils.session_store import RedisSessionStore, SQLiteSessionStore
 
-session_store: Dict[str, Any] = {}
+
+def create_session_store():
+    """Build the session store selected by SESSION_STORE_BACKEND"""
+    if config.SESSION_STORE_BACKEND == "redis":
+        return RedisSessionStore(
+            config.SESSION_STORE_REDIS_URL, ttl_seconds=config.SESSION_TTL_SECONDS
+        )
+    if config.SESSION_STORE_BACKEND == "sqlite":
+        return SQLiteSessionStore(
+            config.SESSION_STORE_PATH,
+            ttl_seconds=config.SESSION_TTL_SECONDS,
+            sweep_interval=config.SESSION_SWEEP_INTERVAL_SECONDS,
+        )
+    raise ValueError(
+        f"Unknown SESSION_STORE_BACKEND '{config.SESSION_STORE_BACKEND}'. Must be 'sqlite' or 'redis'."
+    )
+
+
+# Singleton instance, shared by every chat service in the process
+session_store = create_session_store()
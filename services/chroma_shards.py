@@ -0,0 +1,201 @@
+import argparse
+import threading
+from pathlib import Path
+import chromadb
+from chromadb.config import Settings
+from loguru import logger
+from config.config import config
+from utils.consistent_hash import ConsistentHashRing
+
+COLLECTION_PREFIX = "company_"
+
+
+class ChromaShardRouter:
+    """
+    Spreads tenants over several Chroma persistent directories.
+
+    A company's collections all live in the directory its company_id hashes
+    to on a consistent hash ring, so each shard keeps its own SQLite lock,
+    HNSW files and write-ahead log. Clients are opened on first use.
+
+    When shards are added, collections whose home moved stay readable where
+    they are until ``rebalance`` copies them over.
+    """
+
+    def __init__(self, paths: list[str], allow_reset: bool = False, vnodes: int = 128):
+        self.paths = [str(Path(path)) for path in dict.fromkeys(paths)]
+        self.allow_reset = allow_reset
+        self.ring = ConsistentHashRing(self.paths, vnodes)
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def client(self, path: str):
+        """Return the (lazily opened) client for a shard directory"""
+        with self._lock:
+            if path not in self._clients:
+                # PersistentClient mutates its settings, so never share them
+                self._clients[path] = chromadb.PersistentClient(
+                    path=path,
+                    settings=Settings(
+                        allow_reset=self.allow_reset, anonymized_telemetry=False
+                    ),
+                )
+            return self._clients[path]
+
+    @staticmethod
+    def routing_key(collection_name: str) -> str:
+        """Company ID of a 'company_{id}_{data_type}' collection, else the name itself"""
+        if (
+            collection_name.startswith(COLLECTION_PREFIX)
+            and "_" in collection_name[len(COLLECTION_PREFIX) :]
+        ):
+            return collection_name[len(COLLECTION_PREFIX) : collection_name.rindex("_")]
+        return collection_name
+
+    def home(self, collection_name: str) -> str:
+        """Shard directory a collection belongs in"""
+        return self.ring.get_node(self.routing_key(collection_name))
+
+    @staticmethod
+    def _holds(client, collection_name: str) -> bool:
+        try:
+            client.get_collection(collection_name)
+            return True
+        except Exception:
+            return False
+
+    def locate(self, collection_name: str) -> str:
+        """
+        Shard directory currently holding a collection.
+
+        This is its home unless the collection still sits on another shard
+        awaiting a rebalance. New collections are placed at home.
+        """
+        home = self.home(collection_name)
+        if len(self.paths) == 1 or self._holds(self.client(home), collection_name):
+            return home
+
+        for path in self.paths:
+            if path != home and self._holds(self.client(path), collection_name):
+                return path
+        return home
+
+    def client_for_collection(self, collection_name: str):
+        return self.client(self.locate(collection_name))
+
+    def list_collections(self) -> list[str]:
+        """Collection names across every shard"""
+        return [
+            name for path in self.paths for name in self.client(path).list_collections()
+        ]
+
+    def misplaced(self) -> list[dict]:
+        """Collections that are not on their home shard"""
+        return [
+            {"collection": name, "source": path, "target": self.home(name)}
+            for path in self.paths
+            for name in self.client(path).list_collections()
+            if self.home(name) != path
+        ]
+
+    def move(self, collection_name: str, source: str, target: str, batch_size: int):
+        """
+        Copy a collection with its stored embeddings to another shard, then drop it.
+
+        Rows are upserted by vector ID, so an interrupted move can simply be
+        run again. Writes to the collection should be paused while it moves.
+
+        :return: Number of documents moved.
+        """
+        source_collection = self.client(source).get_collection(collection_name)
+        target_collection = self.client(target).get_or_create_collection(
+            collection_name, metadata=source_collection.metadata
+        )
+
+        offset = 0
+        while True:
+            page = source_collection.get(
+                limit=batch_size,
+                offset=offset or None,
+                include=["documents", "metadatas", "embeddings"],
+            )
+            if page["ids"]:
+                target_collection.upsert(
+                    ids=page["ids"],
+                    documents=page["documents"],
+                    metadatas=page["metadatas"],
+                    embeddings=page["embeddings"],
+                )
+            if len(page["ids"]) < batch_size:
+                break
+            offset += batch_size
+
+        moved = source_collection.count()
+        if target_collection.count() < moved:
+            raise RuntimeError(
+                f"Copy of '{collection_name}' to '{target}' is incomplete; source kept."
+            )
+
+        self.client(source).delete_collection(collection_name)
+        logger.info(
+            f"✅ Moved collection '{collection_name}' ({moved} documents) from '{source}' to '{target}'"
+        )
+        return moved
+
+    def rebalance(self, batch_size: int = None, dry_run: bool = False) -> dict:
+        """
+        Move every misplaced collection to its home shard.
+
+        :param batch_size: Documents copied per Chroma call.
+        :param dry_run: Only report what would move.
+        :return: The planned or completed moves.
+        """
+        batch_size = batch_size or config.COLLECTION_TRANSFER_BATCH_SIZE
+        moves = self.misplaced()
+
+        if not dry_run:
+            for move in moves:
+                move["documents"] = self.move(
+                    move["collection"], move["source"], move["target"], batch_size
+                )
+
+        return {"shards": self.paths, "dry_run": dry_run, "moves": moves}
+
+    def stats(self) -> dict:
+        return {
+            "shards": len(self.paths),
+            "collections_per_shard": {
+                path: len(self.client(path).list_collections()) for path in self.paths
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Move Chroma collections onto their home shard after CHROMA_SHARD_PATHS changes. "
+        "Run with the API stopped; a running service can use /company/rebalance_shards instead."
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Only list the moves")
+    parser.add_argument(
+        "--batch-size", type=int, default=config.COLLECTION_TRANSFER_BATCH_SIZE
+    )
+    args = parser.parse_args()
+
+    router = ChromaShardRouter(
+        config.CHROMA_SHARD_PATHS,
+        allow_reset=config.CHROMA_ALLOW_RESET,
+        vnodes=config.CHROMA_SHARD_VNODES,
+    )
+    result = router.rebalance(batch_size=args.batch_size, dry_run=args.dry_run)
+    for move in result["moves"]:
+        print(
+            f"{move['collection']}: {move['source']} -> {move['target']}"
+            + (f" ({move['documents']} documents)" if "documents" in move else "")
+        )
+    print(
+        f"{len(result['moves'])} collection(s) {'to move' if args.dry_run else 'moved'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
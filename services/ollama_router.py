@@ -0,0 +1,14 @@
+from config.config import config
+from utils.multi_ollama_router import MultiOllamaRouter
+
+# Singleton instance, so load and latency are tracked across requests
+ollama_router = MultiOllamaRouter(
+    config.OLLAMA_LLM_BACKENDS,
+    ewma_alpha=config.OLLAMA_ROUTER_EWMA_ALPHA,
+    health_interval=config.OLLAMA_ROUTER_HEALTH_INTERVAL,
+    health_timeout=config.OLLAMA_ROUTER_HEALTH_TIMEOUT,
+    failure_threshold=config.OLLAMA_ROUTER_FAILURE_THRESHOLD,
+    cold_load_ms=config.OLLAMA_ROUTER_COLD_LOAD_MS,
+    warm_pools=config.OLLAMA_WARM_POOLS,
+    keep_alive=config.OLLAMA_KEEP_ALIVE,
+)
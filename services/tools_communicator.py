@@ -1,4 +1,5 @@
 import gc
+import time
 from tools.gemma_vectordb import GemmaVectorDB
 from tools.deepseek_r_vectordb import DeepSeekVectorDB
 from tools.falcon_vectordb import FalconVectorDB
@@ -15,6 +16,8 @@ from tools.llava_image_analyzer import EnhancedLlavaVisionAnalyzer
 from tools.llama_image_analyzer import EnhancedLlamaVisionAnalyzer
 
 from tools.mistral_user import MistralUserHandler
+from services.answer_cache import answer_cache
+from utils.generation_time_formatter import format_generation_time
 from typing import Dict, List
 from dto.ai_assistant_requests import LLMModel, VISIONLLMModel
 
@@ -75,6 +78,36 @@ class ToolsCommunicatorService:
     ):
         try:
             """Queries the AI tool based on the model type."""
+            start_time = time.time()
+
+            # Serve repeated and paraphrased questions without generating
+            cached = answer_cache.lookup(
+                company_id=company_id,
+                # The tools read company-wide feedback, not one user's
+                user_id=None,
+                data_type=data_type,
+                model=LLMModel(model).value,
+                query=query,
+                params={
+                    "k": k,
+                    "metadata_filter": metadata_filter,
+                    "search_type": search_type,
+                    "temperature": temperature,
+                    "top_k": top_k,
+                    "top_p": top_p,
+                },
+            )
+            if cached.answer is not None:
+                # Timing and prompt size describe this request, not the original
+                return {
+                    **cached.answer,
+                    "generation_time": format_generation_time(
+                        time.time() - start_time
+                    ),
+                    "context_tokens": 0,
+                    "cached": True,
+                }
+
             match model:
                 case LLMModel.DEEPSEEK_R:
                     query_model = DeepSeekVectorDB()
@@ -93,7 +126,7 @@ class ToolsCommunicatorService:
                 case _:
                     raise
 
-            return query_model.query(
+            response = query_model.query(
                 company_id,
                 data_type,
                 query,
@@ -106,6 +139,13 @@ class ToolsCommunicatorService:
                 num_gpu,
             )
 
+            answer_cache.store(
+                cached,
+                query,
+                {"answer": response["answer"], "sources": response["sources"]},
+            )
+            return response
+
         except Exception as e:
             raise e
         finally:
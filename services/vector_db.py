@@ -1,152 +1,993 @@
+import json
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-import chromadb
-from chromadb.config import Settings
 from chromadb.utils.embedding_functions import EmbeddingFunction
-import requests
-from langchain.schema import Document
-from langchain_ollama import OllamaEmbeddings
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
 from langchain_chroma import Chroma
 from loguru import logger
 from pathlib import Path
+from typing import NamedTuple, Optional
 from config.config import config
+from services.chroma_shards import ChromaShardRouter
+from utils.collection_versions import CollectionVersions
+from utils.dedup_index import DedupIndex
+from utils.embedding_cache import EmbeddingCache
+from utils.hnsw_params import (
+    BUILD_PARAMS,
+    get_hnsw_params,
+    hnsw_metadata,
+    set_search_ef,
+)
+from utils.ingest_pipeline import IngestPipeline
+from utils.lexical_index import LexicalIndex
+from utils.lru_cache import LRUCache
+from utils.mmr import maximal_marginal_relevance
+from utils.ollama_embedding_client import OllamaEmbeddingClient
+from utils.parquet_transfer import iter_parquet, read_parquet_metadata, write_parquet
+from utils.rank_fusion import reciprocal_rank_fusion
 
 
 class OllamaEmbeddingFunction(EmbeddingFunction):
-    def __init__(self, model_name="mxbai-embed-large"):
+    def __init__(
+        self, model_name="mxbai-embed-large", client: OllamaEmbeddingClient = None
+    ):
         self.model = model_name
+        self.client = client or OllamaEmbeddingClient(model_name)
 
     def __call__(self, texts):
-        embeddings = []
-        for text in texts:
-            response = requests.post(
-                f"{config.OLLAMA_URL}/api/embeddings",
-                json={"model": self.model, "prompt": text},
-            )
-            if response.ok:
-                embedding = response.json()["embedding"]
-                embeddings.append(embedding)
-            else:
-                raise ValueError(
-                    f"Failed to get embedding from Ollama: {response.text}"
-                )
-        return embeddings
+        return self.client.embed(texts)
+
+
+class OllamaBatchEmbeddings(Embeddings):
+    """LangChain embeddings backed by the shared batched Ollama client"""
+
+    def __init__(self, client: OllamaEmbeddingClient):
+        self.client = client
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.client.embed(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.client.embed_one(text)
+
+
+class HybridRetriever(BaseRetriever):
+    """LangChain retriever that fuses BM25 and dense ranks for one collection"""
+
+    service: object
+    collection: object
+    k: int = 4
+    fetch_k: int = 20
+    metadata_filter: Optional[dict] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.service._hybrid_search(
+            self.collection,
+            query=query,
+            embedding=self.service.embeddings.embed_query(query),
+            k=self.k,
+            fetch_k=self.fetch_k,
+            metadata_filter=self.metadata_filter,
+        )
+
+
+class MMRRetriever(BaseRetriever):
+    """LangChain retriever that re-ranks one collection's candidates with NumPy MMR"""
+
+    service: object
+    collection: object
+    k: int = 4
+    fetch_k: int = 20
+    lambda_mult: float = 0.5
+    metadata_filter: Optional[dict] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.service._mmr_search(
+            self.collection,
+            embedding=self.service.embeddings.embed_query(query),
+            k=self.k,
+            fetch_k=self.fetch_k,
+            lambda_mult=self.lambda_mult,
+            metadata_filter=self.metadata_filter,
+        )
+
+
+class IngestPlan(NamedTuple):
+    positions: list[int]  # indexes of the incoming documents that get written
+    ids: list[str]
+    documents: list[str]
+    metadatas: list[dict]
+    merges: dict  # stored vector ID -> metadata merged into it
+    replaced_ids: list[str]  # stored vectors superseded by incoming documents
+    report: dict
+
+
+def ingest_message(result: dict) -> str:
+    """Summarize an ingest result, calling out documents dropped as duplicates"""
+    if not result.get("skipped"):
+        return "Documents successfully added."
+    return (
+        f"{result['added']} document(s) added, {len(result['skipped'])} skipped as "
+        "duplicates of stored documents (see 'skipped')."
+    )
 
 
 class ChromaDBService:
 
+    DEDUP_POLICIES = ("skip", "merge", "replace", "off")
+
     def __init__(self):
         """Initialize ChromaDB client with environment-based settings"""
         try:
             self.persist_directory = config.CHROMA_DB_PATH
             self.allow_reset = config.CHROMA_ALLOW_RESET
-            self.embeddings = OllamaEmbeddings(model="mxbai-embed-large")
-            self.embedding_function = OllamaEmbeddingFunction("mxbai-embed-large")
+            self.embedding_cache = (
+                EmbeddingCache(
+                    config.EMBEDDING_CACHE_PATH,
+                    max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES,
+                    touch_interval=config.EMBEDDING_CACHE_TOUCH_INTERVAL,
+                )
+                if config.EMBEDDING_CACHE_ENABLED
+                else None
+            )
+            self.embedding_client = OllamaEmbeddingClient(
+                config.OLLAMA_EMBEDDING_MODEL, cache=self.embedding_cache
+            )
+            self.embeddings = OllamaBatchEmbeddings(self.embedding_client)
+            self.embedding_function = OllamaEmbeddingFunction(
+                config.OLLAMA_EMBEDDING_MODEL, client=self.embedding_client
+            )
 
-            db_path = Path(self.persist_directory)
+            self.shards = ChromaShardRouter(
+                config.CHROMA_SHARD_PATHS,
+                allow_reset=self.allow_reset,
+                vnodes=config.CHROMA_SHARD_VNODES,
+            )
 
-            # Check if the database already exists
-            if db_path.exists() and any(
-                db_path.iterdir()
-            ):  # Check if there is any content in the folder
-                print(
-                    f"[INFO] ChromaDB already exists at {self.persist_directory}. Connecting to the existing instance."
-                )
-            else:
-                print(
-                    f"[INFO] ChromaDB not found at {self.persist_directory}. Initializing a new instance."
-                )
+            for shard_path in self.shards.paths:
+                db_path = Path(shard_path)
+
+                # Check if the database already exists
+                if db_path.exists() and any(
+                    db_path.iterdir()
+                ):  # Check if there is any content in the folder
+                    print(
+                        f"[INFO] ChromaDB already exists at {shard_path}. Connecting to the existing instance."
+                    )
+                else:
+                    print(
+                        f"[INFO] ChromaDB not found at {shard_path}. Initializing a new instance."
+                    )
+
+            # Client of the first shard, for settings shared by every shard
+            self.client = self.shards.client(self.shards.paths[0])
+
+            # Collection handles, bounded so memory stays flat as tenants grow
+            self.collections = LRUCache(config.CHROMA_COLLECTION_CACHE_SIZE)
+
+            # LangChain wrappers and retrievers reused across requests
+            self.vector_stores = LRUCache(config.CHROMA_VECTOR_STORE_CACHE_SIZE)
+            self.retrievers = LRUCache(config.CHROMA_RETRIEVER_CACHE_SIZE)
+
+            # Recent streaming ingest jobs, kept for progress lookups
+            self.ingest_jobs = LRUCache(config.INGEST_JOB_HISTORY_SIZE)
+
+            # Per-collection write counters, bumped on every change so caches
+            # built from a collection's contents can tell when they are stale
+            self.collection_versions = CollectionVersions(
+                config.COLLECTION_VERSIONS_PATH
+            )
 
-            # Initialize Chroma client
-            self.client = chromadb.PersistentClient(
-                path=str(db_path),
-                settings=Settings(
-                    allow_reset=self.allow_reset, anonymized_telemetry=False
-                ),
+            # BM25 index over company collections for hybrid search
+            self.lexical_index = (
+                LexicalIndex(config.LEXICAL_INDEX_PATH)
+                if config.LEXICAL_INDEX_ENABLED
+                else None
             )
 
-            self.collections = {}
+            # Exact and MinHash near-duplicate index consulted at ingest
+            self.dedup_index = (
+                DedupIndex(
+                    config.DEDUP_INDEX_PATH,
+                    threshold=config.DEDUP_SIMILARITY_THRESHOLD,
+                    num_perm=config.DEDUP_NUM_PERM,
+                    bands=config.DEDUP_LSH_BANDS,
+                    shingle_size=config.DEDUP_SHINGLE_SIZE,
+                )
+                if config.DEDUP_ENABLED
+                else None
+            )
 
         except Exception as e:
             print(f"[ERROR] Failed to initialize ChromaDB: {e}")
             raise
 
-    def get_or_create_company_collection(self, company_id: str, data_type: str):
-        """Retrieve or create a company's collection (live/test/hold/corrections)"""
+    def use_embedding_client(self, client):
+        """
+        Swap the client used to embed documents and queries.
+
+        Cached wrappers hold the previous client, so they are dropped. Meant for
+        offline benchmarks and tooling with a stand-in embedder such as
+        utils.hashing_embedding_client.HashingEmbeddingClient.
+
+        :param client: Object exposing embed(texts), embed_one(text) and model.
+        """
+        self.embedding_client = client
+        self.embeddings = OllamaBatchEmbeddings(client)
+        self.embedding_function = OllamaEmbeddingFunction(client.model, client=client)
+        self.collections.clear()
+        self.vector_stores.clear()
+        self.retrievers.clear()
+
+    def _get_vector_store(self, collection) -> Chroma:
+        """Return the cached LangChain Chroma wrapper for a collection"""
+        return self.vector_stores.get_or_create(
+            collection.name,
+            lambda: Chroma(
+                client=self.shards.client_for_collection(collection.name),
+                collection_name=collection.name,
+                embedding_function=self.embeddings,
+            ),
+        )
+
+    def _get_retriever_cached(self, collection, search_type: str, search_kwargs: dict):
+        """Return a cached retriever for a collection and search configuration"""
+        key = (
+            collection.name,
+            search_type,
+            json.dumps(search_kwargs, sort_keys=True, default=str),
+        )
+        return self.retrievers.get_or_create(
+            key,
+            lambda: self._get_vector_store(collection).as_retriever(
+                search_type=search_type, search_kwargs=search_kwargs
+            ),
+        )
+
+    def _get_mmr_retriever(self, collection, k: int, metadata_filter: dict = None):
+        """Return a cached retriever that ranks a collection with _mmr_search"""
+        key = (
+            collection.name,
+            "mmr",
+            json.dumps(
+                {"k": k, "filter": metadata_filter or None}, sort_keys=True, default=str
+            ),
+        )
+        return self.retrievers.get_or_create(
+            key,
+            lambda: MMRRetriever(
+                service=self,
+                collection=collection,
+                k=k,
+                metadata_filter=metadata_filter or None,
+            ),
+        )
+
+    def _invalidate_collection_caches(self, collection_name: str):
+        """Drop the cached handle, wrappers and retrievers for a collection"""
+        self.collections.pop(collection_name)
+        self.vector_stores.pop(collection_name)
+        self.retrievers.invalidate(lambda key: key[0] == collection_name)
+
+    def _mark_collection_changed(self, collection_name: str):
+        """Record a write so answers derived from the collection are invalidated"""
+        self.collection_versions.bump(collection_name)
+
+    def get_collection_version(self, collection_name: str) -> int:
+        """Return the collection's write counter, shared by every process"""
+        return self.collection_versions.get(collection_name)
+
+    def get_collection_versions(self, collection_names: list[str]) -> tuple:
+        """Return the write counters of several collections in one read"""
+        return self.collection_versions.get_many(collection_names)
+
+    def _iter_collection_text(self, collection):
+        """Yield (vector IDs, documents) pages covering a whole collection"""
+        page_size = config.LIST_DOCUMENTS_PAGE_SIZE
+        offset = 0
+
+        while True:
+            page = collection.get(
+                limit=page_size, offset=offset or None, include=["documents"]
+            )
+            if page["ids"]:
+                yield page["ids"], page["documents"]
+            if len(page["ids"]) < page_size:
+                return
+            offset += page_size
+
+    def _ensure_lexical_index(self, collection):
+        """Build the BM25 index for a collection on first use"""
+        if self.lexical_index is None:
+            raise ValueError("Hybrid search requires LEXICAL_INDEX_ENABLED=True.")
+
+        if not self.lexical_index.is_indexed(collection.name):
+            self.lexical_index.build(
+                collection.name, self._iter_collection_text(collection)
+            )
+
+    def _index_documents(self, collection, ids: list[str], documents: list[str]):
+        """Mirror newly written documents into the collection's BM25 index"""
+        if self.lexical_index is None:
+            return
+
+        # Only collections already indexed by a hybrid search are kept in
+        # step; the others are built in full by their first hybrid search
+        self.lexical_index.add(collection.name, ids, documents)
+
+    def _unindex_documents(self, collection, ids: list[str]):
+        """Remove deleted vectors from the collection's BM25 and dedup indexes"""
+        if self.lexical_index is not None:
+            self.lexical_index.remove(collection.name, ids)
+        if self.dedup_index is not None:
+            self.dedup_index.remove(collection.name, ids)
+
+    def _plan_ingest(
+        self, collection, documents: list[dict], dedup_policy: str = None
+    ) -> IngestPlan:
+        """
+        Decide which incoming documents to write, merge or let replace stored ones.
+
+        Duplicates are detected against the collection and within the batch,
+        by exact text hash first and MinHash similarity second. Policies:
+        "skip" drops duplicates, "merge" drops them but merges their metadata
+        (except "id") into the document they duplicate, "replace" writes them
+        in place of that document, and "off" writes everything. Dropped
+        documents are reported under "skipped" as their id mapped to the id
+        of the document they matched, which is how callers address them.
+
+        :param collection: Target ChromaDB collection.
+        :param documents: Documents with 'page_content', 'metadata' and 'id'.
+        :param dedup_policy: Overrides DEDUP_POLICY for this call.
+        :return: IngestPlan to pass to _commit_ingest.
+        """
+        policy = dedup_policy or config.DEDUP_POLICY
+        if policy not in self.DEDUP_POLICIES:
+            raise ValueError(
+                f"Invalid dedup policy '{policy}'. Must be one of {', '.join(self.DEDUP_POLICIES)}."
+            )
+
+        ids = [str(uuid.uuid4()) for _ in documents]
+        page_contents = [doc["page_content"] for doc in documents]
+        metadatas = [{**doc.get("metadata", {}), "id": doc["id"]} for doc in documents]
+        report = {
+            "policy": policy,
+            "exact_duplicates": 0,
+            "near_duplicates": 0,
+            "skipped": {},
+        }
+
+        plan = IngestPlan(
+            list(range(len(documents))), ids, page_contents, metadatas, {}, [], report
+        )
+        if self.dedup_index is None or not documents:
+            return plan
+
+        if not self.dedup_index.is_indexed(collection.name):
+            self.dedup_index.build(
+                collection.name, self._iter_collection_text(collection)
+            )
+
+        if policy == "off":
+            # Still fingerprint them so later ingests can match against them
+            self.dedup_index.add(collection.name, ids, page_contents)
+            return plan
+
+        matches = self.dedup_index.resolve(
+            collection.name,
+            ids,
+            [self.dedup_index.fingerprint(text) for text in page_contents],
+            replace=policy == "replace",
+        )
+
+        batch_positions = {vector_id: index for index, vector_id in enumerate(ids)}
+        keep = [True] * len(documents)
+        merges, replaced_ids = {}, []
+        skipped = {}  # incoming position -> vector ID of the document it matched
+
+        for index, match in enumerate(matches):
+            if match is None:
+                continue
+            report[f"{match.kind}_duplicates"] += 1
+            target = batch_positions.get(match.vector_id)
+
+            if policy == "replace":
+                if target is not None:
+                    keep[target] = False
+                else:
+                    replaced_ids.append(match.vector_id)
+                continue
+
+            keep[index] = False
+            skipped[index] = match.vector_id
+            if policy == "merge":
+                extra = {k: v for k, v in metadatas[index].items() if k != "id"}
+                if target is not None:
+                    metadatas[target].update(extra)
+                else:
+                    merges.setdefault(match.vector_id, {}).update(extra)
+
+        report["skipped"] = self._skipped_ids(
+            collection, skipped, batch_positions, metadatas
+        )
+
+        positions = [index for index in range(len(documents)) if keep[index]]
+        return IngestPlan(
+            positions,
+            [ids[index] for index in positions],
+            [page_contents[index] for index in positions],
+            [metadatas[index] for index in positions],
+            merges,
+            replaced_ids,
+            report,
+        )
+
+    def _skipped_ids(
+        self,
+        collection,
+        skipped: dict,
+        batch_positions: dict,
+        metadatas: list[dict],
+    ) -> dict:
+        """
+        Map the metadata id of each dropped document to its match's metadata id.
+
+        :param skipped: Incoming position -> matched vector ID.
+        :param batch_positions: Vector ID -> position, for matches in the batch.
+        :param metadatas: Metadata of the incoming documents.
+        :return: Incoming metadata id -> matched metadata id (None when the
+            match belongs to an ingest that has not been written yet).
+        """
+        stored_ids = [
+            vector_id
+            for vector_id in skipped.values()
+            if vector_id not in batch_positions
+        ]
+        stored = {}
+        if stored_ids:
+            page = collection.get(ids=stored_ids, include=["metadatas"])
+            stored = {
+                vector_id: (metadata or {}).get("id")
+                for vector_id, metadata in zip(page["ids"], page["metadatas"])
+            }
+
+        return {
+            metadatas[index]["id"]: (
+                metadatas[batch_positions[vector_id]]["id"]
+                if vector_id in batch_positions
+                else stored.get(vector_id)
+            )
+            for index, vector_id in skipped.items()
+        }
+
+    def _abort_ingest(self, collection, plan: IngestPlan):
+        """
+        Undo the fingerprints of a plan that will not be committed.
+
+        _plan_ingest registers new documents as soon as it plans them, so
+        concurrent ingests see them as duplicates. When embedding fails or the
+        plan is otherwise dropped before anything is written, its vector IDs
+        are forgotten and the documents it would have replaced are
+        fingerprinted again, so a retry can add the same documents.
+
+        :param collection: Target ChromaDB collection.
+        :param plan: Plan returned by _plan_ingest and never committed.
+        """
+        if self.dedup_index is None or not (plan.ids or plan.replaced_ids):
+            return
+        try:
+            self.dedup_index.remove(collection.name, plan.ids)
+            if plan.replaced_ids:
+                stored = collection.get(ids=plan.replaced_ids, include=["documents"])
+                self.dedup_index.add(
+                    collection.name, stored["ids"], stored["documents"]
+                )
+        except Exception as e:
+            logger.warning(
+                f"⚠️ Could not roll back dedup fingerprints for '{collection.name}' ({e}), rebuilding the index on next use"
+            )
+            self.dedup_index.drop(collection.name)
+
+    def _commit_ingest(
+        self, collection, plan: IngestPlan, embeddings: list[list[float]] = None
+    ) -> dict:
+        """
+        Apply an IngestPlan: write new documents, merge metadata, drop replaced ones.
+
+        :param collection: Target ChromaDB collection.
+        :param plan: Plan returned by _plan_ingest.
+        :param embeddings: Optional precomputed embeddings for plan.documents.
+        :return: Counts of what was written, merged and replaced.
+        """
+        try:
+            self._add_to_collection(
+                collection,
+                documents=plan.documents,
+                metadatas=plan.metadatas,
+                ids=plan.ids,
+                embeddings=embeddings,
+            )
+            self._index_documents(collection, plan.ids, plan.documents)
+
+            if plan.merges:
+                self._write_metadata(
+                    collection, list(plan.merges), list(plan.merges.values()), True
+                )
+
+            if plan.replaced_ids:
+                collection.delete(ids=plan.replaced_ids)
+                self._mark_collection_changed(collection.name)
+                self._unindex_documents(collection, plan.replaced_ids)
+        except Exception:
+            # Fingerprints were registered while planning; rebuild from Chroma
+            if self.dedup_index is not None:
+                self.dedup_index.drop(collection.name)
+            raise
+
+        return {
+            **plan.report,
+            "added": len(plan.ids),
+            "merged": len(plan.merges),
+            "replaced": len(plan.replaced_ids),
+        }
+
+    def get_or_create_company_collection(
+        self, company_id: str, data_type: str, hnsw_params: dict = None
+    ):
+        """
+        Retrieve or create a company's collection (live/test/hold/corrections)
+
+        :param hnsw_params: Per-tenant construction_ef, M and search_ef overrides.
+            Build parameters only apply when the collection is created; a
+            different search_ef is applied to an existing collection.
+        """
         if data_type not in ["live", "test", "hold", "corrections"]:
             raise ValueError(
                 "Invalid data type. Must be 'live','test' or 'hold' and 'corrections'.",
             )
 
         collection_name = f"company_{company_id}_{data_type}"
+        metadata = hnsw_metadata(hnsw_params)
+
+        def create():
+            collection = self.shards.client_for_collection(
+                collection_name
+            ).get_or_create_collection(
+                collection_name,
+                metadata=metadata,
+                embedding_function=self.embedding_function,
+            )
+            logger.info(f"✅ Collection '{collection_name}' is ready.")
+            return collection
 
         try:
-            if collection_name not in self.collections:
-                collection = self.client.get_or_create_collection(
-                    collection_name,
-                    metadata={"hnsw:space": "cosine"},
-                    embedding_function=self.embedding_function,
+            collection = self.collections.get_or_create(collection_name, create)
+            if hnsw_params:
+                self._apply_hnsw_params(collection, hnsw_params)
+            return collection
+        except Exception as e:
+            raise
+
+    def _apply_hnsw_params(self, collection, hnsw_params: dict):
+        """Reconcile an existing collection with requested HNSW parameters"""
+        current = get_hnsw_params(collection)
+        for name in BUILD_PARAMS:
+            if name in hnsw_params and hnsw_params[name] != current[name]:
+                logger.warning(
+                    f"⚠️ Collection '{collection.name}' was built with {name}={current[name]}; "
+                    f"{hnsw_params[name]} only applies to a new collection"
                 )
-                self.collections[collection_name] = collection
-                logger.info(f"✅ Collection '{collection_name}' is ready.")
+        search_ef = hnsw_params.get("search_ef")
+        if search_ef is not None and search_ef != current["search_ef"]:
+            set_search_ef(collection, search_ef)
+            logger.info(
+                f"✅ search_ef of '{collection.name}' set to {search_ef} (was {current['search_ef']})"
+            )
 
-            return self.collections[collection_name]
+    def get_collection_hnsw_params(self, company_id: str, data_type: str) -> dict:
+        """Return the HNSW parameters of a company's collection"""
+        collection = self.get_or_create_company_collection(company_id, data_type)
+        return {"collection": collection.name, **get_hnsw_params(collection)}
+
+    def set_collection_search_ef(
+        self, company_id: str, data_type: str, search_ef: int
+    ) -> dict:
+        """
+        Change how many candidates a company's collection explores per query.
+
+        Higher values raise recall at the cost of latency; see
+        benchmarks/hnsw_recall_benchmark.py for the trade-off.
+
+        :return: The collection's HNSW parameters after the change.
+        """
+        try:
+            collection = self.get_or_create_company_collection(
+                company_id, data_type, hnsw_params={"search_ef": search_ef}
+            )
+            return {"collection": collection.name, **get_hnsw_params(collection)}
         except Exception as e:
+            logger.error(f"❌ Failed to set search_ef: {e}")
             raise
 
+    def _add_to_collection(
+        self,
+        collection,
+        documents: list[str],
+        metadatas: list[dict],
+        ids: list[str] = None,
+        embeddings: list[list[float]] = None,
+    ):
+        """
+        Embed documents with the batched client and add them to a collection.
+
+        Writes are split to respect the client's maximum batch size.
+
+        :param collection: Target ChromaDB collection.
+        :param documents: Document texts.
+        :param metadatas: One metadata dict per document.
+        :param ids: Optional vector IDs; random UUIDs are generated when omitted.
+        :param embeddings: Optional precomputed embeddings, one per document.
+        :return: The vector IDs written.
+        """
+        if not documents:
+            return []
+
+        ids = ids or [str(uuid.uuid4()) for _ in documents]
+        write_batch_size = self.client.get_max_batch_size()
+
+        for start in range(0, len(documents), write_batch_size):
+            end = start + write_batch_size
+            batch_documents = documents[start:end]
+            collection.add(
+                ids=ids[start:end],
+                documents=batch_documents,
+                metadatas=metadatas[start:end],
+                embeddings=(
+                    embeddings[start:end]
+                    if embeddings is not None
+                    else self.embedding_client.embed(batch_documents)
+                ),
+            )
+
+        self._mark_collection_changed(collection.name)
+        return ids
+
     def add_documents_to_collection_langchain(
-        self, company_id: str, data_type: str, documents: list[dict]
+        self,
+        company_id: str,
+        data_type: str,
+        documents: list[dict],
+        embeddings: list[list[float]] = None,
+        dedup_policy: str = None,
     ):
         """
         Adds new documents to the specified ChromaDB collection.
 
+        Exact and near-duplicates are handled according to the dedup policy
+        before anything is embedded.
+
         :param company_id: The ID of the company.
         :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
         :param documents: A list of dictionaries with 'content' and 'metadata'.
-        :return: Success message.
+        :param embeddings: Optional precomputed embeddings, one per document.
+        :param dedup_policy: 'skip', 'merge', 'replace' or 'off' (defaults to DEDUP_POLICY).
+        :return: Success message with dedup counts.
         """
         try:
             # Get or create the collection
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            # Convert documents into LangChain Document format
-            docs = [
-                Document(
-                    page_content=doc["page_content"],
-                    metadata={**doc.get("metadata", {}), "id": doc["id"]},
-                )
-                for doc in documents
-            ]
-
-            # Store documents in Chroma
-            Chroma.from_documents(
-                documents=docs,
-                embedding=self.embeddings,
-                collection_name=collection.name,
-                persist_directory=self.persist_directory,
+            plan = self._plan_ingest(collection, documents, dedup_policy)
+            result = self._commit_ingest(
+                collection,
+                plan,
+                embeddings=(
+                    [embeddings[index] for index in plan.positions]
+                    if embeddings is not None
+                    else None
+                ),
             )
 
-            return {"message": "Documents successfully added."}
+            return {"message": ingest_message(result), **result}
 
         except Exception as e:
             raise
 
+    def plan_documents_ingest(
+        self,
+        company_id: str,
+        data_type: str,
+        documents: list[dict],
+        dedup_policy: str = None,
+    ) -> IngestPlan:
+        """First half of add_documents_to_collection_langchain, for callers embedding themselves"""
+        collection = self.get_or_create_company_collection(company_id, data_type)
+        return self._plan_ingest(collection, documents, dedup_policy)
+
+    def commit_documents_ingest(
+        self,
+        company_id: str,
+        data_type: str,
+        plan: IngestPlan,
+        embeddings: list[list[float]] = None,
+    ):
+        """Second half of add_documents_to_collection_langchain"""
+        collection = self.get_or_create_company_collection(company_id, data_type)
+        result = self._commit_ingest(collection, plan, embeddings)
+        return {"message": ingest_message(result), **result}
+
+    def abort_documents_ingest(self, company_id: str, data_type: str, plan: IngestPlan):
+        """Release a plan from plan_documents_ingest that will not be committed"""
+        collection = self.get_or_create_company_collection(company_id, data_type)
+        self._abort_ingest(collection, plan)
+
+    def create_ingest_pipeline(
+        self,
+        company_id: str,
+        data_type: str,
+        job_id: str = None,
+        dedup_policy: str = None,
+    ) -> IngestPipeline:
+        """
+        Start a streaming ingest job that embeds and writes documents in chunks.
+
+        Documents use the same shape as add_documents_to_collection_langchain
+        and go through the same dedup stage, chunk by chunk, before embedding.
+        Progress can be read back with get_ingest_progress while it runs.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param job_id: Optional caller-chosen job ID.
+        :param dedup_policy: 'skip', 'merge', 'replace' or 'off' (defaults to DEDUP_POLICY).
+        :return: The running IngestPipeline.
+        """
+        collection = self.get_or_create_company_collection(company_id, data_type)
+
+        def embed(documents: list[dict]):
+            plan = self._plan_ingest(collection, documents, dedup_policy)
+            try:
+                return plan, self.embedding_client.embed(plan.documents)
+            except Exception:
+                self._abort_ingest(collection, plan)
+                raise
+
+        def write(documents: list[dict], prepared) -> int:
+            plan, embeddings = prepared
+            return self._commit_ingest(collection, plan, embeddings)["added"]
+
+        def discard(documents: list[dict], prepared):
+            # Chunks planned and embedded but dropped after the job failed
+            self._abort_ingest(collection, prepared[0])
+
+        pipeline = IngestPipeline(
+            embed_fn=embed,
+            write_fn=write,
+            discard_fn=discard,
+            queue_size=config.INGEST_QUEUE_SIZE,
+            job_id=job_id,
+        )
+        self.ingest_jobs.put(pipeline.job_id, pipeline)
+        return pipeline
+
+    def get_ingest_progress(self, job_id: str) -> dict:
+        """Return progress of a running or recently finished ingest job"""
+        pipeline = self.ingest_jobs.get(job_id)
+        if pipeline is None:
+            raise ValueError(f"Ingest job '{job_id}' not found.")
+        return pipeline.progress()
+
     def get_by_marginal_relevance(self, company_id: str, data_type: str, query: str):
         try:
-            collection = self.get_or_create_company_collection(company_id, data_type)
-            vector_store = Chroma(
-                client=self.client,
-                collection_name=collection.name,
-                embedding_function=self.embeddings,
-            )
-
-            results = vector_store.max_marginal_relevance_search_by_vector(
+            return self.query_by_vector(
+                company_id=company_id,
+                data_type=data_type,
                 embedding=self.embeddings.embed_query(query),
                 k=10,
                 fetch_k=100,
                 lambda_mult=0.5,
+                search_type="mmr",
+            )
+
+        except Exception as e:
+            raise
+
+    def query_by_vector(
+        self,
+        company_id: str,
+        data_type: str,
+        embedding: list[float],
+        k: int = 10,
+        fetch_k: int = 100,
+        lambda_mult: float = 0.5,
+        search_type: str = "mmr",  # mmr, similarity, hybrid
+        metadata_filter: dict = None,
+        query: str = None,
+    ):
+        """
+        Search a company collection with a precomputed query embedding.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections' or 'feedback').
+        :param embedding: Query embedding.
+        :param k: The number of final results to return.
+        :param fetch_k: Candidates fetched before MMR re-ranking.
+        :param lambda_mult: MMR diversity trade-off (0 = diverse, 1 = relevant).
+        :param search_type: 'mmr', 'similarity' or 'hybrid'.
+        :param metadata_filter: Chroma where-filter applied to the search.
+        :param query: Query text, required for 'hybrid' search.
+        :return: List of LangChain documents.
+        """
+        try:
+            if data_type == "feedback":
+                collection = self.get_or_create_feedback_collection(company_id)
+            else:
+                collection = self.get_or_create_company_collection(
+                    company_id, data_type
+                )
+
+            if search_type == "mmr":
+                return self._mmr_search(
+                    collection,
+                    embedding=embedding,
+                    k=k,
+                    fetch_k=fetch_k,
+                    lambda_mult=lambda_mult,
+                    metadata_filter=metadata_filter,
+                )
+
+            if search_type == "hybrid":
+                if not query:
+                    raise ValueError("Hybrid search requires the query text.")
+                return self._hybrid_search(
+                    collection,
+                    query=query,
+                    embedding=embedding,
+                    k=k,
+                    fetch_k=fetch_k,
+                    metadata_filter=metadata_filter,
+                )
+
+            vector_store = self._get_vector_store(collection)
+
+            return vector_store.similarity_search_by_vector(
+                embedding=embedding,
+                k=k,
+                filter=metadata_filter or None,
+            )
+
+        except Exception as e:
+            raise
+
+    @staticmethod
+    def _mmr_search(
+        collection,
+        embedding: list[float],
+        k: int,
+        fetch_k: int,
+        lambda_mult: float,
+        metadata_filter: dict = None,
+    ) -> list[Document]:
+        """
+        Fetch candidates with their stored embeddings and re-rank them with MMR.
+
+        :return: Selected documents in MMR order.
+        """
+        results = collection.query(
+            query_embeddings=[embedding],
+            n_results=max(fetch_k, k),
+            where=metadata_filter or None,
+            include=["documents", "metadatas", "embeddings"],
+        )
+
+        candidate_embeddings = results["embeddings"][0]
+        if candidate_embeddings is None or len(candidate_embeddings) == 0:
+            return []
+
+        selected = maximal_marginal_relevance(
+            embedding, candidate_embeddings, k=k, lambda_mult=lambda_mult
+        )
+
+        return [
+            Document(
+                id=results["ids"][0][i],
+                page_content=results["documents"][0][i],
+                metadata=results["metadatas"][0][i] or {},
             )
+            for i in selected
+        ]
+
+    def _hybrid_search(
+        self,
+        collection,
+        query: str,
+        embedding: list[float],
+        k: int,
+        fetch_k: int,
+        metadata_filter: dict = None,
+    ) -> list[Document]:
+        """
+        Fuse BM25 and dense rankings with reciprocal rank fusion.
 
-            return results
+        Both retrievers contribute up to fetch_k candidates. Lexical hits the
+        dense side did not return are fetched by ID under the same metadata
+        filter, which also drops any stale index entries.
+
+        :return: Top-k documents by fused rank.
+        """
+        self._ensure_lexical_index(collection)
+        fetch_k = max(fetch_k, k)
+
+        dense = collection.query(
+            query_embeddings=[embedding],
+            n_results=fetch_k,
+            where=metadata_filter or None,
+            include=["documents", "metadatas"],
+        )
+        documents = {
+            vector_id: Document(
+                id=vector_id, page_content=document, metadata=metadata or {}
+            )
+            for vector_id, document, metadata in zip(
+                dense["ids"][0], dense["documents"][0], dense["metadatas"][0]
+            )
+        }
+
+        lexical_ids = self.lexical_index.search(collection.name, query, limit=fetch_k)
+        missing = [vector_id for vector_id in lexical_ids if vector_id not in documents]
+        if missing:
+            extra = collection.get(
+                ids=missing,
+                where=metadata_filter or None,
+                include=["documents", "metadatas"],
+            )
+            for vector_id, document, metadata in zip(
+                extra["ids"], extra["documents"], extra["metadatas"]
+            ):
+                documents[vector_id] = Document(
+                    id=vector_id, page_content=document, metadata=metadata or {}
+                )
+
+        fused = reciprocal_rank_fusion(
+            [
+                dense["ids"][0],
+                [vector_id for vector_id in lexical_ids if vector_id in documents],
+            ],
+            rank_constant=config.HYBRID_RRF_K,
+        )
+        return [documents[vector_id] for vector_id in fused[:k]]
+
+    def search_collections(self, query: str, searches: dict[str, dict]) -> dict:
+        """
+        Embed a query once and fan the vector out to several collections.
+
+        :param query: The query string.
+        :param searches: Mapping of result key to keyword arguments for
+            query_by_vector (company_id, data_type, k, fetch_k, lambda_mult,
+            search_type, metadata_filter).
+        :return: Mapping of result key to the list of retrieved documents.
+        """
+        try:
+            if not searches:
+                return {}
+
+            embedding = self.embeddings.embed_query(query)
+
+            with ThreadPoolExecutor(max_workers=len(searches)) as executor:
+                futures = {
+                    key: executor.submit(
+                        self.query_by_vector, embedding=embedding, query=query, **search
+                    )
+                    for key, search in searches.items()
+                }
+                return {key: future.result() for key, future in futures.items()}
 
         except Exception as e:
             raise
@@ -155,23 +996,30 @@ class ChromaDBService:
         self,
         company_id: str,
         data_type: str,
+        k: int = 100,
         metadata_filter: dict = None,
-        search_type: str = "mmr",  # similarity(default), similarity_score_threshold, mmr
+        search_type: str = "mmr",  # similarity(default), similarity_score_threshold, mmr, hybrid
     ):
         """Return a LangChain BaseRetriever for querying documents."""
         try:
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            vector_store = Chroma(
-                client=self.client,
-                collection_name=collection.name,
-                embedding_function=self.embeddings,
-            )
+            if search_type == "hybrid":
+                return HybridRetriever(
+                    service=self,
+                    collection=collection,
+                    k=k,
+                    metadata_filter=metadata_filter or None,
+                )
 
-            return vector_store.as_retriever(
+            if search_type == "mmr":
+                return self._get_mmr_retriever(collection, k, metadata_filter)
+
+            return self._get_retriever_cached(
+                collection,
                 search_type=search_type,
                 search_kwargs={
-                    "k": 100,
+                    "k": k,
                     **({"filter": metadata_filter} if metadata_filter else {}),
                 },
             )
@@ -187,6 +1035,9 @@ class ChromaDBService:
         k: int = 5,
         metadata_filter: dict = {},
         search_type: str = "similarity",
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        embedding: list[float] = None,
     ):
         """
         Query documents using LangChain's Chroma retriever with MMR-based search.
@@ -196,36 +1047,61 @@ class ChromaDBService:
         :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
         :param k: The number of final results to return.
         :param metadata_filter: Dictionary of metadata filters (e.g., {"source": "news"}).
+        :param search_type: 'similarity', 'similarity_score_threshold', 'mmr' or 'hybrid'.
+        :param fetch_k: Candidates fetched before MMR re-ranking or rank fusion.
+        :param lambda_mult: MMR diversity trade-off (0 = diverse, 1 = relevant).
+        :param embedding: Optional precomputed query embedding.
         :return: List of retrieved document metadata.
         """
         try:
             # Get or create the collection
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            # Convert ChromaDB collection to LangChain Chroma
-            vector_store = Chroma(
-                client=self.client,
-                collection_name=collection.name,
-                embedding_function=self.embeddings,
-            )
-
             # """ Similarity Search: If a user liked a specific movie, the system will recommend movies that are highly similar to the one they liked. """
 
             # """ MMR Search: The system might recommend movies that are similar to the one the user liked but will also add diverse recommendations,
             #     such as different genres, actors, or themes, to give the user a broader selection. """
 
-            # Configure retriever
-
-            retriever = vector_store.as_retriever(
-                search_type=search_type,
-                search_kwargs={
-                    "k": k,
-                    **({"filter": metadata_filter} if metadata_filter else {}),
-                },
-            )
+            if search_type == "mmr":
+                # Re-rank in-process over the embeddings Chroma returns
+                results = self._mmr_search(
+                    collection,
+                    embedding=embedding or self.embeddings.embed_query(query),
+                    k=k,
+                    fetch_k=fetch_k,
+                    lambda_mult=lambda_mult,
+                    metadata_filter=metadata_filter,
+                )
+            elif search_type == "hybrid":
+                # Fuse BM25 and dense ranks so exact identifiers are not missed
+                results = self._hybrid_search(
+                    collection,
+                    query=query,
+                    embedding=embedding or self.embeddings.embed_query(query),
+                    k=k,
+                    fetch_k=fetch_k,
+                    metadata_filter=metadata_filter,
+                )
+            elif search_type == "similarity" and embedding is not None:
+                # Reuse the caller's embedding instead of re-embedding the query
+                results = self._get_vector_store(
+                    collection
+                ).similarity_search_by_vector(
+                    embedding=embedding, k=k, filter=metadata_filter or None
+                )
+            else:
+                # Configure retriever
+                retriever = self._get_retriever_cached(
+                    collection,
+                    search_type=search_type,
+                    search_kwargs={
+                        "k": k,
+                        **({"filter": metadata_filter} if metadata_filter else {}),
+                    },
+                )
 
-            # Invoke the retriever
-            results = retriever.get_relevant_documents(query)
+                # Invoke the retriever
+                results = retriever.get_relevant_documents(query)
 
             # If no results found, return an empty array
             if not results:
@@ -258,35 +1134,36 @@ class ChromaDBService:
             # Get collection
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            # Apply filter to delete specific documents
-            collection.delete(where=metadata_filter)
+            # Resolve matching IDs so the lexical index can be kept in step
+            ids = collection.get(where=metadata_filter, include=[])["ids"]
+            if ids:
+                collection.delete(ids=ids)
+                self._mark_collection_changed(collection.name)
+                self._unindex_documents(collection, ids)
 
             return {"message": "Documents successfully deleted."}
 
         except Exception as e:
             raise
 
+    @staticmethod
+    def _find_vector_ids(collection, metadata_id: str) -> list[str]:
+        """
+        Resolve Chroma vector IDs for a user-facing metadata['id'].
+
+        Chroma keeps a (key, value) index over metadata in its SQLite store,
+        so an equality filter is an indexed lookup rather than a full scan.
+        """
+        return collection.get(where={"id": metadata_id}, include=[])["ids"]
+
     def delete_document(self, company_id: str, metadata_id: str, data_type: str):
         """Delete a document from the specified company's collection using metadata['id']"""
         try:
             # Get or create the collection metadata
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            # Load vector store
-            vector_store = Chroma(
-                client=self.client,
-                collection_name=collection.name,
-                embedding_function=self.embeddings,
-                persist_directory=self.persist_directory,
-            )
-
-            # Search for the document's vector ID via metadata["id"]
-            results = vector_store._collection.get(include=["metadatas", "ids"])
-            matching_ids = [
-                doc_id
-                for doc_id, meta in zip(results["ids"], results["metadatas"])
-                if meta.get("id") == metadata_id
-            ]
+            # Resolve the document's vector IDs via the metadata["id"] index
+            matching_ids = self._find_vector_ids(collection, metadata_id)
 
             if not matching_ids:
                 raise ValueError(
@@ -294,7 +1171,9 @@ class ChromaDBService:
                 )
 
             # Delete using the actual vector ID
-            vector_store.delete(ids=matching_ids)
+            collection.delete(ids=matching_ids)
+            self._mark_collection_changed(collection.name)
+            self._unindex_documents(collection, matching_ids)
 
             logger.info(
                 f"✅ Document with metadata ID '{metadata_id}' deleted from '{company_id}' ({data_type})"
@@ -309,46 +1188,267 @@ class ChromaDBService:
             raise
 
     def list_all_documents_in_collection_langchain(
-        self, company_id: str, data_type: str
+        self, company_id: str, data_type: str, limit: int = None, offset: int = 0
     ):
         """
-        Lists all documents stored in a ChromaDB collection.
+        Lists documents stored in a ChromaDB collection.
 
         :param company_id: The ID of the company.
         :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param limit: Maximum number of documents to return (all when None).
+        :param offset: Number of documents to skip.
         :return: List of document metadata.
         """
         try:
             # Get collection
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            # Fetch all documents
-            docs = collection.get(include=["documents"])
-            metadatas = collection.get(include=["metadatas"])
-            # embeddings = collection.get(include=["embeddings"])
+            # Fetch documents and metadata in a single round trip
+            page = collection.get(
+                limit=limit, offset=offset or None, include=["documents", "metadatas"]
+            )
 
             # Prepare return structure with safe data types
-            results = []
-            for i in range(len(docs["documents"])):
-                results.append(
-                    {
-                        "id": docs["ids"][i],
-                        "page_content": docs["documents"][i],
-                        "metadatas": metadatas["metadatas"][i],
-                        # "embeddings": embeddings["embeddings"][i],
-                    }
+            return [
+                {
+                    "id": vector_id,
+                    "page_content": document,
+                    "metadatas": metadata,
+                }
+                for vector_id, document, metadata in zip(
+                    page["ids"], page["documents"], page["metadatas"]
+                )
+            ]
+
+        except Exception as e:
+            raise
+
+    def iter_documents_in_collection(
+        self, company_id: str, data_type: str, page_size: int = None
+    ):
+        """
+        Yield every document in a collection, fetching one page at a time.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param page_size: Documents fetched per Chroma call.
+        """
+        page_size = page_size or config.LIST_DOCUMENTS_PAGE_SIZE
+        offset = 0
+
+        while True:
+            page = self.list_all_documents_in_collection_langchain(
+                company_id, data_type, limit=page_size, offset=offset
+            )
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+
+    def _iter_collection_records(self, collection, page_size: int):
+        """Yield (ids, documents, metadatas, embeddings) pages covering a collection"""
+        offset = 0
+
+        while True:
+            page = collection.get(
+                limit=page_size,
+                offset=offset or None,
+                include=["documents", "metadatas", "embeddings"],
+            )
+            if page["ids"]:
+                yield (
+                    page["ids"],
+                    page["documents"],
+                    page["metadatas"],
+                    page["embeddings"],
+                )
+            if len(page["ids"]) < page_size:
+                return
+            offset += page_size
+
+    def export_collection(self, company_id: str, data_type: str, path: str) -> dict:
+        """
+        Write a collection's ids, documents, metadata and embeddings to Parquet.
+
+        Pages are read from Chroma and written as row groups one at a time,
+        so memory stays flat regardless of the collection's size.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param path: Destination Parquet file.
+        :return: Document count and embedding dimension exported.
+        """
+        try:
+            collection = self.get_or_create_company_collection(company_id, data_type)
+
+            result = write_parquet(
+                path,
+                self._iter_collection_records(
+                    collection, config.COLLECTION_TRANSFER_BATCH_SIZE
+                ),
+                {
+                    "collection": collection.name,
+                    "embedding_model": config.OLLAMA_EMBEDDING_MODEL,
+                    "exported_at": datetime.now().isoformat(),
+                },
+                compression=config.COLLECTION_EXPORT_COMPRESSION,
+            )
+
+            logger.info(
+                f"✅ Exported {result['rows']} documents from '{collection.name}'"
+            )
+            return {
+                "collection": collection.name,
+                "documents": result["rows"],
+                "dimension": result["dimension"],
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Failed to export collection: {e}")
+            raise
+
+    def import_collection(self, company_id: str, data_type: str, path: str) -> dict:
+        """
+        Bulk-load a Parquet export into a collection using its stored embeddings.
+
+        Rows are upserted by vector ID, so importing the same file twice is
+        harmless. The embedder is never called; the export must therefore come
+        from the same embedding model.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param path: Parquet file written by export_collection.
+        :return: Number of documents imported.
+        """
+        try:
+            export = read_parquet_metadata(path)
+            if export.get("embedding_model") != config.OLLAMA_EMBEDDING_MODEL:
+                raise ValueError(
+                    f"Export was embedded with '{export.get('embedding_model')}', "
+                    f"but this service uses '{config.OLLAMA_EMBEDDING_MODEL}'."
+                )
+
+            collection = self.get_or_create_company_collection(company_id, data_type)
+            batch_size = min(
+                config.COLLECTION_TRANSFER_BATCH_SIZE, self.client.get_max_batch_size()
+            )
+
+            imported = 0
+            try:
+                for ids, documents, metadatas, embeddings in iter_parquet(
+                    path, batch_size
+                ):
+                    collection.upsert(
+                        ids=ids,
+                        documents=documents,
+                        metadatas=metadatas,
+                        embeddings=embeddings,
+                    )
+                    imported += len(ids)
+            finally:
+                # Derived indexes are rebuilt from the collection on next use
+                self._mark_collection_changed(collection.name)
+                if self.lexical_index is not None:
+                    self.lexical_index.drop(collection.name)
+                if self.dedup_index is not None:
+                    self.dedup_index.drop(collection.name)
+
+            logger.info(
+                f"✅ Imported {imported} documents from '{export.get('collection')}' into '{collection.name}'"
+            )
+            return {
+                "collection": collection.name,
+                "source_collection": export.get("collection"),
+                "documents": imported,
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Failed to import collection: {e}")
+            raise
+
+    def transfer_documents(
+        self,
+        company_id: str,
+        source_data_type: str,
+        target_data_type: str,
+        metadata_filter: dict = None,
+        move: bool = False,
+    ) -> dict:
+        """
+        Copy or move documents between a company's collections, e.g. test → live.
+
+        Stored embeddings, documents and metadata are transferred in batches
+        and upserted under their vector IDs, so nothing is re-embedded and a
+        repeated promotion overwrites instead of duplicating.
+
+        :param company_id: The ID of the company.
+        :param source_data_type: Collection to read from ('live', 'test', 'hold', 'corrections').
+        :param target_data_type: Collection to write to.
+        :param metadata_filter: Optional Chroma where-filter selecting documents to transfer.
+        :param move: Delete transferred documents from the source collection.
+        :return: Number of documents transferred.
+        """
+        if source_data_type == target_data_type:
+            raise ValueError("Source and target collections must differ.")
+
+        try:
+            source = self.get_or_create_company_collection(company_id, source_data_type)
+            target = self.get_or_create_company_collection(company_id, target_data_type)
+            batch_size = min(
+                config.COLLECTION_TRANSFER_BATCH_SIZE, self.client.get_max_batch_size()
+            )
+
+            transferred = 0
+            while True:
+                # Moved batches leave the source, so a move always reads the head
+                batch = source.get(
+                    where=metadata_filter or None,
+                    limit=batch_size,
+                    offset=None if move else transferred or None,
+                    include=["documents", "metadatas", "embeddings"],
+                )
+                ids = batch["ids"]
+                if not ids:
+                    break
+
+                target.upsert(
+                    ids=ids,
+                    documents=batch["documents"],
+                    metadatas=batch["metadatas"],
+                    embeddings=batch["embeddings"],
                 )
+                self._mark_collection_changed(target.name)
+                self._index_documents(target, ids, batch["documents"])
+                if self.dedup_index is not None:
+                    self.dedup_index.add(target.name, ids, batch["documents"])
 
-            return results
+                if move:
+                    source.delete(ids=ids)
+                    self._mark_collection_changed(source.name)
+                    self._unindex_documents(source, ids)
+
+                transferred += len(ids)
+                if len(ids) < batch_size:
+                    break
+
+            logger.info(
+                f"✅ {'Moved' if move else 'Copied'} {transferred} documents from '{source.name}' to '{target.name}'"
+            )
+            return {
+                "source": source.name,
+                "target": target.name,
+                "moved" if move else "copied": transferred,
+            }
 
         except Exception as e:
+            logger.error(f"❌ Failed to transfer documents: {e}")
             raise
 
     def list_all_collections(self):
         """List all available collections"""
         try:
             # List all collections; this now returns collection names only in Chroma v0.6.0
-            collection_names = self.client.list_collections()
+            collection_names = self.shards.list_collections()
 
             # Return the list of collection names
             return collection_names  # This will now be a list of collection names
@@ -357,12 +1457,43 @@ class ChromaDBService:
             print(f"[ERROR] Failed to list collections: {e}")
             raise
 
+    def rebalance_shards(self, dry_run: bool = False) -> dict:
+        """
+        Move collections onto their home shard after CHROMA_SHARD_PATHS changes.
+
+        :param dry_run: Only report the planned moves.
+        :return: Shard paths and the planned or completed moves.
+        """
+        try:
+            result = self.shards.rebalance(dry_run=dry_run)
+            if not dry_run:
+                for move in result["moves"]:
+                    # Cached handles still point at the source shard's client
+                    self._invalidate_collection_caches(move["collection"])
+                    self._mark_collection_changed(move["collection"])
+            logger.info(
+                f"✅ Shard rebalance {'planned' if dry_run else 'completed'}: {len(result['moves'])} collection(s)"
+            )
+            return result
+        except Exception as e:
+            logger.error(f"❌ Shard rebalance failed: {e}")
+            raise
+
     def delete_company_collection(self, company_id: str):
         """Delete live,test and hold collections for a company"""
         for data_type in ["live", "test", "hold", "corrections"]:
             collection_name = f"company_{company_id}_{data_type}"
+            # Drop cached handles first so a failed delete never leaves them stale
+            self._invalidate_collection_caches(collection_name)
             try:
-                self.client.delete_collection(collection_name)
+                self.shards.client_for_collection(collection_name).delete_collection(
+                    collection_name
+                )
+                self._mark_collection_changed(collection_name)
+                if self.lexical_index is not None:
+                    self.lexical_index.drop(collection_name)
+                if self.dedup_index is not None:
+                    self.dedup_index.drop(collection_name)
                 logger.info(f"✅ Collection '{collection_name}' deleted.")
             except Exception as e:
                 logger.warning(
@@ -375,53 +1506,94 @@ class ChromaDBService:
             "message": f"All collections for company '{company_id}' deleted.",
         }
 
+    def _write_metadata(
+        self, collection, vector_ids: list[str], metadatas: list[dict], merge: bool
+    ):
+        """
+        Rewrite metadata for existing vectors without re-embedding.
+
+        :param collection: Target ChromaDB collection.
+        :param vector_ids: Chroma vector IDs to update.
+        :param metadatas: One metadata dict per vector ID.
+        :param merge: Merge into the stored metadata instead of replacing it.
+        """
+        write_batch_size = self.client.get_max_batch_size()
+        self._mark_collection_changed(collection.name)
+
+        for start in range(0, len(vector_ids), write_batch_size):
+            batch_ids = vector_ids[start : start + write_batch_size]
+            batch_metadatas = metadatas[start : start + write_batch_size]
+
+            if merge:
+                # Chroma merges metadata on update and leaves vectors untouched
+                collection.update(ids=batch_ids, metadatas=batch_metadatas)
+                continue
+
+            # Replacing drops stale keys, so re-add using the stored vectors
+            stored = collection.get(
+                ids=batch_ids, include=["documents", "embeddings", "metadatas"]
+            )
+            by_id = {
+                vector_id: (document, embedding)
+                for vector_id, document, embedding in zip(
+                    stored["ids"], stored["documents"], stored["embeddings"]
+                )
+            }
+
+            collection.delete(ids=batch_ids)
+            try:
+                collection.add(
+                    ids=batch_ids,
+                    documents=[by_id[vector_id][0] for vector_id in batch_ids],
+                    embeddings=[by_id[vector_id][1] for vector_id in batch_ids],
+                    metadatas=batch_metadatas,
+                )
+            except Exception:
+                # Put the original records back so a failed rewrite loses nothing
+                collection.add(
+                    ids=stored["ids"],
+                    documents=stored["documents"],
+                    embeddings=stored["embeddings"],
+                    metadatas=stored["metadatas"],
+                )
+                raise
+
     def update_document_metadata_langchain(
-        self, company_id: str, data_type: str, metadata_id: str, new_metadata: dict
+        self,
+        company_id: str,
+        data_type: str,
+        metadata_id: str,
+        new_metadata: dict,
+        merge: bool = False,
     ):
         """
         Updates metadata of a document in ChromaDB using metadata['id'].
+
+        The stored embedding is reused, so no embedding call is made.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param metadata_id: The document's metadata['id'].
+        :param new_metadata: Metadata to store for the document.
+        :param merge: Merge into the existing metadata instead of replacing it.
+        :return: Success message.
         """
         try:
             # Get collection
             collection = self.get_or_create_company_collection(company_id, data_type)
 
-            # Load vector store
-            vector_store = Chroma(
-                client=self.client,
-                collection_name=collection.name,
-                embedding_function=self.embeddings,
-                persist_directory=self.persist_directory,
-            )
-
-            # Get all metadata and find matching vector ID
-            results = vector_store._collection.get(
-                include=["metadatas", "ids", "documents"]
-            )
-            matched_index = next(
-                (
-                    i
-                    for i, meta in enumerate(results["metadatas"])
-                    if meta.get("id") == metadata_id
-                ),
-                None,
-            )
+            # Resolve the vector IDs via the metadata["id"] index
+            vector_ids = self._find_vector_ids(collection, metadata_id)
 
-            if matched_index is None:
+            if not vector_ids:
                 raise ValueError(
                     f"Document with metadata id '{metadata_id}' not found."
                 )
 
-            vector_id = results["ids"][matched_index]
-            document_content = results["documents"][matched_index]
-
-            # Delete old entry
-            vector_store.delete(ids=[vector_id])
-
-            # Add new with updated metadata
-            vector_store._collection.add(
-                documents=[document_content],
-                metadatas=[new_metadata],
-                ids=[vector_id],
+            # Keep the document addressable by its metadata id
+            metadata = {"id": metadata_id, **new_metadata}
+            self._write_metadata(
+                collection, vector_ids, [metadata] * len(vector_ids), merge
             )
 
             logger.info(
@@ -436,6 +1608,63 @@ class ChromaDBService:
             logger.error(f"❌ Failed to update metadata: {e}")
             raise
 
+    def update_documents_metadata_bulk(
+        self,
+        company_id: str,
+        data_type: str,
+        updates: list[dict],
+        merge: bool = False,
+    ):
+        """
+        Updates metadata of many documents in one pass without re-embedding.
+
+        :param company_id: The ID of the company.
+        :param data_type: The collection type ('live', 'test', 'hold', 'corrections').
+        :param updates: A list of dictionaries with 'metadata_id' and 'metadata'.
+        :param merge: Merge into the existing metadata instead of replacing it.
+        :return: Counts of updated documents and the metadata ids not found.
+        """
+        try:
+            collection = self.get_or_create_company_collection(company_id, data_type)
+
+            new_metadata = {
+                update["metadata_id"]: update["metadata"] for update in updates
+            }
+            metadata_ids = list(new_metadata)
+
+            # Resolve all vector IDs with batched $in lookups on the metadata index
+            vector_ids, metadatas, found = [], [], set()
+            lookup_batch_size = self.client.get_max_batch_size()
+            for start in range(0, len(metadata_ids), lookup_batch_size):
+                batch = metadata_ids[start : start + lookup_batch_size]
+                matches = collection.get(
+                    where={"id": {"$in": batch}}, include=["metadatas"]
+                )
+                for vector_id, metadata in zip(matches["ids"], matches["metadatas"]):
+                    metadata_id = metadata["id"]
+                    found.add(metadata_id)
+                    vector_ids.append(vector_id)
+                    metadatas.append({"id": metadata_id, **new_metadata[metadata_id]})
+
+            self._write_metadata(collection, vector_ids, metadatas, merge)
+
+            not_found = [
+                metadata_id for metadata_id in metadata_ids if metadata_id not in found
+            ]
+
+            logger.info(
+                f"✅ Metadata updated for {len(found)} documents in '{company_id}' ({data_type})"
+            )
+            return {
+                "status": "success",
+                "updated_count": len(found),
+                "not_found": not_found,
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Failed to bulk update metadata: {e}")
+            raise
+
     def _get_feedback_collection_name(self, company_id: str) -> str:
         """Generate standardized feedback collection name"""
         return f"company_{company_id}_feedback"
@@ -444,19 +1673,21 @@ class ChromaDBService:
         """Get or create specialized collection for user feedback"""
         collection_name = self._get_feedback_collection_name(company_id)
 
-        try:
-            if collection_name not in self.collections:
-                collection = self.client.get_or_create_collection(
-                    collection_name,
-                    metadata={
-                        "hnsw:space": "cosine",
-                        "purpose": "user_feedback_storage",
-                    },
-                )
-                self.collections[collection_name] = collection
-                logger.info(f"✅ Feedback collection '{collection_name}' initialized")
+        def create():
+            collection = self.shards.client_for_collection(
+                collection_name
+            ).get_or_create_collection(
+                collection_name,
+                metadata={
+                    **hnsw_metadata(),
+                    "purpose": "user_feedback_storage",
+                },
+            )
+            logger.info(f"✅ Feedback collection '{collection_name}' initialized")
+            return collection
 
-            return self.collections[collection_name]
+        try:
+            return self.collections.get_or_create(collection_name, create)
         except Exception as e:
             raise
 
@@ -502,18 +1733,12 @@ class ChromaDBService:
                 ),
             }
 
-            # Create document structure
-            document = {"page_content": chat_content, "metadata": metadata}
-
             # Get feedback-specific collection
             collection = self.get_or_create_feedback_collection(company_id)
 
-            # Store using LangChain integration
-            Chroma.from_documents(
-                documents=[Document(**document)],
-                embedding=self.embeddings,
-                collection_name=collection.name,
-                persist_directory=self.persist_directory,
+            # Store with the batched embedding client
+            self._add_to_collection(
+                collection, documents=[chat_content], metadatas=[metadata]
             )
 
             logger.info(
@@ -525,36 +1750,55 @@ class ChromaDBService:
             logger.error(f"Feedback storage failed: {str(e)}")
             raise
 
+    def get_embedding_cache_stats(self) -> dict:
+        """Return embedding cache hit/miss counters and size"""
+        if self.embedding_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.embedding_cache.stats()}
+
+    def get_vector_store_cache_stats(self) -> dict:
+        """Return size and hit/eviction counters of the handle and wrapper caches"""
+        return {
+            "collections": self.collections.stats(),
+            "vector_stores": self.vector_stores.stats(),
+            "retrievers": self.retrievers.stats(),
+        }
+
+    def get_shard_stats(self) -> dict:
+        """Return the shard directories and how many collections each holds"""
+        return self.shards.stats()
+
     @staticmethod
     def convert_to_chroma_filter(metadata_filter: dict) -> dict:
         if not metadata_filter:
             return {}
-        return {
-            "$and": [{key: {"$eq": value}} for key, value in metadata_filter.items()]
-        }
+        conditions = [{key: {"$eq": value}} for key, value in metadata_filter.items()]
+        # Chroma requires at least two expressions under $and
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
 
     def get_feedback_retriever(
         self,
         company_id: str,
         metadata_filter: dict = None,
         search_type: str = "mmr",  # similarity_score_threshold, mmr, similarity
+        k: int = 10,
     ):
         """Create retriever optimized for feedback analysis"""
         try:
             collection = self.get_or_create_feedback_collection(company_id)
 
-            vector_store = Chroma(
-                client=self.client,
-                collection_name=collection.name,
-                embedding_function=self.embeddings,
-            )
-
             filter_query = self.convert_to_chroma_filter(metadata_filter)
 
-            return vector_store.as_retriever(
+            if search_type == "mmr":
+                return self._get_mmr_retriever(collection, k, filter_query)
+
+            return self._get_retriever_cached(
+                collection,
                 search_type=search_type,
                 search_kwargs={
-                    "k": 10,
+                    "k": k,
                     "filter": filter_query,
                 },
             )
@@ -598,6 +1842,7 @@ class ChromaDBService:
         try:
             collection = self.get_or_create_feedback_collection(company_id)
             collection.delete(where={"user_id": str(user_id)})
+            self._mark_collection_changed(collection.name)
 
             logger.info(
                 f"🗑️ Deleted feedback for user {user_id} in company {company_id}"
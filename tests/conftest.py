@@ -0,0 +1,24 @@
+import os
+import sys
+import tempfile
+
+# Point every on-disk store at a throwaway directory before config is imported
+WORK_DIR = tempfile.mkdtemp(prefix="chatbot_tests_")
+os.environ.update(
+    {
+        "CHROMA_DB_PATH": os.path.join(WORK_DIR, "chroma"),
+        "CHROMA_SHARD_PATHS": "",
+        "LEXICAL_INDEX_PATH": os.path.join(WORK_DIR, "lexical", "lexical.db"),
+        "DEDUP_INDEX_PATH": os.path.join(WORK_DIR, "dedup", "dedup.db"),
+        "COLLECTION_VERSIONS_PATH": os.path.join(WORK_DIR, "versions", "versions.db"),
+        "SESSION_STORE_BACKEND": "sqlite",
+        "SESSION_STORE_PATH": os.path.join(WORK_DIR, "sessions", "sessions.db"),
+        "EMBEDDING_CACHE_ENABLED": "False",
+        "ANSWER_CACHE_ENABLED": "False",
+        "OLLAMA_ROUTER_HEALTH_INTERVAL": "0",
+    }
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# services.chat_service opens its LLM cache in the working directory
+os.chdir(WORK_DIR)
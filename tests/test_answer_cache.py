@@ -0,0 +1,62 @@
+import uuid
+import pytest
+from config.config import config
+from services.answer_cache import AnswerCacheService
+from services.vector_db import chroma_service
+from utils.collection_versions import CollectionVersions
+from utils.hashing_embedding_client import HashingEmbeddingClient
+
+
+@pytest.fixture
+def answer_cache():
+    chroma_service.use_embedding_client(HashingEmbeddingClient(dimension=64))
+    service = AnswerCacheService()
+    service.enabled = True
+    return service
+
+
+def lookup(answer_cache, company_id, user_id, query="How do refunds work?"):
+    return answer_cache.lookup(
+        company_id=company_id,
+        user_id=user_id,
+        data_type="live",
+        model="test-model",
+        query=query,
+    )
+
+
+def test_answers_are_not_shared_between_users(answer_cache):
+    company_id = f"cache{uuid.uuid4().hex[:8]}"
+    first = lookup(answer_cache, company_id, "alice")
+    answer_cache.store(first, "How do refunds work?", "Shaped by Alice's feedback")
+
+    assert lookup(answer_cache, company_id, "alice").answer is not None
+    assert lookup(answer_cache, company_id, "bob").answer is None
+
+
+def test_write_from_another_process_invalidates_answers(answer_cache):
+    company_id = f"cache{uuid.uuid4().hex[:8]}"
+    first = lookup(answer_cache, company_id, "alice")
+    answer_cache.store(first, "How do refunds work?", "cached answer")
+    assert lookup(answer_cache, company_id, "alice").answer == "cached answer"
+
+    # A separate connection stands in for another worker or an import script
+    other_process = CollectionVersions(config.COLLECTION_VERSIONS_PATH)
+    other_process.bump(f"company_{company_id}_live")
+    other_process.close()
+
+    assert lookup(answer_cache, company_id, "alice").answer is None
+
+
+def test_local_writes_bump_shared_versions():
+    company_id = f"cache{uuid.uuid4().hex[:8]}"
+    chroma_service.use_embedding_client(HashingEmbeddingClient(dimension=64))
+    name = f"company_{company_id}_live"
+    before = CollectionVersions(config.COLLECTION_VERSIONS_PATH).get(name)
+
+    chroma_service.add_documents_to_collection_langchain(
+        company_id,
+        "live",
+        [{"id": "doc-1", "page_content": "Refunds take five days", "metadata": {}}],
+    )
+    assert CollectionVersions(config.COLLECTION_VERSIONS_PATH).get(name) > before
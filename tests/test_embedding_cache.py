@@ -0,0 +1,32 @@
+import time
+from utils.embedding_cache import EmbeddingCache
+
+
+def test_hits_do_not_write_until_the_touch_interval(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.db"), touch_interval=3600)
+    cache.put_many("model", ["a", "b"], [[1.0], [2.0]])
+
+    before = cache._conn.total_changes
+    for _ in range(10):
+        assert cache.get_many("model", ["a", "b", "c"]) == [[1.0], [2.0], None]
+    assert cache._conn.total_changes == before
+
+    cache.touch_interval = 0
+    cache.get_many("model", ["a"])
+    assert cache._conn.total_changes == before + 2
+    assert cache.stats()["hits"] == 21
+
+
+def test_eviction_sees_pending_hits(tmp_path):
+    cache = EmbeddingCache(
+        str(tmp_path / "cache.db"), max_entries=2, touch_interval=3600
+    )
+    cache.put_many("model", ["old"], [[1.0]])
+    time.sleep(0.01)
+    cache.put_many("model", ["newer"], [[2.0]])
+    time.sleep(0.01)
+
+    # "old" is used again, so "newer" is now the least recently used
+    cache.get_many("model", ["old"])
+    cache.put_many("model", ["newest"], [[3.0]])
+    assert cache.get_many("model", ["old", "newer", "newest"]) == [[1.0], None, [3.0]]
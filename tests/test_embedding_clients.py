@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from services.async_vector_db import AsyncChromaDBService
+from services.vector_db import chroma_service
+from utils.async_ollama_embedding_client import AsyncOllamaEmbeddingClient
+from utils.embedding_cache import EmbeddingCache
+from utils.hashing_embedding_client import HashingEmbeddingClient
+from utils.ollama_embedding_client import OllamaEmbeddingClient
+
+
+class StubEmbedServer:
+    """/api/embed stub that fails the first ``failures`` requests with a 503"""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.inputs = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path != "/api/embed":
+                    status, payload = 404, {"error": "not found"}
+                elif stub.failures:
+                    stub.failures -= 1
+                    status, payload = 503, {"error": "busy"}
+                else:
+                    stub.inputs.append(body["input"])
+                    status = 200
+                    payload = {
+                        "embeddings": [
+                            [float(len(text)), 1.0] for text in body["input"]
+                        ]
+                    }
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def server():
+    stub = StubEmbedServer(failures=1)
+    yield stub
+    stub.stop()
+
+
+def client_options(server, tmp_path) -> dict:
+    return {
+        "base_url": server.url,
+        "batch_size": 2,
+        "max_retries": 2,
+        "retry_backoff": 0.01,
+        "cache": EmbeddingCache(str(tmp_path / "cache.db")),
+    }
+
+
+def test_sync_client_retries_batches_and_caches(server, tmp_path):
+    client = OllamaEmbeddingClient("stub", **client_options(server, tmp_path))
+    texts = ["a", "bb", "ccc", "a"]
+
+    assert client.embed(texts) == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+    assert sorted(map(tuple, server.inputs)) == [("a", "bb"), ("ccc",)]
+    assert client.embed(texts[:3]) == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert len(server.inputs) == 2
+    client.close()
+
+
+def test_async_client_matches_sync_client(server, tmp_path):
+    client = AsyncOllamaEmbeddingClient("stub", **client_options(server, tmp_path))
+
+    async def run():
+        try:
+            return await client.embed(["a", "bb", "ccc", "a"])
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run()) == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+    assert sorted(map(tuple, server.inputs)) == [("a", "bb"), ("ccc",)]
+
+
+def test_non_retryable_status_raises():
+    server = StubEmbedServer()
+    client = OllamaEmbeddingClient("stub", base_url=server.url + "/missing")
+    try:
+        with pytest.raises(ValueError):
+            client.embed(["a"])
+    finally:
+        server.stop()
+
+
+def test_async_facade_uses_the_service_ollama_settings(server, tmp_path):
+    sync_client = OllamaEmbeddingClient("stub", **client_options(server, tmp_path))
+    chroma_service.use_embedding_client(sync_client)
+    try:
+        async_client = AsyncChromaDBService(chroma_service).embedding_client
+        assert isinstance(async_client, AsyncOllamaEmbeddingClient)
+        assert async_client.base_url == server.url
+        assert async_client.batch_size == 2
+        assert async_client.cache is sync_client.cache
+    finally:
+        chroma_service.use_embedding_client(HashingEmbeddingClient(dimension=64))
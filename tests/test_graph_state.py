@@ -0,0 +1,126 @@
+import uuid
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from services import chat_service
+
+TURNS = 50
+
+
+class StubLLM:
+    """Answers every prompt with a numbered reply and records the prompts"""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages, **kwargs):
+        self.prompts.append(messages[-1].content)
+        return f"reply {len(self.prompts)}"
+
+    def stream(self, messages, **kwargs):
+        first, rest = self.invoke(messages, **kwargs).split(" ", 1)
+        yield from (first, " " + rest)
+
+
+@pytest.fixture
+def llm(monkeypatch):
+    stub = StubLLM()
+    monkeypatch.setattr(chat_service.ollama_router, "invoke", stub.invoke)
+    monkeypatch.setattr(chat_service.ollama_router, "stream", stub.stream)
+    monkeypatch.setattr(
+        chat_service, "_execute_parallel_queries", lambda **kwargs: "refund policy"
+    )
+    return stub
+
+
+def opening_state(message: str) -> dict:
+    return {
+        "conversation_history": [HumanMessage(content=message)],
+        "generated_response": [],
+        "human_feedback": [],
+        "feedback_count": 0,
+        "company_id": "graphstate",
+        "user_id": "alice",
+        "user_query": message,
+        "data_type": "live",
+        "company_name": "Acme",
+        "cached_response": "",
+    }
+
+
+def run_turn(thread_id, state, update, stream_tokens=False):
+    events = list(chat_service._run_graph(thread_id, state, update, stream_tokens))
+    assert events[-1][0] == "interrupt"
+    return events
+
+
+@pytest.mark.parametrize("stream_tokens", [False, True])
+def test_history_grows_linearly_over_many_turns(llm, stream_tokens):
+    thread_id = str(uuid.uuid4())
+    state = {}
+    run_turn(thread_id, state, opening_state("message 0"), stream_tokens)
+
+    for turn in range(1, TURNS):
+        message = f"message {turn}"
+        run_turn(
+            thread_id,
+            state,
+            {
+                "user_query": message,
+                "conversation_history": [HumanMessage(content=message)],
+            },
+            stream_tokens,
+        )
+
+        # One question and one reply per turn, never the history again
+        history = state["conversation_history"]
+        assert len(history) == 2 * (turn + 1)
+        assert len(state["generated_response"]) == turn + 1
+        assert len({msg.id for msg in history}) == len(history)
+
+    expected = []
+    for turn in range(TURNS):
+        expected += [f"message {turn}", f"reply {turn + 1}"]
+    assert [msg.content for msg in history] == expected
+    assert [type(msg) for msg in history[:2]] == [HumanMessage, AIMessage]
+    assert state["feedback_count"] == TURNS
+
+
+def test_session_state_size_grows_linearly(llm):
+    thread_id = str(uuid.uuid4())
+    state = {}
+    run_turn(thread_id, state, opening_state("message 0"))
+
+    sizes = []
+    for turn in range(1, TURNS):
+        message = f"message {turn}"
+        run_turn(
+            thread_id,
+            state,
+            {
+                "user_query": message,
+                "conversation_history": [HumanMessage(content=message)],
+            },
+        )
+        sizes.append(len(chat_service.session_store._dumps(state)[1]))
+
+    # Every turn adds about the same number of bytes
+    steps = [after - before for before, after in zip(sizes, sizes[1:])]
+    assert max(steps) < 2 * min(steps)
+
+
+def test_feedback_is_appended_once(llm):
+    thread_id = str(uuid.uuid4())
+    state = {}
+    run_turn(thread_id, state, opening_state("message 0"))
+
+    for round_number in range(1, 3):
+        feedback = f"feedback {round_number}"
+        run_turn(
+            thread_id,
+            state,
+            {"user_query": feedback, "human_feedback": [feedback]},
+        )
+        assert [msg.content for msg in state["human_feedback"]] == [
+            f"feedback {n}" for n in range(1, round_number + 1)
+        ]
+    assert "feedback 2" in llm.prompts[-1]
@@ -0,0 +1,199 @@
+import asyncio
+import time
+import uuid
+import httpx
+import pytest
+from services.async_vector_db import AsyncChromaDBService
+from services.vector_db import chroma_service
+from utils.hashing_embedding_client import HashingEmbeddingClient
+
+
+class FlakyEmbeddingClient(HashingEmbeddingClient):
+    """Hashing embedder whose calls numbered in ``fail_on`` cannot connect"""
+
+    def __init__(self, fail_on: tuple = (1,)):
+        super().__init__(dimension=64)
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += 1
+        if self.calls in self.fail_on:
+            raise httpx.ConnectError("embedding server unreachable")
+        return super().embed(texts)
+
+
+@pytest.fixture
+def company_id():
+    chroma_service.use_embedding_client(HashingEmbeddingClient(dimension=64))
+    return f"dedup{uuid.uuid4().hex[:8]}"
+
+
+def make_documents(prefix: str, count: int = 3) -> list[dict]:
+    return [
+        {
+            "id": f"{prefix}-{i}",
+            "page_content": f"{prefix} document number {i} about refunds and shipping",
+            "metadata": {"source": "test"},
+        }
+        for i in range(count)
+    ]
+
+
+def live_count(company_id: str) -> int:
+    return chroma_service.get_or_create_company_collection(company_id, "live").count()
+
+
+@pytest.mark.parametrize("policy", ["skip", "merge", "replace", "off"])
+def test_async_retry_after_embed_failure_adds_documents(company_id, policy):
+    chroma_service.use_embedding_client(FlakyEmbeddingClient())
+    service = AsyncChromaDBService(chroma_service)
+    documents = make_documents(company_id)
+
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(
+            service.add_documents_to_collection_langchain(
+                company_id, "live", documents, dedup_policy=policy
+            )
+        )
+    assert live_count(company_id) == 0
+
+    result = asyncio.run(
+        service.add_documents_to_collection_langchain(
+            company_id, "live", documents, dedup_policy=policy
+        )
+    )
+    assert result["added"] == 3
+    assert result["exact_duplicates"] == 0
+    assert live_count(company_id) == 3
+
+
+def test_replace_retry_keeps_replaced_document_matchable(company_id):
+    documents = make_documents(company_id, 1)
+    chroma_service.add_documents_to_collection_langchain(
+        company_id, "live", documents, dedup_policy="replace"
+    )
+
+    chroma_service.use_embedding_client(FlakyEmbeddingClient())
+    service = AsyncChromaDBService(chroma_service)
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(
+            service.add_documents_to_collection_langchain(
+                company_id, "live", documents, dedup_policy="replace"
+            )
+        )
+
+    # The stored copy is still fingerprinted, so a skip finds it
+    result = chroma_service.add_documents_to_collection_langchain(
+        company_id, "live", documents, dedup_policy="skip"
+    )
+    assert result["exact_duplicates"] == 1
+    assert live_count(company_id) == 1
+
+
+def test_pipeline_retry_after_embed_failure_adds_documents(company_id):
+    chroma_service.use_embedding_client(FlakyEmbeddingClient())
+    documents = make_documents(company_id, 6)
+
+    pipeline = chroma_service.create_ingest_pipeline(
+        company_id, "live", dedup_policy="skip"
+    )
+    for offset in range(0, 6, 2):
+        pipeline.submit(documents[offset : offset + 2])
+    with pytest.raises(httpx.ConnectError):
+        pipeline.close()
+
+    pipeline = chroma_service.create_ingest_pipeline(
+        company_id, "live", dedup_policy="skip"
+    )
+    pipeline.submit(documents)
+    assert pipeline.close()["written"] == 6
+    assert live_count(company_id) == 6
+
+
+def test_pipeline_releases_embedded_chunks_dropped_after_failure(
+    company_id, monkeypatch
+):
+    # Chunk 2 is embedded and queued, then chunk 3 fails to embed while
+    # chunk 1 is still being written, so chunk 2 is never written
+    chroma_service.use_embedding_client(FlakyEmbeddingClient(fail_on=(3,)))
+    documents = make_documents(company_id, 6)
+    add_to_collection = chroma_service._add_to_collection
+    pipeline = None
+
+    def slow_write(*args, **kwargs):
+        deadline = time.time() + 10
+        while pipeline.error is None and time.time() < deadline:
+            time.sleep(0.01)
+        return add_to_collection(*args, **kwargs)
+
+    monkeypatch.setattr(chroma_service, "_add_to_collection", slow_write)
+    pipeline = chroma_service.create_ingest_pipeline(
+        company_id, "live", dedup_policy="skip"
+    )
+    for offset in range(0, 6, 2):
+        pipeline.submit(documents[offset : offset + 2])
+    with pytest.raises(httpx.ConnectError):
+        pipeline.close()
+    monkeypatch.undo()
+    assert live_count(company_id) == 2
+
+    pipeline = chroma_service.create_ingest_pipeline(
+        company_id, "live", dedup_policy="skip"
+    )
+    pipeline.submit(documents)
+    progress = pipeline.close()
+    assert progress["written"] == 4
+    assert live_count(company_id) == 6
+
+
+def test_duplicates_are_kept_by_default(company_id):
+    (document,) = make_documents(company_id, 1)
+    chroma_service.add_documents_to_collection_langchain(company_id, "live", [document])
+
+    result = chroma_service.add_documents_to_collection_langchain(
+        company_id, "live", [{**document, "id": "new"}]
+    )
+    assert result["policy"] == "off"
+    assert result["added"] == 1
+    assert result["skipped"] == {}
+    chroma_service.delete_document(company_id, "new", "live")
+    assert live_count(company_id) == 1
+
+
+def test_skipped_documents_map_to_the_stored_ids(company_id):
+    (document,) = make_documents(company_id, 1)
+    chroma_service.add_documents_to_collection_langchain(company_id, "live", [document])
+
+    result = chroma_service.add_documents_to_collection_langchain(
+        company_id,
+        "live",
+        [
+            {**document, "id": "again"},
+            {
+                "id": "fresh",
+                "page_content": "A document about warranty claims",
+                "metadata": {},
+            },
+            {
+                "id": "fresh-copy",
+                "page_content": "A document about warranty claims",
+                "metadata": {},
+            },
+        ],
+        dedup_policy="skip",
+    )
+    assert result["added"] == 1
+    assert result["skipped"] == {"again": document["id"], "fresh-copy": "fresh"}
+    assert "skipped" in result["message"]
+
+
+def test_async_facade_follows_the_service_embedder(company_id):
+    service = AsyncChromaDBService(chroma_service)
+    query = "refunds and shipping"
+    expected = chroma_service.embedding_client.embed_one(query)
+    assert asyncio.run(service.embedding_client.embed_one(query)) == expected
+
+    replacement = HashingEmbeddingClient(dimension=32)
+    chroma_service.use_embedding_client(replacement)
+    assert service.embedding_client.client is replacement
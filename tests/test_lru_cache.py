@@ -0,0 +1,59 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from utils.lru_cache import LRUCache
+
+
+def test_concurrent_misses_build_once():
+    cache = LRUCache(8)
+    builds = []
+
+    def factory():
+        builds.append(1)
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(8) as pool:
+        values = list(pool.map(lambda _: cache.get_or_create("key", factory), range(8)))
+
+    assert len(builds) == 1
+    assert all(value is values[0] for value in values)
+
+
+def test_slow_build_does_not_block_other_keys():
+    cache = LRUCache(8)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    worker = threading.Thread(target=cache.get_or_create, args=("slow", slow))
+    worker.start()
+    started.wait(5)
+
+    start = time.perf_counter()
+    assert cache.get_or_create("fast", lambda: "fast") == "fast"
+    assert cache.get("fast") == "fast"
+    assert len(cache) == 1
+    assert time.perf_counter() - start < 1
+
+    release.set()
+    worker.join(5)
+    assert cache.get("slow") == "slow"
+
+
+def test_failed_build_is_retried():
+    cache = LRUCache(8)
+
+    def broken():
+        raise RuntimeError("build failed")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_create("key", broken)
+    assert "key" not in cache
+    assert cache.get_or_create("key", lambda: "built") == "built"
+    assert cache._building == {}
@@ -0,0 +1,70 @@
+import uuid
+import pytest
+from services.vector_db import chroma_service
+from utils.hashing_embedding_client import HashingEmbeddingClient
+
+
+@pytest.fixture
+def company_id():
+    chroma_service.use_embedding_client(HashingEmbeddingClient(dimension=64))
+    return f"meta{uuid.uuid4().hex[:8]}"
+
+
+def test_failed_replace_keeps_original_record(company_id, monkeypatch):
+    chroma_service.add_documents_to_collection_langchain(
+        company_id,
+        "live",
+        [
+            {
+                "id": "doc-1",
+                "page_content": "Refunds are issued within 14 days",
+                "metadata": {"source": "faq", "stale": "yes"},
+            }
+        ],
+    )
+    collection = chroma_service.get_or_create_company_collection(company_id, "live")
+    before = collection.get(include=["documents", "embeddings", "metadatas"])
+
+    add = collection.add
+    calls = []
+
+    def failing_add(**kwargs):
+        calls.append(kwargs)
+        if len(calls) == 1:
+            raise RuntimeError("write failed")
+        return add(**kwargs)
+
+    monkeypatch.setattr(collection, "add", failing_add)
+    with pytest.raises(RuntimeError):
+        chroma_service.update_document_metadata_langchain(
+            company_id, "live", "doc-1", {"source": "manual"}
+        )
+    monkeypatch.undo()
+
+    after = collection.get(include=["documents", "embeddings", "metadatas"])
+    assert after["ids"] == before["ids"]
+    assert after["documents"] == before["documents"]
+    assert after["metadatas"] == before["metadatas"]
+    assert (after["embeddings"] == before["embeddings"]).all()
+
+
+def test_replace_drops_stale_keys(company_id):
+    chroma_service.add_documents_to_collection_langchain(
+        company_id,
+        "live",
+        [
+            {
+                "id": "doc-1",
+                "page_content": "Shipping takes three business days",
+                "metadata": {"source": "faq", "stale": "yes"},
+            }
+        ],
+    )
+    chroma_service.update_document_metadata_langchain(
+        company_id, "live", "doc-1", {"source": "manual"}
+    )
+
+    collection = chroma_service.get_or_create_company_collection(company_id, "live")
+    (metadata,) = collection.get(include=["metadatas"])["metadatas"]
+    assert metadata["source"] == "manual"
+    assert "stale" not in metadata
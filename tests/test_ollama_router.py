@@ -0,0 +1,215 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from langchain_core.globals import get_llm_cache, set_llm_cache
+from langchain_core.prompts import PromptTemplate
+from utils.multi_ollama_router import MultiOllamaRouter
+
+MODEL = "gemma3"
+
+
+class StubOllama:
+    """
+    Minimal Ollama server answering /api/generate and /api/ps.
+
+    ``resident`` is what /api/ps reports, ``healthy`` switches /api/ps to a
+    503, and generation blocks while ``gate`` is cleared.
+    """
+
+    def __init__(self, resident=(MODEL,)):
+        self.resident = list(resident)
+        self.healthy = True
+        self.generated = 0
+        self.gate = threading.Event()
+        self.gate.set()
+        self.generating = threading.Event()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_GET(self):
+                if self.path != "/api/ps":
+                    return self.send_json(404, {})
+                if not stub.healthy:
+                    return self.send_json(503, {"error": "unavailable"})
+                self.send_json(
+                    200,
+                    {"models": [{"name": f"{name}:latest"} for name in stub.resident]},
+                )
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path != "/api/generate":
+                    return self.send_json(404, {})
+                stub.generated += 1
+                stub.generating.set()
+                stub.gate.wait(5)
+                self.send_json(
+                    200,
+                    {
+                        "model": body["model"],
+                        "response": f"answer from {stub.url}",
+                        "done": True,
+                        "done_reason": "stop",
+                    },
+                )
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stubs():
+    # chat_service installs a global LLM cache that would answer repeats
+    llm_cache = get_llm_cache()
+    set_llm_cache(None)
+    servers = [StubOllama(), StubOllama()]
+    yield servers
+    set_llm_cache(llm_cache)
+    for server in servers:
+        server.gate.set()
+        server.stop()
+
+
+def make_router(stubs, **kwargs) -> MultiOllamaRouter:
+    router = MultiOllamaRouter(
+        [stub.url for stub in stubs], health_interval=0, health_timeout=1, **kwargs
+    )
+    for backend in router.backends:
+        router.probe(backend)
+    return router
+
+
+def test_busy_backend_is_skipped_for_the_least_loaded_one(stubs):
+    router = make_router(stubs)
+    assert router.invoke("warm up", model=MODEL)
+    assert router.invoke("warm up", model=MODEL)
+    assert [stub.generated for stub in stubs] == [1, 1]
+    # Equal latency history, so only the in-flight count tells them apart
+    for backend in router.backends:
+        backend.ewma_ms = 100.0
+
+    # Hold one request open on whichever backend it lands on
+    for stub in stubs:
+        stub.gate.clear()
+        stub.generating.clear()
+    blocked = threading.Thread(
+        target=router.invoke, args=("slow",), kwargs={"model": MODEL}
+    )
+    blocked.start()
+    busy = None
+    while busy is None:
+        busy = next((stub for stub in stubs if stub.generating.is_set()), None)
+        time.sleep(0.01)
+    idle = next(stub for stub in stubs if stub is not busy)
+    idle.gate.set()
+
+    for _ in range(3):
+        assert router.invoke("quick", model=MODEL) == f"answer from {idle.url}"
+    assert busy.generated == 2
+    assert idle.generated == 4
+
+    busy.gate.set()
+    blocked.join(5)
+    assert all(backend.in_flight == 0 for backend in router.backends)
+
+
+def test_model_sticks_to_the_backend_holding_it(stubs):
+    stubs[0].resident = []
+    router = make_router(stubs)
+
+    for _ in range(3):
+        assert router.invoke("hello", model=MODEL) == f"answer from {stubs[1].url}"
+    assert stubs[0].generated == 0
+
+
+def test_failed_probe_ejects_backend_until_it_recovers(stubs):
+    router = make_router(stubs)
+    sick, well = router.backends
+
+    stubs[0].healthy = False
+    assert router.probe(sick) is False
+    assert not sick.healthy
+    assert sick.ejections == 1
+
+    for _ in range(3):
+        assert router.invoke("hello", model=MODEL) == f"answer from {stubs[1].url}"
+    assert stubs[0].generated == 0
+
+    stubs[0].healthy = True
+    assert router.probe(sick) is True
+    assert sick.healthy
+    assert sick.ejections == 1
+
+
+def test_unreachable_backend_is_retried_elsewhere_and_ejected(stubs):
+    router = make_router(stubs)
+    stubs[0].stop()
+
+    answers = {router.invoke("hello", model=MODEL) for _ in range(3)}
+    assert answers == {f"answer from {stubs[1].url}"}
+
+    down = router.backends[0]
+    assert not down.healthy
+    assert down.ejections == 1
+    assert down.failures >= 1
+
+
+def test_stats_report_each_backend(stubs):
+    stubs[1].resident = ["llama3.2"]
+    router = make_router(stubs, warm_pools={MODEL: [stubs[0].url]})
+    router.invoke("hello", model=MODEL)
+
+    stats = router.stats()
+    assert stats["warm_pools"] == {f"{MODEL}:latest": [stubs[0].url]}
+    first, second = stats["backends"]
+    assert first["url"] == stubs[0].url
+    assert first["healthy"] is True
+    assert first["requests"] == 1
+    assert first["in_flight"] == 0
+    assert first["failures"] == 0
+    assert first["ewma_ms"] > 0
+    assert first["resident_models"] == [f"{MODEL}:latest"]
+    assert first["last_probe"] is not None
+    assert second["requests"] == 0
+    assert second["ewma_ms"] is None
+    assert second["resident_models"] == ["llama3.2:latest"]
+    json.dumps(stats)
+
+
+def test_tool_llms_are_routed_and_counted(stubs):
+    router = make_router(stubs)
+    chain = PromptTemplate.from_template("Answer: {question}") | router.llm_for(
+        MODEL, temperature=0.1
+    )
+
+    answers = {chain.invoke({"question": f"q{i}"}) for i in range(4)}
+    assert answers == {f"answer from {stub.url}" for stub in stubs}
+    assert sum(backend.requests for backend in router.backends) == 4
+    assert all(backend.ewma_ms is not None for backend in router.backends)
+    assert all(backend.in_flight == 0 for backend in router.backends)
+    assert "".join(router.llm_for(MODEL).stream("hello")).startswith("answer from")
+
+
+def test_untracked_picks_are_not_counted(stubs):
+    router = make_router(stubs)
+    assert router.base_url_for(MODEL) in {stub.url for stub in stubs}
+    assert all(backend.requests == 0 for backend in router.backends)
+    assert all(backend.cold_starts == 0 for backend in router.backends)
@@ -0,0 +1,81 @@
+import uuid
+import pytest
+from services.vector_db import MMRRetriever, chroma_service
+from utils.hashing_embedding_client import HashingEmbeddingClient
+
+
+@pytest.fixture
+def company_id():
+    chroma_service.use_embedding_client(HashingEmbeddingClient(dimension=64))
+    company_id = f"mmr{uuid.uuid4().hex[:8]}"
+    chroma_service.add_documents_to_collection_langchain(
+        company_id,
+        "live",
+        [
+            {
+                "id": f"doc-{i}",
+                "page_content": f"Refund policy part {i}: refunds take {i} days",
+                "metadata": {"topic": "refunds" if i % 2 else "shipping"},
+            }
+            for i in range(8)
+        ],
+    )
+    return company_id
+
+
+def test_mmr_retriever_uses_the_numpy_reranker(company_id):
+    retriever = chroma_service.get_retriever(company_id, "live", k=3)
+    assert isinstance(retriever, MMRRetriever)
+    assert chroma_service.get_retriever(company_id, "live", k=3) is retriever
+
+    query = "how long do refunds take"
+    expected = chroma_service.query_by_vector(
+        company_id,
+        "live",
+        chroma_service.embeddings.embed_query(query),
+        k=3,
+        fetch_k=20,
+        search_type="mmr",
+    )
+    assert [doc.id for doc in retriever.invoke(query)] == [doc.id for doc in expected]
+
+
+def test_mmr_retriever_applies_the_filter(company_id):
+    retriever = chroma_service.get_retriever(
+        company_id, "live", k=3, metadata_filter={"topic": "refunds"}
+    )
+    documents = retriever.invoke("refunds")
+    assert len(documents) == 3
+    assert {doc.metadata["topic"] for doc in documents} == {"refunds"}
+
+
+def test_feedback_retriever_uses_mmr(company_id):
+    retriever = chroma_service.get_feedback_retriever(company_id, k=2)
+    assert isinstance(retriever, MMRRetriever)
+    assert retriever.invoke("feedback") == []
+
+
+def test_lexical_index_is_built_by_the_first_hybrid_search(company_id):
+    collection = chroma_service.get_or_create_company_collection(company_id, "live")
+    assert not chroma_service.lexical_index.is_indexed(collection.name)
+
+    def hybrid(query):
+        return chroma_service.query_by_vector(
+            company_id,
+            "live",
+            chroma_service.embeddings.embed_query(query),
+            k=3,
+            search_type="hybrid",
+            query=query,
+        )
+
+    assert hybrid("refunds")
+    assert chroma_service.lexical_index.is_indexed(collection.name)
+
+    # Later writes are mirrored into the built index
+    chroma_service.add_documents_to_collection_langchain(
+        company_id,
+        "live",
+        [{"id": "late", "page_content": "Gift cards never expire", "metadata": {}}],
+    )
+    assert "late" in [doc.metadata["id"] for doc in hybrid("gift cards expire")]
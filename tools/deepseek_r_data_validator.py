@@ -5,9 +5,9 @@ from datetime import datetime
 from typing import Dict, Any
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain_ollama import OllamaLLM
 from utils.generation_time_formatter import format_generation_time
 from config.config import config
+from services.ollama_router import ollama_router
 
 
 class DeepSeekContentValidator:
@@ -35,8 +35,8 @@ class DeepSeekContentValidator:
 
     def _initialize_model(self):
         """Configure the Ollama LLM instance"""
-        return OllamaLLM(
-            model=config.DEEPSEEK_LLM_OLLAMA,
+        return ollama_router.llm_for(
+            config.DEEPSEEK_LLM_OLLAMA,
             temperature=0.1,
             top_k=50,
             top_p=0.85,
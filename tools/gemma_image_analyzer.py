@@ -1,9 +1,9 @@
 import json
 import json
 from typing import Optional
-from concurrent.futures import ThreadPoolExecutor
-from langchain_ollama import OllamaLLM
+from services.ollama_router import ollama_router
 from services.vector_db import chroma_service
+from utils.context_builder import ContextSection, build_context
 from config.config import config
 
 
@@ -19,8 +19,8 @@ class EnhancedGemmaVisionAnalyzer:
         nsfw_threshold=0.85,
     ):
         self.is_use_vectordb = is_use_vectordb
-        self.llm = OllamaLLM(
-            model=config.GEMMA_LLM_OLLAMA,
+        self.llm = ollama_router.llm_for(
+            config.GEMMA_LLM_OLLAMA,
             temperature=temperature,
             top_k=top_k,
             top_p=top_p,
@@ -52,75 +52,76 @@ class EnhancedGemmaVisionAnalyzer:
             if company_id and data_type:
                 try:
                     try:
-                        with ThreadPoolExecutor() as executor:
-                            main_future = executor.submit(
-                                chroma_service.get_retriever,
-                                company_id=company_id,
-                                data_type=data_type,
-                                k=k,
-                                metadata_filter=metadata_filter,
-                                search_type=search_type,
-                            )
-                            correction_future = executor.submit(
-                                chroma_service.get_retriever,
-                                company_id=company_id,
-                                data_type="corrections",
-                                k=3,
-                                metadata_filter=metadata_filter,
-                                search_type="mmr",
-                            )
-                            company_feedback_future = executor.submit(
-                                chroma_service.get_company_feedbacks,
-                                company_id=company_id,
-                                query=query,
-                                k=3,
-                                filters=metadata_filter,
-                            )
-
-                            main_retriever = main_future.result()
-                            correction_retriever = correction_future.result()
-                            company_feedback_retriever = (
-                                company_feedback_future.result()
-                            )
+                        # Embed the query once and fan it out to every collection
+                        results = chroma_service.search_collections(
+                            query,
+                            {
+                                "main": {
+                                    "company_id": company_id,
+                                    "data_type": data_type,
+                                    "k": k,
+                                    "fetch_k": 20,
+                                    "search_type": search_type,
+                                    "metadata_filter": metadata_filter,
+                                },
+                                "corrections": {
+                                    "company_id": company_id,
+                                    "data_type": "corrections",
+                                    "k": 3,
+                                    "fetch_k": 20,
+                                    "search_type": "mmr",
+                                    "metadata_filter": metadata_filter,
+                                },
+                                "feedback": {
+                                    "company_id": company_id,
+                                    "data_type": "feedback",
+                                    "k": 3,
+                                    "fetch_k": 20,
+                                    "search_type": "mmr",
+                                    "metadata_filter": chroma_service.convert_to_chroma_filter(
+                                        {
+                                            "company_id": company_id,
+                                            **(metadata_filter or {}),
+                                        }
+                                    ),
+                                },
+                            },
+                        )
 
                     except Exception as e:
                         raise
 
-                    # Retrieve documents and process response
-                    main_docs = main_retriever.invoke(query)
-                    correction_docs = correction_retriever.invoke(query)
-                    feedback_docs = company_feedback_retriever
+                    main_docs = results["main"]
+                    correction_docs = results["corrections"]
+                    feedback_docs = results["feedback"]
 
-                    feedback_context = "\n".join(
+                    # Pack the ranked documents into the model's token budget
+                    combined_context = build_context(
                         [
-                            f"Feedback {idx+1}: {doc['page_content']} (Score: {doc.get('relevance_score', 0):.2f})"
-                            for idx, doc in enumerate(feedback_docs)
-                        ]
-                    )
-
-                    # Build combined context with error fallbacks
-                    context_sections = [
-                        "Main Context: "
-                        + (
-                            "\n".join([d.page_content for d in main_docs])
-                            if main_docs
-                            else "No main documents found"
-                        ),
-                        "Corrections: "
-                        + (
-                            "\n".join([d.page_content for d in correction_docs])
-                            if correction_docs
-                            else "No correction data available"
-                        ),
-                        "User Feedback Insights:\n"
-                        + (
-                            feedback_context
-                            if feedback_docs
-                            else "No relevant feedback found"
-                        ),
-                    ]
-
-                    combined_context = "\n\n".join(context_sections)
+                            ContextSection(
+                                "main",
+                                "Main Context: ",
+                                [d.page_content for d in main_docs],
+                                "No main documents found",
+                            ),
+                            ContextSection(
+                                "corrections",
+                                "Corrections: ",
+                                [d.page_content for d in correction_docs],
+                                "No correction data available",
+                            ),
+                            ContextSection(
+                                "feedback",
+                                "User Feedback Insights:\n",
+                                [
+                                    f"Feedback {idx+1}: {doc.page_content} (Score: {doc.metadata.get('score', 0):.2f})"
+                                    for idx, doc in enumerate(feedback_docs)
+                                ],
+                                "No relevant feedback found",
+                            ),
+                        ],
+                        model_name=self.llm.model,
+                    ).text
                 except Exception as e:
                     raise
 
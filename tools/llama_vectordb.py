@@ -1,10 +1,9 @@
 import time
-from concurrent.futures import ThreadPoolExecutor
 from langchain.prompts import PromptTemplate
-from langchain_ollama import OllamaLLM
-from langchain.chains import RetrievalQA
+from services.ollama_router import ollama_router
 from services.vector_db import chroma_service
 
+from utils.context_builder import ContextSection, build_context
 from utils.generation_time_formatter import format_generation_time
 from config.config import config
 
@@ -19,7 +18,6 @@ class LlamaVectorDB:
         self.top_k = 50
         self.top_p = 0.85
         self.num_gpu = 1
-        self.main_retriever = None
 
     def _initialize_qa_chain(self):
         """Creates an AI assistant using Llama and LangChain with current parameters."""
@@ -44,21 +42,17 @@ class LlamaVectorDB:
             template=template, input_variables=["context", "input"]
         )
 
-        llm = OllamaLLM(
-            model=config.LLAMA_LLM_OLLAMA,
+        llm = ollama_router.llm_for(
+            config.LLAMA_LLM_OLLAMA,
             temperature=self.temperature,
             top_k=self.top_k,
             top_p=self.top_p,
             num_gpu=self.num_gpu,
         )
 
-        return RetrievalQA.from_chain_type(
-            llm=llm,
-            chain_type="stuff",
-            retriever=self.main_retriever,
-            chain_type_kwargs={"prompt": qa_prompt},
-            return_source_documents=True,
-        )
+        # The context is retrieved and token-budgeted by query(), so the chain
+        # only fills the prompt and generates
+        return qa_prompt | llm
 
     def query(
         self,
@@ -88,69 +82,74 @@ class LlamaVectorDB:
 
         # Retrieve documents and process response
         try:
-            with ThreadPoolExecutor() as executor:
-                main_future = executor.submit(
-                    chroma_service.get_retriever,
-                    company_id=company_id,
-                    data_type=data_type,
-                    k=k,
-                    metadata_filter=metadata_filter,
-                    search_type=search_type,
-                )
-                correction_future = executor.submit(
-                    chroma_service.get_retriever,
-                    company_id=company_id,
-                    data_type="corrections",
-                    k=3,
-                    metadata_filter=metadata_filter,
-                    search_type="mmr",
-                )
-                company_feedback_future = executor.submit(
-                    chroma_service.get_company_feedbacks,
-                    company_id=company_id,
-                    query=query,
-                    k=3,
-                    filters=metadata_filter,
-                )
-
-                self.main_retriever = main_future.result()
-                correction_retriever = correction_future.result()
-                company_feedback_retriever = company_feedback_future.result()
+            # Embed the query once and fan it out to every collection
+            results = chroma_service.search_collections(
+                query,
+                {
+                    "main": {
+                        "company_id": company_id,
+                        "data_type": data_type,
+                        "k": k,
+                        "fetch_k": 20,
+                        "search_type": search_type,
+                        "metadata_filter": metadata_filter,
+                    },
+                    "corrections": {
+                        "company_id": company_id,
+                        "data_type": "corrections",
+                        "k": 3,
+                        "fetch_k": 20,
+                        "search_type": "mmr",
+                        "metadata_filter": metadata_filter,
+                    },
+                    "feedback": {
+                        "company_id": company_id,
+                        "data_type": "feedback",
+                        "k": 3,
+                        "fetch_k": 20,
+                        "search_type": "mmr",
+                        "metadata_filter": chroma_service.convert_to_chroma_filter(
+                            {"company_id": company_id, **(metadata_filter or {})}
+                        ),
+                    },
+                },
+            )
 
         except Exception as e:
             raise
 
-        # Retrieve documents and process response
-        main_docs = self.main_retriever.invoke(query)
-        correction_docs = correction_retriever.invoke(query)
-        feedback_docs = company_feedback_retriever
+        main_docs = results["main"]
+        correction_docs = results["corrections"]
+        feedback_docs = results["feedback"]
 
-        feedback_context = "\n".join(
+        # Pack the ranked documents into the model's token budget
+        context = build_context(
             [
-                f"Feedback {idx+1}: {doc['page_content']} (Score: {doc.get('relevance_score', 0):.2f})"
-                for idx, doc in enumerate(feedback_docs)
-            ]
+                ContextSection(
+                    "main",
+                    "Main Context: ",
+                    [d.page_content for d in main_docs],
+                    "No main documents found",
+                ),
+                ContextSection(
+                    "corrections",
+                    "Corrections: ",
+                    [d.page_content for d in correction_docs],
+                    "No correction data available",
+                ),
+                ContextSection(
+                    "feedback",
+                    "User Feedback Insights:\n",
+                    [
+                        f"Feedback {idx+1}: {doc.page_content} (Score: {doc.metadata.get('score', 0):.2f})"
+                        for idx, doc in enumerate(feedback_docs)
+                    ],
+                    "No relevant feedback found",
+                ),
+            ],
+            model_name=config.LLAMA_LLM_OLLAMA,
         )
-
-        # Build combined context with error fallbacks
-        context_sections = [
-            "Main Context: "
-            + (
-                "\n".join([d.page_content for d in main_docs])
-                if main_docs
-                else "No main documents found"
-            ),
-            "Corrections: "
-            + (
-                "\n".join([d.page_content for d in correction_docs])
-                if correction_docs
-                else "No correction data available"
-            ),
-            "User Feedback Insights:\n"
-            + (feedback_context if feedback_docs else "No relevant feedback found"),
-        ]
-
-        combined_context = "\n\n".join(context_sections)
+        combined_context = context.text
 
         # Measure generation time
         start_time = time.time()
@@ -164,12 +163,13 @@ class LlamaVectorDB:
 
         generation_time = time.time() - start_time
 
-        processed_answer = self._process_response(response["result"])
+        processed_answer = self._process_response(response)
 
         return {
             "answer": processed_answer,
-            "sources": response["source_documents"],
+            "sources": main_docs,
             "generation_time": format_generation_time(generation_time),
+            "context_tokens": context.tokens_used,
         }
 
     @staticmethod
@@ -1,11 +1,12 @@
 import re
 import json
 from concurrent.futures import ThreadPoolExecutor
-from langchain_ollama import OllamaLLM
 from typing import Dict, Any
+from services.ollama_router import ollama_router
 from services.vector_db import chroma_service
 from tools.gemma_vectordb import GemmaVectorDB
 from tools.gemma_image_analyzer import EnhancedGemmaVisionAnalyzer
+from utils.context_builder import ContextSection, build_context
 from config.config import config
 
 
@@ -22,8 +23,8 @@ class MistralUserHandler:
         self.search_type = None
         self.num_gpu = None
         self.main_retriever = None
-        self.llm = OllamaLLM(
-            model=config.MISTRAL_LLM_OLLAMA,
+        self.llm = ollama_router.llm_for(
+            config.MISTRAL_LLM_OLLAMA,
             temperature=self.temperature,
             top_k=self.top_k,
             top_p=self.top_p,
@@ -60,32 +61,29 @@ class MistralUserHandler:
                 main_docs = main_retriever.invoke(query)
                 feedback_docs = user_feedback_retriever
 
-                feedback_context = "\n".join(
+                # Pack the ranked documents into the model's token budget
+                context = build_context(
                     [
-                        f"Feedback {idx+1}: {doc['page_content']} (Score: {doc.get('relevance_score', 0):.2f})"
-                        for idx, doc in enumerate(feedback_docs)
-                    ]
+                        ContextSection(
+                            "main",
+                            "Main Context: ",
+                            [d.page_content for d in main_docs],
+                            "No main documents found",
+                        ),
+                        ContextSection(
+                            "feedback",
+                            "User Feedback Insights:\n",
+                            [
+                                f"Feedback {idx+1}: {doc['page_content']} (Score: {doc.get('relevance_score', 0):.2f})"
+                                for idx, doc in enumerate(feedback_docs)
+                            ],
+                            "No relevant feedback found",
+                        ),
+                    ],
+                    model_name=config.MISTRAL_LLM_OLLAMA,
                 )
 
-                # Build combined context with error fallbacks
-                context_sections = [
-                    "Main Context: "
-                    + (
-                        "\n".join([d.page_content for d in main_docs])
-                        if main_docs
-                        else "No main documents found"
-                    ),
-                    "User Feedback Insights:\n"
-                    + (
-                        feedback_context
-                        if feedback_docs
-                        else "No relevant feedback found"
-                    ),
-                ]
-
-                combined_context = "\n\n".join(context_sections)
-
-                return combined_context
+                return context.text
 
         except Exception as e:
             raise
@@ -0,0 +1,113 @@
+import asyncio
+import httpx
+from utils.ollama_embedding_client import BaseOllamaEmbeddingClient
+
+
+class AsyncOllamaEmbeddingClient(BaseOllamaEmbeddingClient):
+    """Async counterpart of OllamaEmbeddingClient built on a pooled httpx client"""
+
+    def __init__(self, model_name: str = "mxbai-embed-large", **kwargs):
+        super().__init__(model_name, **kwargs)
+
+        # Created on first use so it binds to the running event loop
+        self._client = None
+        self._semaphore = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def _post_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch, retrying transient failures with exponential backoff"""
+        client = self._get_client()
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    response = await client.post(
+                        "/api/embed", json=self._payload(texts)
+                    )
+                embeddings, error = self._read_response(texts, response)
+                if error is None:
+                    return embeddings
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                error = e
+
+            await asyncio.sleep(self._retry_delay(attempt, texts, error))
+            attempt += 1
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed texts, serving repeated content from the cache when configured.
+
+        :param texts: Texts to embed.
+        :return: One embedding per input text, in input order.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        if self.cache is None:
+            return await self._embed_batched(texts)
+
+        # The cache is SQLite-backed, so keep its I/O off the event loop
+        cached = await asyncio.to_thread(self.cache.get_many, self.model, texts)
+        missing = self._missing(texts, cached)
+        if not missing:
+            return cached
+
+        fresh = dict(zip(missing, await self._embed_batched(missing)))
+        await asyncio.to_thread(
+            self.cache.put_many, self.model, list(fresh), list(fresh.values())
+        )
+        return self._merge(texts, cached, fresh)
+
+    async def _embed_batched(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts in fixed-size batches, at most max_concurrency in flight"""
+        embeddings = []
+        for batch_embeddings in await asyncio.gather(
+            *(self._post_batch(batch) for batch in self._batches(texts))
+        ):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    async def embed_one(self, text: str) -> list[float]:
+        """Embed a single text"""
+        return (await self.embed([text]))[0]
+
+    async def aclose(self):
+        """Release pooled connections"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class ThreadedEmbeddingClient:
+    """
+    Async view of a blocking embedding client, run on worker threads.
+
+    Used when ChromaDBService embeds with something other than Ollama, such
+    as HashingEmbeddingClient, so the async facade embeds with it too.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.model = client.model
+
+    async def embed(self, texts: list[str]) -> list[list[float]]:
+        return await asyncio.to_thread(self.client.embed, list(texts))
+
+    async def embed_one(self, text: str) -> list[float]:
+        return (await self.embed([text]))[0]
+
+    async def aclose(self):
+        pass
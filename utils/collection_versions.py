@@ -0,0 +1,61 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class CollectionVersions:
+    """
+    Per-collection write counters shared through SQLite.
+
+    Every process writing to the Chroma store (API workers, the shard
+    rebalancer, import scripts) bumps the same counters, so caches built from
+    a collection's contents in any process can tell when they are stale.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Other processes bump the same counters; wait for their locks to clear
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS collection_versions (
+                collection TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+            """)
+
+    def bump(self, collection_name: str):
+        """Record a write to a collection"""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO collection_versions (collection, version) VALUES (?, 1)
+                ON CONFLICT (collection) DO UPDATE SET version = version + 1
+                """,
+                (collection_name,),
+            )
+
+    def get_many(self, collection_names: list[str]) -> tuple:
+        """Return the write counter of each collection, 0 for never-written ones"""
+        placeholders = ",".join("?" * len(collection_names))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT collection, version FROM collection_versions WHERE collection IN ({placeholders})",
+                collection_names,
+            ).fetchall()
+        versions = dict(rows)
+        return tuple(versions.get(name, 0) for name in collection_names)
+
+    def get(self, collection_name: str) -> int:
+        return self.get_many([collection_name])[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,33 @@
+import bisect
+import xxhash
+
+
+class ConsistentHashRing:
+    """
+    Consistent hash ring with virtual nodes.
+
+    Each node is placed on the ring ``vnodes`` times, so keys spread evenly
+    and adding a node only moves roughly 1/N of the keys onto it.
+    """
+
+    def __init__(self, nodes: list[str], vnodes: int = 128):
+        if not nodes:
+            raise ValueError("A hash ring needs at least one node")
+        self.nodes = list(dict.fromkeys(nodes))
+        self.vnodes = vnodes
+        points = sorted(
+            (self._hash(f"{node}#{replica}"), node)
+            for node in self.nodes
+            for replica in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    @staticmethod
+    def _hash(key: str) -> int:
+        return xxhash.xxh3_64_intdigest(key.encode("utf-8"))
+
+    def get_node(self, key: str) -> str:
+        """Return the node owning a key: the first ring point at or after its hash"""
+        index = bisect.bisect_left(self._hashes, self._hash(key))
+        return self._owners[index % len(self._owners)]
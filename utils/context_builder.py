@@ -0,0 +1,171 @@
+from functools import lru_cache
+from typing import NamedTuple, Optional
+import tiktoken
+from loguru import logger
+from config.config import config
+
+# Share of the budget each section may claim before leftovers are handed out
+DEFAULT_SECTION_SHARES = {
+    "main": 0.6,
+    "corrections": 0.15,
+    "feedback": 0.1,
+    "history": 0.15,
+}
+
+# Rough characters-per-token ratio used when no BPE encoding is available
+FALLBACK_CHARS_PER_TOKEN = 4
+
+# Below this many tokens a truncated document is more noise than context
+MIN_TRUNCATED_TOKENS = 32
+
+
+class ContextSection(NamedTuple):
+    name: str
+    title: str
+    items: list[str]  # ranked, best first
+    empty_text: str = ""
+    share: Optional[float] = None  # defaults to DEFAULT_SECTION_SHARES[name]
+
+
+class PackedContext(NamedTuple):
+    text: str
+    tokens_used: int
+    budget: int
+    items: dict  # section name -> included items, in rank order
+    sections: dict  # section name -> included/dropped/truncated counts
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the BPE encoding once; air-gapped hosts fall back to an estimate"""
+    try:
+        return tiktoken.get_encoding(config.CONTEXT_TOKENIZER_ENCODING)
+    except Exception as e:
+        logger.warning(
+            f"⚠️ Tokenizer '{config.CONTEXT_TOKENIZER_ENCODING}' unavailable ({e}), estimating token counts"
+        )
+        return None
+
+
+@lru_cache(maxsize=16384)
+def count_tokens(text: str) -> int:
+    """Count tokens, memoized since the same documents are retrieved repeatedly"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return -(-len(text) // FALLBACK_CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens"""
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[: max_tokens * FALLBACK_CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+
+def get_context_budget(model_name: str = None) -> int:
+    """Return the context token budget for a model, or the default budget"""
+    return config.CONTEXT_TOKEN_BUDGETS.get(model_name, config.CONTEXT_TOKEN_BUDGET)
+
+
+def build_context(
+    sections: list[ContextSection],
+    model_name: str = None,
+    budget: int = None,
+    separator: str = "\n\n",
+) -> PackedContext:
+    """
+    Pack ranked sections into a prompt context that fits a token budget.
+
+    Each section first fills up to its share of the budget, taking items in
+    rank order and skipping any that do not fit. If a section's best item
+    alone exceeds its share, it is truncated rather than dropped. Budget left
+    over by small sections is then handed to skipped items, again in section
+    and rank order.
+
+    :param sections: Sections in priority order.
+    :param model_name: Model whose budget applies (see CONTEXT_TOKEN_BUDGETS).
+    :param budget: Explicit token budget, overriding the model's.
+    :param separator: Text placed between rendered sections.
+    :return: PackedContext with the rendered text and token accounting.
+    """
+    budget = budget or get_context_budget(model_name)
+
+    # Titles, fallbacks and separators are always sent, so pay for them first
+    remaining = budget - sum(
+        count_tokens(section.title)
+        + (0 if section.items else count_tokens(section.empty_text))
+        for section in sections
+    )
+    remaining -= count_tokens(separator) * max(len(sections) - 1, 0)
+
+    included = {section.name: {} for section in sections}
+    truncated = {section.name: 0 for section in sections}
+
+    # Pass 1: fill each section up to its share
+    for section in sections:
+        share = (
+            section.share
+            if section.share is not None
+            else DEFAULT_SECTION_SHARES.get(section.name, 1.0)
+        )
+        quota = int(budget * share)
+
+        for index, item in enumerate(section.items):
+            cost = count_tokens(item) + 1  # joining newline
+            if cost <= quota and cost <= remaining:
+                included[section.name][index] = item
+                quota -= cost
+                remaining -= cost
+
+        if not included[section.name] and section.items:
+            room = min(quota, remaining) - 1
+            if room >= MIN_TRUNCATED_TOKENS:
+                item = truncate_to_tokens(section.items[0], room)
+                included[section.name][0] = item
+                truncated[section.name] += 1
+                remaining -= count_tokens(item) + 1
+
+    # Pass 2: hand leftover budget to anything skipped
+    for section in sections:
+        for index, item in enumerate(section.items):
+            if index in included[section.name]:
+                continue
+            cost = count_tokens(item) + 1
+            if cost <= remaining:
+                included[section.name][index] = item
+                remaining -= cost
+
+    items = {
+        name: [chosen[index] for index in sorted(chosen)]
+        for name, chosen in included.items()
+    }
+    text = separator.join(
+        section.title
+        + (
+            "\n".join(items[section.name])
+            if items[section.name]
+            else section.empty_text
+        )
+        for section in sections
+    )
+    tokens_used = count_tokens(text)
+
+    report = {
+        section.name: {
+            "included": len(items[section.name]),
+            "dropped": len(section.items) - len(items[section.name]),
+            "truncated": truncated[section.name],
+        }
+        for section in sections
+    }
+    logger.debug(f"Packed context: {tokens_used}/{budget} tokens, {report}")
+
+    return PackedContext(
+        text=text,
+        tokens_used=tokens_used,
+        budget=budget,
+        items=items,
+        sections=report,
+    )
@@ -0,0 +1,379 @@
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+import mmh3
+import numpy as np
+import xxhash
+from loguru import logger
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Smallest prime above 2**32, so (a * h + b) stays inside uint64 for 32-bit a, b, h
+MERSENNE_PRIME = np.uint64(4294967311)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+
+# Upper bound on LSH candidates verified per document
+MAX_CANDIDATES = 64
+
+
+class Fingerprint(NamedTuple):
+    content_hash: str
+    signature: np.ndarray
+
+
+class DuplicateMatch(NamedTuple):
+    vector_id: str
+    kind: str  # "exact" or "near"
+    similarity: float
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, hashed once with mmh3 then permuted"""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.RandomState(seed)
+        self._a = generator.randint(1, 2**32, size=num_perm, dtype=np.uint64)
+        self._b = generator.randint(0, 2**32, size=num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> set[str]:
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)}
+        return {
+            " ".join(words[i : i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (mmh3.hash(shingle, signed=False) for shingle in self.shingles(text)),
+            dtype=np.uint64,
+        )
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % MERSENNE_PRIME
+        return (permuted & MAX_HASH).min(axis=1).astype(np.uint32)
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the underlying shingle sets"""
+        return float(np.mean(a == b))
+
+
+class DedupIndex:
+    """
+    Per-collection exact and near-duplicate index backed by SQLite.
+
+    Every document is stored with an xxhash of its normalized text and a
+    MinHash signature. Signatures are split into LSH bands, so finding
+    near-duplicate candidates is an indexed bucket lookup instead of a scan;
+    candidates are then verified against the similarity threshold. Like the
+    lexical index, a collection is registered by an initial build over its
+    existing documents and then kept in step with its writes and deletes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        threshold: float = 0.9,
+        num_perm: int = 128,
+        bands: int = 16,
+        shingle_size: int = 3,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by the number of LSH bands")
+        self.path = path
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm, shingle_size=shingle_size)
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS dedup_collections (
+                collection TEXT PRIMARY KEY
+            );
+            CREATE TABLE IF NOT EXISTS dedup_docs (
+                collection TEXT NOT NULL,
+                vector_id TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                PRIMARY KEY (collection, vector_id)
+            );
+            CREATE INDEX IF NOT EXISTS dedup_docs_hash
+                ON dedup_docs (collection, content_hash);
+            CREATE TABLE IF NOT EXISTS dedup_bands (
+                collection TEXT NOT NULL,
+                band INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                vector_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS dedup_bands_bucket
+                ON dedup_bands (collection, band, bucket);
+            CREATE INDEX IF NOT EXISTS dedup_bands_vector
+                ON dedup_bands (collection, vector_id);
+            """)
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        normalized = " ".join(text.lower().split())
+        return xxhash.xxh3_128_hexdigest(normalized.encode("utf-8"))
+
+    def fingerprint(self, text: str) -> Fingerprint:
+        return Fingerprint(self.hash_text(text), self.hasher.signature(text))
+
+    def _buckets(self, signature: np.ndarray) -> list[tuple[int, int]]:
+        return [
+            (
+                band,
+                xxhash.xxh3_64_intdigest(
+                    signature[band * self.rows : (band + 1) * self.rows].tobytes()
+                )
+                & 0x7FFFFFFFFFFFFFFF,
+            )
+            for band in range(self.bands)
+        ]
+
+    def _is_registered(self, collection_name: str) -> bool:
+        return (
+            self._conn.execute(
+                "SELECT 1 FROM dedup_collections WHERE collection = ?",
+                (collection_name,),
+            ).fetchone()
+            is not None
+        )
+
+    def _delete_rows(self, collection_name: str, ids: list[str]):
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for table in ("dedup_docs", "dedup_bands"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE collection = ? AND vector_id IN ({placeholders})",
+                    [collection_name, *chunk],
+                )
+
+    def _insert_rows(
+        self, collection_name: str, ids: list[str], fingerprints: list[Fingerprint]
+    ):
+        self._delete_rows(collection_name, ids)
+        self._conn.executemany(
+            "INSERT INTO dedup_docs (collection, vector_id, content_hash, signature) VALUES (?, ?, ?, ?)",
+            [
+                (collection_name, vector_id, fp.content_hash, fp.signature.tobytes())
+                for vector_id, fp in zip(ids, fingerprints)
+            ],
+        )
+        self._conn.executemany(
+            "INSERT INTO dedup_bands (collection, band, bucket, vector_id) VALUES (?, ?, ?, ?)",
+            [
+                (collection_name, band, bucket, vector_id)
+                for vector_id, fp in zip(ids, fingerprints)
+                for band, bucket in self._buckets(fp.signature)
+            ],
+        )
+
+    def _find(
+        self, collection_name: str, fingerprint: Fingerprint
+    ) -> Optional[DuplicateMatch]:
+        row = self._conn.execute(
+            "SELECT vector_id FROM dedup_docs WHERE collection = ? AND content_hash = ? LIMIT 1",
+            (collection_name, fingerprint.content_hash),
+        ).fetchone()
+        if row is not None:
+            return DuplicateMatch(row[0], "exact", 1.0)
+
+        # One indexed bucket seek per band; an OR across bands defeats the index
+        buckets = self._buckets(fingerprint.signature)
+        band_query = " UNION ".join(
+            [
+                "SELECT vector_id FROM dedup_bands WHERE collection = ? AND band = ? AND bucket = ?"
+            ]
+            * len(buckets)
+        )
+        candidates = self._conn.execute(
+            f"""
+            SELECT vector_id, signature FROM dedup_docs
+            WHERE collection = ? AND vector_id IN ({band_query})
+            LIMIT {MAX_CANDIDATES}
+            """,
+            [
+                collection_name,
+                *(
+                    value
+                    for band, bucket in buckets
+                    for value in (collection_name, band, bucket)
+                ),
+            ],
+        ).fetchall()
+
+        best = None
+        for vector_id, signature in candidates:
+            similarity = self.hasher.similarity(
+                fingerprint.signature, np.frombuffer(signature, dtype=np.uint32)
+            )
+            if similarity >= self.threshold and (
+                best is None or similarity > best.similarity
+            ):
+                best = DuplicateMatch(vector_id, "near", similarity)
+        return best
+
+    def is_indexed(self, collection_name: str) -> bool:
+        with self._lock:
+            return self._is_registered(collection_name)
+
+    def build(
+        self,
+        collection_name: str,
+        pages: Iterable[tuple[list[str], list[str]]],
+    ) -> bool:
+        """
+        Fingerprint a collection's existing documents unless already indexed.
+
+        :param collection_name: Chroma collection name.
+        :param pages: Iterable of (vector IDs, documents) pages to index.
+        :return: True when the index was built by this call.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._is_registered(collection_name):
+                    self._conn.execute("ROLLBACK")
+                    return False
+
+                indexed = 0
+                for ids, documents in pages:
+                    self._insert_rows(
+                        collection_name,
+                        ids,
+                        [self.fingerprint(document or "") for document in documents],
+                    )
+                    indexed += len(ids)
+
+                self._conn.execute(
+                    "INSERT INTO dedup_collections (collection) VALUES (?)",
+                    (collection_name,),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        logger.info(
+            f"✅ Dedup index built for '{collection_name}' ({indexed} documents)"
+        )
+        return True
+
+    def resolve(
+        self,
+        collection_name: str,
+        ids: list[str],
+        fingerprints: list[Fingerprint],
+        replace: bool = False,
+    ) -> list[Optional[DuplicateMatch]]:
+        """
+        Match incoming documents against the collection and each other.
+
+        Documents without a match are registered under their new vector ID
+        straight away, so a later document in the same batch, or a concurrent
+        ingest, sees them as duplicates. With ``replace`` a matching document
+        is registered in place of the one it duplicates.
+
+        :param collection_name: Chroma collection name.
+        :param ids: Vector IDs the incoming documents will be written under.
+        :param fingerprints: One fingerprint per incoming document.
+        :param replace: Register duplicates in place of what they match.
+        :return: One DuplicateMatch (or None for unique documents) per input.
+        """
+        matches = []
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                for vector_id, fingerprint in zip(ids, fingerprints):
+                    match = self._find(collection_name, fingerprint)
+                    if match is not None and replace:
+                        self._delete_rows(collection_name, [match.vector_id])
+                    if match is None or replace:
+                        self._insert_rows(collection_name, [vector_id], [fingerprint])
+                    matches.append(match)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        return matches
+
+    def add(self, collection_name: str, ids: list[str], documents: list[str]):
+        """Fingerprint documents written outside of resolve"""
+        # Unregistered collections are fingerprinted in full when first built
+        if not self.is_indexed(collection_name):
+            return
+        fingerprints = [self.fingerprint(document or "") for document in documents]
+
+        with self._lock:
+            if not self._is_registered(collection_name):
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._insert_rows(collection_name, ids, fingerprints)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, collection_name: str, ids: list[str]):
+        """Forget deleted documents"""
+        with self._lock:
+            if not ids or not self._is_registered(collection_name):
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_rows(collection_name, ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def drop(self, collection_name: str):
+        """Remove a collection's index entirely; it is rebuilt on next use"""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                for table in ("dedup_docs", "dedup_bands", "dedup_collections"):
+                    self._conn.execute(
+                        f"DELETE FROM {table} WHERE collection = ?",
+                        (collection_name,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            collections = self._conn.execute(
+                "SELECT COUNT(*) FROM dedup_collections"
+            ).fetchone()[0]
+            documents = self._conn.execute(
+                "SELECT COUNT(*) FROM dedup_docs"
+            ).fetchone()[0]
+        return {
+            "path": self.path,
+            "collections": collections,
+            "documents": documents,
+            "threshold": self.threshold,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
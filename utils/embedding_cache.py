@@ -0,0 +1,175 @@
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+import xxhash
+from loguru import logger
+
+
+class EmbeddingCache:
+    """
+    Disk-backed, content-addressed embedding cache.
+
+    Entries are keyed by (model name, xxh3-128 of the text) and stored as
+    float32 blobs in SQLite. The least recently used entries are evicted once
+    the cache grows past ``max_entries``.
+
+    Hits are read-only: their ``last_used`` refresh is held in memory and
+    written in one batch at most every ``touch_interval`` seconds (and before
+    any eviction), so lookups do not contend for the database's write lock.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 1_000_000, touch_interval: float = 30
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.touch_interval = touch_interval
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        # (model, text_hash) -> last hit time not yet written
+        self._touched = {}
+        self._last_flush = time.monotonic()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+        )
+        self._conn.commit()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[
+            0
+        ]
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        return xxhash.xxh3_128_hexdigest(text.encode("utf-8"))
+
+    def get_many(self, model: str, texts: list[str]) -> list:
+        """
+        Look up cached embeddings.
+
+        :param model: Embedding model name.
+        :param texts: Texts to look up.
+        :return: One embedding (or None on a miss) per input text.
+        """
+        hashes = [self.hash_text(text) for text in texts]
+        unique_hashes = list(dict.fromkeys(hashes))
+        found = {}
+
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[start : start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, embedding FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for text_hash, blob in rows:
+                    found[text_hash] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                for text_hash in found:
+                    self._touched[(model, text_hash)] = now
+                if time.monotonic() - self._last_flush >= self.touch_interval:
+                    self._flush_touched()
+                    self._conn.commit()
+
+            results = [found.get(text_hash) for text_hash in hashes]
+            hit_count = sum(1 for result in results if result is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+
+        return results
+
+    def _flush_touched(self):
+        """Write pending last_used refreshes; caller holds the lock and commits"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                [
+                    (last_used, model, text_hash)
+                    for (model, text_hash), last_used in self._touched.items()
+                ],
+            )
+            self._touched.clear()
+        self._last_flush = time.monotonic()
+
+    def put_many(self, model: str, texts: list[str], embeddings: list[list[float]]):
+        """Store embeddings and evict the least recently used overflow"""
+        if not texts:
+            return
+
+        now = time.time()
+        rows = {
+            self.hash_text(text): array("f", embedding).tobytes()
+            for text, embedding in zip(texts, embeddings)
+        }
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, embedding, last_used) VALUES (?, ?, ?, ?)",
+                [(model, text_hash, blob, now) for text_hash, blob in rows.items()],
+            )
+            self._entries += self._conn.total_changes - before
+
+            overflow = self._entries - self.max_entries
+            if overflow > 0:
+                # Evict by up-to-date recency
+                self._flush_touched()
+                self._conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN (SELECT rowid FROM embeddings ORDER BY last_used ASC LIMIT ?)",
+                    (overflow,),
+                )
+                self._entries -= overflow
+                self.evictions += overflow
+                logger.debug(f"Evicted {overflow} embeddings from cache")
+
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "path": self.path,
+                "entries": self._entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Remove every cached embedding"""
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._touched.clear()
+            self._entries = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,39 @@
+from typing import Annotated, get_args, get_origin, get_type_hints
+
+
+def state_reducers(schema) -> dict:
+    """
+    Collect the reducers declared on a LangGraph state schema.
+
+    :param schema: State class whose fields may be Annotated[type, reducer].
+    :return: Field name -> reducer, for the annotated fields only.
+    """
+    reducers = {}
+    for name, hint in get_type_hints(schema, include_extras=True).items():
+        if get_origin(hint) is Annotated:
+            reducer = next((arg for arg in get_args(hint)[1:] if callable(arg)), None)
+            if reducer is not None:
+                reducers[name] = reducer
+    return reducers
+
+
+def merge_update(state: dict, update: dict, reducers: dict) -> dict:
+    """
+    Fold a node update into a state the way the graph's channels do.
+
+    Fields with a reducer are combined with it (add_messages appends new
+    messages and replaces ones with a known id), everything else is
+    overwritten. Updates must therefore carry deltas for reducer fields,
+    not the whole list again.
+
+    :param state: State to update in place.
+    :param update: Partial state returned by a node or sent as graph input.
+    :param reducers: Output of state_reducers() for the graph's schema.
+    :return: The updated state.
+    """
+    for key, value in update.items():
+        if key in reducers:
+            state[key] = reducers[key](state.get(key, []), value)
+        else:
+            state[key] = value
+    return state
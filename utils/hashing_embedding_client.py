@@ -0,0 +1,50 @@
+import re
+import mmh3
+import numpy as np
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class HashingEmbeddingClient:
+    """
+    Deterministic, offline stand-in for OllamaEmbeddingClient.
+
+    Words and word bigrams are feature-hashed into signed buckets and the
+    result is L2-normalised, so texts sharing vocabulary get close vectors.
+    The same text always maps to the same vector, on any machine, which makes
+    retrieval benchmarks reproducible without a running model.
+    """
+
+    def __init__(self, dimension: int = 384, seed: int = 0):
+        self.dimension = dimension
+        self.seed = seed
+        self.model = f"hashing-{dimension}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        words = WORD_PATTERN.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        if not features:
+            return vector
+
+        hashes = np.array(
+            [mmh3.hash(feature, self.seed, signed=False) for feature in features],
+            dtype=np.uint64,
+        )
+        # Low bits pick the bucket, the top bit the sign
+        signs = np.where(hashes >> np.uint64(31), 1.0, -1.0).astype(np.float32)
+        np.add.at(vector, (hashes % np.uint64(self.dimension)).astype(np.intp), signs)
+
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts; same signature and return type as the Ollama client"""
+        return [self._vector(text).tolist() for text in texts]
+
+    def embed_one(self, text: str) -> list[float]:
+        """Embed a single text"""
+        return self._vector(text).tolist()
+
+    def close(self):
+        """Nothing to release; kept for interface parity"""
@@ -0,0 +1,79 @@
+from chromadb.segment import VectorReader
+from config.config import config
+
+# Tunable HNSW parameters and Chroma's defaults for them
+HNSW_DEFAULTS = {"construction_ef": 100, "M": 16, "search_ef": 100}
+
+# Parameters fixed once the index is built; search_ef can change at any time
+BUILD_PARAMS = ("construction_ef", "M")
+
+
+def default_hnsw_params() -> dict:
+    """Return the configured HNSW parameters for new collections"""
+    return {
+        "construction_ef": config.CHROMA_HNSW_CONSTRUCTION_EF,
+        "M": config.CHROMA_HNSW_M,
+        "search_ef": config.CHROMA_HNSW_SEARCH_EF,
+    }
+
+
+def hnsw_metadata(hnsw_params: dict = None, space: str = "cosine") -> dict:
+    """
+    Build collection metadata from HNSW parameters.
+
+    :param hnsw_params: Overrides of construction_ef, M and search_ef.
+    :param space: Distance function of the index.
+    :return: Metadata to create the collection with.
+    """
+    params = {**default_hnsw_params(), **(hnsw_params or {})}
+    for name, value in params.items():
+        if name not in HNSW_DEFAULTS:
+            raise ValueError(
+                f"Unknown HNSW parameter '{name}'. Must be one of {list(HNSW_DEFAULTS)}."
+            )
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"HNSW parameter '{name}' must be a positive integer.")
+
+    return {
+        "hnsw:space": space,
+        **{f"hnsw:{name}": value for name, value in params.items()},
+    }
+
+
+def get_hnsw_params(collection) -> dict:
+    """Return the HNSW parameters a collection was configured with"""
+    metadata = collection.metadata or {}
+    return {
+        name: metadata.get(f"hnsw:{name}", default)
+        for name, default in HNSW_DEFAULTS.items()
+    }
+
+
+def set_search_ef(collection, search_ef: int):
+    """
+    Change a collection's search_ef without rebuilding its index.
+
+    Chroma 0.6 copies HNSW settings into the vector segment when a collection
+    is created and offers no API to change them, so the value is written to
+    the collection and segment metadata (picked up on the next load) and set
+    on the index if it is already in memory.
+
+    :param collection: Chroma collection.
+    :param search_ef: Size of the candidate list explored per query.
+    """
+    hnsw_metadata({"search_ef": search_ef})  # validates the value
+    server = collection._client
+
+    # collection.modify refuses metadata containing hnsw:space, and Chroma
+    # replaces metadata wholesale, so write the merged dict directly
+    metadata = {**(collection.metadata or {}), "hnsw:search_ef": search_ef}
+    server._sysdb.update_collection(collection.id, metadata=metadata)
+    collection._update_model_after_modify_success(None, metadata)
+
+    segment = server._manager.get_segment(collection.id, VectorReader)
+    server._sysdb.update_segment(
+        collection.id, segment._id, metadata={"hnsw:search_ef": search_ef}
+    )
+    segment._params.search_ef = search_ef
+    if segment._index is not None:
+        segment._index.set_ef(search_ef)
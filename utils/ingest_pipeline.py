@@ -0,0 +1,143 @@
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Optional
+from loguru import logger
+
+_END = object()
+
+
+class IngestPipeline:
+    """
+    Bounded embed → write pipeline fed with fixed-size document chunks.
+
+    Each stage runs on its own thread and the stages are connected by bounded
+    queues, so a slow embedder or a slow Chroma write blocks the producer
+    instead of letting parsed documents pile up in memory.
+
+    Whatever ``embed_fn`` returns for a chunk is handed to ``write_fn``. When
+    ``write_fn`` returns a count, documents beyond it are reported as skipped
+    (e.g. dropped as duplicates). Chunks already embedded when the job fails
+    are passed to ``discard_fn`` instead, to release what ``embed_fn`` set up.
+    """
+
+    def __init__(
+        self,
+        embed_fn: Callable[[list[dict]], Any],
+        write_fn: Callable[[list[dict], Any], Optional[int]],
+        queue_size: int = 4,
+        job_id: str = None,
+        discard_fn: Callable[[list[dict], Any], None] = None,
+    ):
+        self.job_id = job_id or str(uuid.uuid4())
+        self.embed_fn = embed_fn
+        self.write_fn = write_fn
+        self.discard_fn = discard_fn
+        self.received = 0
+        self.embedded = 0
+        self.written = 0
+        self.skipped = 0
+        self.chunks_written = 0
+        self.status = "running"
+        self.error = None
+        self.started_at = time.time()
+        self.finished_at = None
+
+        self._embed_queue = queue.Queue(maxsize=queue_size)
+        self._write_queue = queue.Queue(maxsize=queue_size)
+        self._threads = [
+            threading.Thread(
+                target=self._embed_worker, name=f"ingest-embed-{self.job_id}", daemon=True
+            ),
+            threading.Thread(
+                target=self._write_worker, name=f"ingest-write-{self.job_id}", daemon=True
+            ),
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, documents: list[dict]):
+        """Queue a chunk of documents, blocking while the pipeline is saturated"""
+        if self.error is not None:
+            raise RuntimeError(f"Ingest job {self.job_id} failed: {self.error}")
+        self.received += len(documents)
+        self._embed_queue.put(documents)
+
+    def close(self, raise_on_error: bool = True) -> dict:
+        """Flush queued chunks, stop the workers and return the final progress"""
+        self._embed_queue.put(_END)
+        for thread in self._threads:
+            thread.join()
+
+        self.finished_at = time.time()
+        self.status = "failed" if self.error is not None else "completed"
+        logger.info(
+            f"✅ Ingest job {self.job_id} {self.status}: {self.written}/{self.received} documents written"
+        )
+
+        if raise_on_error and self.error is not None:
+            raise self.error
+        return self.progress()
+
+    def progress(self) -> dict:
+        elapsed = (self.finished_at or time.time()) - self.started_at
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "received": self.received,
+            "embedded": self.embedded,
+            "written": self.written,
+            "skipped": self.skipped,
+            "chunks_written": self.chunks_written,
+            "elapsed_s": round(elapsed, 3),
+            "docs_per_s": round(self.written / elapsed, 1) if elapsed else 0.0,
+            "error": str(self.error) if self.error is not None else None,
+        }
+
+    def _embed_worker(self):
+        while True:
+            documents = self._embed_queue.get()
+            if documents is _END:
+                self._write_queue.put(_END)
+                return
+            # Keep draining after a failure so the producer never blocks forever
+            if self.error is not None:
+                continue
+            try:
+                embeddings = self.embed_fn(documents)
+                self.embedded += len(documents)
+                self._write_queue.put((documents, embeddings))
+            except Exception as e:
+                logger.error(f"❌ Ingest job {self.job_id} embedding failed: {e}")
+                self.error = e
+
+    def _write_worker(self):
+        while True:
+            item = self._write_queue.get()
+            if item is _END:
+                return
+            if self.error is not None:
+                self._discard(*item)
+                continue
+            try:
+                documents, embeddings = item
+                written = self.write_fn(documents, embeddings)
+                written = len(documents) if written is None else written
+                self.written += written
+                self.skipped += len(documents) - written
+                self.chunks_written += 1
+                logger.debug(
+                    f"Ingest job {self.job_id}: {self.written}/{self.received} documents written"
+                )
+            except Exception as e:
+                logger.error(f"❌ Ingest job {self.job_id} write failed: {e}")
+                self.error = e
+
+    def _discard(self, documents: list[dict], embeddings: Any):
+        if self.discard_fn is None:
+            return
+        try:
+            self.discard_fn(documents, embeddings)
+        except Exception as e:
+            logger.error(f"❌ Ingest job {self.job_id} could not discard a chunk: {e}")
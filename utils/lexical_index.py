@@ -0,0 +1,245 @@
+import re
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Iterable
+import xxhash
+from loguru import logger
+
+# Keep identifiers such as SKUs and error codes ("ERR-4021", "PRO_MAX") whole
+TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '-_'"
+TOKEN_PATTERN = re.compile(r"[\w\-]+")
+MAX_QUERY_TERMS = 64
+
+
+class LexicalIndex:
+    """
+    Per-collection BM25 index backed by SQLite FTS5.
+
+    Each Chroma collection gets its own FTS5 table so document frequencies and
+    average lengths stay tenant-local. Rows are keyed by Chroma vector ID,
+    which lets adds and deletes be applied incrementally. A collection is
+    only searchable once it has been registered, either by an initial build
+    over its existing documents or by its first write.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS lexical_collections (
+                collection TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL
+            )
+            """)
+
+    @staticmethod
+    def _table_name(collection_name: str) -> str:
+        # Collection names embed user-supplied company IDs, so never use them raw
+        return f"fts_{xxhash.xxh3_64_hexdigest(collection_name.encode('utf-8'))}"
+
+    def _is_registered(self, collection_name: str) -> bool:
+        return (
+            self._conn.execute(
+                "SELECT 1 FROM lexical_collections WHERE collection = ?",
+                (collection_name,),
+            ).fetchone()
+            is not None
+        )
+
+    def _create_tables(self, table: str):
+        self._conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table}_docs (
+                rowid INTEGER PRIMARY KEY,
+                vector_id TEXT NOT NULL UNIQUE,
+                content TEXT NOT NULL
+            )
+            """)
+        self._conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5(
+                content, content='{table}_docs', content_rowid='rowid',
+                tokenize="{TOKENIZER}"
+            )
+            """)
+        # Keep the FTS index in step with the content table
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {table}_docs BEGIN
+                INSERT INTO {table} (rowid, content) VALUES (new.rowid, new.content);
+            END
+            """)
+        self._conn.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {table}_docs BEGIN
+                INSERT INTO {table} ({table}, rowid, content) VALUES ('delete', old.rowid, old.content);
+            END
+            """)
+
+    def _delete_rows(self, table: str, ids: list[str]):
+        # Stay well below SQLite's bound-parameter limit
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            self._conn.execute(
+                f"DELETE FROM {table}_docs WHERE vector_id IN ({placeholders})", chunk
+            )
+
+    def _insert_rows(self, table: str, ids: list[str], documents: list[str]):
+        self._delete_rows(table, ids)
+        self._conn.executemany(
+            f"INSERT INTO {table}_docs (vector_id, content) VALUES (?, ?)",
+            [
+                (vector_id, document or "")
+                for vector_id, document in zip(ids, documents)
+            ],
+        )
+
+    def is_indexed(self, collection_name: str) -> bool:
+        with self._lock:
+            return self._is_registered(collection_name)
+
+    def build(
+        self,
+        collection_name: str,
+        pages: Iterable[tuple[list[str], list[str]]],
+    ) -> bool:
+        """
+        Index a collection's existing documents unless it is already indexed.
+
+        :param collection_name: Chroma collection name.
+        :param pages: Iterable of (vector IDs, documents) pages to index.
+        :return: True when the index was built by this call.
+        """
+        table = self._table_name(collection_name)
+
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so concurrent workers
+            # sharing the file cannot build the same collection twice
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if self._is_registered(collection_name):
+                    self._conn.execute("ROLLBACK")
+                    return False
+
+                self._create_tables(table)
+                indexed = 0
+                for ids, documents in pages:
+                    self._insert_rows(table, ids, documents)
+                    indexed += len(ids)
+
+                self._conn.execute(
+                    "INSERT INTO lexical_collections (collection, table_name) VALUES (?, ?)",
+                    (collection_name, table),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        logger.info(
+            f"✅ Lexical index built for '{collection_name}' ({indexed} documents)"
+        )
+        return True
+
+    def add(self, collection_name: str, ids: list[str], documents: list[str]):
+        """Index (or re-index) documents of an already indexed collection"""
+        table = self._table_name(collection_name)
+
+        with self._lock:
+            if not self._is_registered(collection_name):
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._insert_rows(table, ids, documents)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def remove(self, collection_name: str, ids: list[str]):
+        """Drop documents from a collection's index"""
+        table = self._table_name(collection_name)
+
+        with self._lock:
+            if not ids or not self._is_registered(collection_name):
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._delete_rows(table, ids)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def drop(self, collection_name: str):
+        """Remove a collection's index entirely"""
+        table = self._table_name(collection_name)
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._conn.execute(f"DROP TABLE IF EXISTS {table}_docs")
+                self._conn.execute(
+                    "DELETE FROM lexical_collections WHERE collection = ?",
+                    (collection_name,),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def build_match_query(query: str) -> str:
+        """Turn free text into an FTS5 OR-query of quoted terms"""
+        terms = list(dict.fromkeys(TOKEN_PATTERN.findall(query.lower())))
+        return " OR ".join(
+            '"' + term.replace('"', '""') + '"' for term in terms[:MAX_QUERY_TERMS]
+        )
+
+    def search(self, collection_name: str, query: str, limit: int = 20) -> list[str]:
+        """
+        Rank a collection's documents against a query with BM25.
+
+        :param collection_name: Chroma collection name.
+        :param query: Free-text query.
+        :param limit: Maximum number of vector IDs to return.
+        :return: Matching vector IDs, best first.
+        """
+        match_query = self.build_match_query(query)
+        if not match_query:
+            return []
+
+        table = self._table_name(collection_name)
+
+        with self._lock:
+            if not self._is_registered(collection_name):
+                return []
+            rows = self._conn.execute(
+                f"""
+                SELECT d.vector_id FROM {table}
+                JOIN {table}_docs AS d ON d.rowid = {table}.rowid
+                WHERE {table} MATCH ?
+                ORDER BY rank
+                LIMIT ?
+                """,
+                (match_query, limit),
+            ).fetchall()
+
+        return [vector_id for (vector_id,) in rows]
+
+    def stats(self) -> dict:
+        with self._lock:
+            collections = self._conn.execute(
+                "SELECT COUNT(*) FROM lexical_collections"
+            ).fetchone()[0]
+        return {"path": self.path, "collections": collections}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
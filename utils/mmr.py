@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def maximal_marginal_relevance(
+    query_embedding,
+    candidate_embeddings,
+    k: int = 10,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """
+    Select candidates by maximal marginal relevance using vectorized NumPy.
+
+    Query similarity is a single matrix-vector product. Each selection then
+    takes one row of the candidate similarity matrix and folds it into a
+    running max-similarity vector, so no pairwise Python loops are needed and
+    the full n x n matrix is never materialized.
+
+    :param query_embedding: Query vector of shape (d,).
+    :param candidate_embeddings: Candidate vectors of shape (n, d).
+    :param k: Number of candidates to select.
+    :param lambda_mult: Relevance/diversity trade-off (0 = diverse, 1 = relevant).
+    :return: Indices of the selected candidates, in selection order.
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    k = min(k, len(candidates))
+    if k <= 0:
+        return []
+
+    candidates = _normalize(candidates)
+    query = _normalize(np.asarray(query_embedding, dtype=np.float32).reshape(-1))
+
+    similarity_to_query = candidates @ query
+    relevance = lambda_mult * similarity_to_query
+
+    first = int(np.argmax(similarity_to_query))
+    selected = [first]
+    max_similarity_to_selected = candidates @ candidates[first]
+
+    available = np.ones(len(candidates), dtype=bool)
+    available[first] = False
+
+    while len(selected) < k:
+        scores = relevance - (1 - lambda_mult) * max_similarity_to_selected
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        np.maximum(
+            max_similarity_to_selected,
+            candidates @ candidates[best],
+            out=max_similarity_to_selected,
+        )
+
+    return selected
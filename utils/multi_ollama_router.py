@@ -1,20 +1,429 @@
 import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+import httpx
+import requests
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.llms import LLM
+from langchain_core.outputs import GenerationChunk
 from langchain_ollama import OllamaLLM
+from loguru import logger
 from config.config import Config
+from utils.lru_cache import LRUCache
+
+
+def model_key(model: str) -> str:
+    """Normalise a model name the way /api/ps reports it ('ollama/gemma3' -> 'gemma3:latest')"""
+    if not model:
+        return ""
+    model = model.removeprefix("ollama/")
+    return model if ":" in model else f"{model}:latest"
+
+
+class OllamaBackend:
+    """One Ollama server with its load, latency, health and residency bookkeeping"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.in_flight = 0
+        self.ewma_ms = None  # smoothed latency of completed requests
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.ejections = 0
+        self.last_probe = None
+        self.resident = set()  # model keys loaded in memory, per /api/ps
+        self.warming = set()  # model keys being preloaded
+        self.cold_starts = 0
+        # (model, options) -> OllamaLLM reused across requests
+        self.llms = LRUCache(64)
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "in_flight": self.in_flight,
+            "ewma_ms": round(self.ewma_ms, 1) if self.ewma_ms is not None else None,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "resident_models": sorted(self.resident),
+            "cold_starts": self.cold_starts,
+            "last_probe": self.last_probe,
+        }
 
 
 class MultiOllamaRouter:
-    def __init__(self, base_url_list):
-        self.base_url_list = base_url_list
-        self.index = 0
+    """
+    Routes LLM calls to the cheapest healthy Ollama backend for their model.
+
+    A backend's cost is its expected wait, (in-flight + 1) x EWMA latency,
+    plus ``cold_load_ms`` when the requested model is not resident there, so
+    requests stick to instances that already hold their model and only spill
+    over (and load it elsewhere) once those are busy enough. A backend without
+    history is assumed as fast as the average so it gets tried.
+
+    A background thread polls every backend's /api/ps: failures eject the
+    backend until it answers again, and the answer refreshes which models are
+    resident. Backends named in ``warm_pools`` for a model are preferred for
+    it and have it preloaded whenever it is missing. A failed request triggers
+    an immediate probe, and requests that could not connect are retried on
+    another backend.
+    """
+
+    # Errors raised before a request reaches the model, so retrying is safe
+    CONNECT_ERRORS = (ConnectionError, httpx.ConnectError, httpx.ConnectTimeout)
+
+    def __init__(
+        self,
+        base_url_list,
+        ewma_alpha: float = 0.2,
+        health_interval: float = 10.0,
+        health_timeout: float = 2.0,
+        failure_threshold: int = 3,
+        cold_load_ms: float = 20000.0,
+        warm_pools: dict = None,
+        keep_alive: str = None,
+    ):
+        self.backends = [OllamaBackend(url) for url in dict.fromkeys(base_url_list)]
+        self.ewma_alpha = ewma_alpha
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.failure_threshold = failure_threshold
+        self.cold_load_ms = cold_load_ms
+        self.keep_alive = keep_alive
+        # model key -> backend URLs that should keep it loaded
+        self.warm_pools = {
+            model_key(model): {url.rstrip("/") for url in urls}
+            for model, urls in (warm_pools or {}).items()
+        }
+        self.index = 0  # breaks ties round-robin
         self.lock = threading.Lock()
+        self.session = requests.Session()
+        self._health_thread = None
+
+    def _start_health_checks(self):
+        """Start the probe loop on first use, so importing the module stays cheap"""
+        if self._health_thread is not None or self.health_interval <= 0:
+            return
+        with self.lock:
+            if self._health_thread is None:
+                self._health_thread = threading.Thread(
+                    target=self._health_loop, name="ollama-health", daemon=True
+                )
+                self._health_thread.start()
+
+    def _health_loop(self):
+        while True:
+            for backend in self.backends:
+                self.probe(backend)
+            self._warm_pools()
+            time.sleep(self.health_interval)
+
+    def probe(self, backend: OllamaBackend) -> bool:
+        """Poll a backend's loaded models, ejecting or re-admitting it accordingly"""
+        resident = None
+        try:
+            response = self.session.get(
+                f"{backend.url}/api/ps", timeout=self.health_timeout
+            )
+            healthy = response.ok
+            if healthy:
+                resident = {
+                    model_key(model.get("name") or model.get("model"))
+                    for model in response.json().get("models", [])
+                }
+        except (requests.RequestException, ValueError):
+            healthy = False
 
-    def get_next_llm(self):
         with self.lock:
-            url = self.base_url_list[self.index]
-            self.index = (self.index + 1) % len(self.base_url_list)
-        return OllamaLLM(
-            base_url=url,
-            model=Config.LLAMA_CHATBOT_LLM_OLLAMA,
-            temperature=0.7,
+            backend.last_probe = time.time()
+            if healthy and not backend.healthy:
+                logger.info(f"✅ Ollama backend {backend.url} is healthy again")
+                backend.consecutive_failures = 0
+            elif not healthy and backend.healthy:
+                logger.warning(
+                    f"⚠️ Ollama backend {backend.url} failed its health probe, ejecting"
+                )
+                backend.ejections += 1
+            backend.healthy = healthy
+            if resident is not None:
+                backend.resident = resident
+        return healthy
+
+    def _warm_pools(self):
+        """Preload pooled models on healthy pool members that do not hold them"""
+        for model, urls in self.warm_pools.items():
+            for backend in self.backends:
+                with self.lock:
+                    if (
+                        backend.url not in urls
+                        or not backend.healthy
+                        or model in backend.resident
+                        or model in backend.warming
+                    ):
+                        continue
+                    backend.warming.add(model)
+                threading.Thread(
+                    target=self._preload, args=(backend, model), daemon=True
+                ).start()
+
+    def _preload(self, backend: OllamaBackend, model: str):
+        """Load a model without generating, as Ollama does for an empty prompt"""
+        try:
+            payload = {"model": model}
+            if self.keep_alive:
+                payload["keep_alive"] = self.keep_alive
+            self.session.post(
+                f"{backend.url}/api/generate", json=payload
+            ).raise_for_status()
+            with self.lock:
+                backend.resident.add(model)
+            logger.info(f"✅ Preloaded '{model}' on {backend.url}")
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ Preloading '{model}' on {backend.url} failed: {e}")
+        finally:
+            with self.lock:
+                backend.warming.discard(model)
+
+    def _pick(self, model: str = None, exclude: set = (), reserve: bool = True):
+        key = model_key(model)
+        with self.lock:
+            candidates = [
+                backend
+                for backend in self.backends
+                if backend.healthy and backend.url not in exclude
+            ]
+            # With everything ejected, trying a backend beats failing outright
+            if not candidates:
+                candidates = [
+                    backend for backend in self.backends if backend.url not in exclude
+                ]
+            if not candidates:
+                raise ConnectionError("No Ollama backend available")
+
+            pool = [b for b in candidates if b.url in self.warm_pools.get(key, ())]
+            candidates = pool or candidates
+
+            known = [b.ewma_ms for b in self.backends if b.ewma_ms is not None]
+            default_ms = sum(known) / len(known) if known else 1.0
+            count = len(self.backends)
+            start = self.index
+            self.index = (self.index + 1) % count
+
+            def cost(backend):
+                wait = (backend.in_flight + 1) * (
+                    backend.ewma_ms if backend.ewma_ms is not None else default_ms
+                )
+                if key and key not in backend.resident:
+                    wait += self.cold_load_ms
+                return (
+                    wait,
+                    backend.in_flight,
+                    (self.backends.index(backend) - start) % count,
+                )
+
+            backend = min(candidates, key=cost)
+            if not reserve:
+                # Untracked callers send their own requests; count nothing
+                return backend
+            if key and key not in backend.resident:
+                # Ollama loads the model on first use; /api/ps confirms later
+                backend.cold_starts += 1
+                backend.resident.add(key)
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+
+    def _release(
+        self, backend: OllamaBackend, elapsed_ms: float = None, failed: bool = True
+    ):
+        """Finish a request, folding its latency into the EWMA when it succeeded"""
+        with self.lock:
+            backend.in_flight -= 1
+            if elapsed_ms is None:
+                if failed:
+                    backend.failures += 1
+                    backend.consecutive_failures += 1
+                return
+            backend.consecutive_failures = 0
+            backend.ewma_ms = (
+                elapsed_ms
+                if backend.ewma_ms is None
+                else self.ewma_alpha * elapsed_ms
+                + (1 - self.ewma_alpha) * backend.ewma_ms
+            )
+
+    @contextmanager
+    def lease(self, model: str = None, exclude: set = ()):
+        """
+        Reserve the best backend for one request for a model.
+
+        Latency is recorded when the block exits normally; an exception counts
+        as a failure and, on a connection error or repeated failures, probes
+        the backend right away.
+        """
+        self._start_health_checks()
+        backend = self._pick(model, exclude)
+        start = time.perf_counter()
+        try:
+            yield backend
+        except Exception as e:
+            self._release(backend)
+            if (
+                isinstance(e, self.CONNECT_ERRORS)
+                or backend.consecutive_failures >= self.failure_threshold
+            ):
+                self.probe(backend)
+            raise
+        except BaseException:
+            # Abandoned rather than failed, e.g. a stream the client stopped reading
+            self._release(backend, failed=False)
+            raise
+        self._release(backend, (time.perf_counter() - start) * 1000)
+
+    def get_llm(self, backend: OllamaBackend, model: str = None, **options):
+        """
+        Return the backend's cached client for a model and generation options.
+
+        :param options: OllamaLLM settings such as temperature, top_k or system.
+        """
+        model = model or Config.LLAMA_CHATBOT_LLM_OLLAMA
+        if self.keep_alive and "keep_alive" not in options:
+            options["keep_alive"] = self.keep_alive
+        return backend.llms.get_or_create(
+            (model, tuple(sorted(options.items()))),
+            lambda: OllamaLLM(base_url=backend.url, model=model, **options),
         )
+
+    def invoke(self, messages, model: str = None, **options):
+        """
+        Run a completion on the cheapest backend for the model.
+
+        :param messages: Prompt or messages accepted by OllamaLLM.invoke.
+        :param model: Ollama model, defaulting to LLAMA_CHATBOT_LLM_OLLAMA.
+        :param options: OllamaLLM settings, e.g. temperature.
+        :return: The generated text.
+        """
+        model = model or Config.LLAMA_CHATBOT_LLM_OLLAMA
+        tried = []
+        while True:
+            try:
+                with self.lease(model, exclude=set(tried)) as backend:
+                    tried.append(backend.url)
+                    return self.get_llm(backend, model, **options).invoke(messages)
+            except self.CONNECT_ERRORS as e:
+                if len(tried) >= len(self.backends):
+                    raise
+                logger.warning(
+                    f"⚠️ Ollama backend {tried[-1]} unreachable ({e}), retrying elsewhere"
+                )
+
+    def stream(self, messages, model: str = None, **options):
+        """
+        Stream a completion from the cheapest backend for the model.
+
+        The backend stays leased until the stream is exhausted or closed. A
+        backend that cannot be reached before the first chunk is swapped for
+        another, as in invoke().
+
+        :return: Iterator of generated text chunks.
+        """
+        model = model or Config.LLAMA_CHATBOT_LLM_OLLAMA
+        tried = []
+        while True:
+            started = False
+            try:
+                with self.lease(model, exclude=set(tried)) as backend:
+                    tried.append(backend.url)
+                    llm = self.get_llm(backend, model, **options)
+                    for chunk in llm.stream(messages):
+                        started = True
+                        yield chunk
+                    return
+            except self.CONNECT_ERRORS as e:
+                if started or len(tried) >= len(self.backends):
+                    raise
+                logger.warning(
+                    f"⚠️ Ollama backend {tried[-1]} unreachable ({e}), retrying elsewhere"
+                )
+
+    def base_url_for(self, model: str = None) -> str:
+        """
+        Return the backend URL a long-lived client for a model should use.
+
+        For clients the router cannot wrap, such as CrewAI's LLM, which talks
+        to Ollama through LiteLLM. Their calls are neither tracked as
+        in-flight nor counted in the backend's request figures.
+        """
+        self._start_health_checks()
+        return self._pick(model, reserve=False).url
+
+    def llm_for(self, model: str, **options) -> "RoutedOllamaLLM":
+        """
+        Return a LangChain LLM whose every call is routed through invoke().
+
+        Use it wherever an OllamaLLM would go (chains, LLMChain, .invoke);
+        each generation is leased, so it counts toward load and latency.
+
+        :param options: OllamaLLM settings such as temperature, top_k or system.
+        """
+        return RoutedOllamaLLM(router=self, model=model, options=options)
+
+    def get_next_llm(self):
+        """Return the routed chat client used for LLAMA_CHATBOT_LLM_OLLAMA"""
+        return self.llm_for(Config.LLAMA_CHATBOT_LLM_OLLAMA, temperature=0.7)
+
+    def stats(self) -> dict:
+        """Return per-backend load, latency, failure, health and residency figures"""
+        with self.lock:
+            return {
+                "backends": [backend.stats() for backend in self.backends],
+                "warm_pools": {
+                    model: sorted(urls) for model, urls in self.warm_pools.items()
+                },
+            }
+
+
+class RoutedOllamaLLM(LLM):
+    """OllamaLLM stand-in that sends each generation through a MultiOllamaRouter"""
+
+    router: Any
+    model: str
+    options: dict = {}
+
+    @property
+    def _llm_type(self) -> str:
+        return "routed-ollama"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model, **self.options}
+
+    def _options(self, stop: Optional[list[str]]) -> dict:
+        # Hashable, as the options key the router's client cache
+        return {**self.options, "stop": tuple(stop)} if stop else self.options
+
+    def _call(
+        self,
+        prompt: str,
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> str:
+        return self.router.invoke(prompt, model=self.model, **self._options(stop))
+
+    def _stream(
+        self,
+        prompt: str,
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[GenerationChunk]:
+        for text in self.router.stream(prompt, model=self.model, **self._options(stop)):
+            chunk = GenerationChunk(text=text)
+            if run_manager:
+                run_manager.on_llm_new_token(text, chunk=chunk)
+            yield chunk
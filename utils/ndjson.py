@@ -0,0 +1,40 @@
+import json
+from typing import AsyncIterator
+from utils.exceptions.custom_exceptions import CustomException
+
+
+async def iter_ndjson(byte_stream: AsyncIterator[bytes]) -> AsyncIterator[dict]:
+    """
+    Parse newline-delimited JSON objects from an async byte stream.
+
+    Only one partial line is buffered at a time, so memory stays flat
+    regardless of the total body size.
+    """
+    buffer = b""
+    line_number = 0
+
+    async for chunk in byte_stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _parse_line(line, line_number)
+
+    if buffer.strip():
+        yield _parse_line(buffer, line_number + 1)
+
+
+def _parse_line(line: bytes, line_number: int) -> dict:
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise CustomException(400, f"Invalid JSON on line {line_number}: {e.msg}")
+    if not isinstance(value, dict):
+        raise CustomException(400, f"Line {line_number} must be a JSON object")
+    return value
+
+
+def to_ndjson_line(value) -> bytes:
+    """Serialize one object as an NDJSON line"""
+    return (json.dumps(value, default=str) + "\n").encode("utf-8")
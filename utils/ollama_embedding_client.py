@@ -0,0 +1,197 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from loguru import logger
+from config.config import config
+from utils.embedding_cache import EmbeddingCache
+
+
+class BaseOllamaEmbeddingClient:
+    """
+    Settings, request format, retry policy and cache merging shared by the
+    sync and async /api/embed clients; subclasses only do the transport.
+    """
+
+    RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        model_name: str = "mxbai-embed-large",
+        base_url: str = None,
+        batch_size: int = None,
+        max_concurrency: int = None,
+        max_retries: int = None,
+        retry_backoff: float = None,
+        timeout: float = None,
+        cache: EmbeddingCache = None,
+    ):
+        self.model = model_name
+        self.cache = cache
+        self.base_url = (base_url or config.OLLAMA_URL).rstrip("/")
+        self.batch_size = batch_size or config.OLLAMA_EMBEDDING_BATCH_SIZE
+        self.max_concurrency = (
+            max_concurrency or config.OLLAMA_EMBEDDING_MAX_CONCURRENCY
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else config.OLLAMA_EMBEDDING_MAX_RETRIES
+        )
+        self.retry_backoff = (
+            retry_backoff
+            if retry_backoff is not None
+            else config.OLLAMA_EMBEDDING_RETRY_BACKOFF
+        )
+        self.timeout = timeout or config.OLLAMA_EMBEDDING_TIMEOUT
+
+    def _payload(self, texts: list[str]) -> dict:
+        return {"model": self.model, "input": texts}
+
+    def _batches(self, texts: list[str]) -> list[list[str]]:
+        return [
+            texts[i : i + self.batch_size]
+            for i in range(0, len(texts), self.batch_size)
+        ]
+
+    def _read_response(self, texts: list[str], response):
+        """
+        Check an /api/embed response from either HTTP client.
+
+        :return: (embeddings, None) on success, (None, error) when the status
+            is worth retrying; other failures raise.
+        """
+        if 200 <= response.status_code < 300:
+            embeddings = response.json()["embeddings"]
+            if len(embeddings) != len(texts):
+                raise ValueError(
+                    f"Ollama returned {len(embeddings)} embeddings for {len(texts)} inputs"
+                )
+            return embeddings, None
+
+        error = ValueError(f"Failed to get embedding from Ollama: {response.text}")
+        if response.status_code not in self.RETRYABLE_STATUS_CODES:
+            raise error
+        return None, error
+
+    def _retry_delay(self, attempt: int, texts: list[str], error: Exception) -> float:
+        """Return the backoff before retry ``attempt + 1``, or raise when out of retries"""
+        if attempt >= self.max_retries:
+            raise error
+        delay = self.retry_backoff * (2**attempt)
+        logger.warning(
+            f"⚠️ Embedding batch of {len(texts)} failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.2f}s"
+        )
+        return delay
+
+    @staticmethod
+    def _missing(texts: list[str], cached: list) -> list[str]:
+        """Distinct texts the cache had no embedding for, in first-seen order"""
+        return list(
+            dict.fromkeys(
+                text for text, embedding in zip(texts, cached) if embedding is None
+            )
+        )
+
+    @staticmethod
+    def _merge(texts: list[str], cached: list, fresh: dict) -> list[list[float]]:
+        """Fill the cache misses with freshly embedded vectors, in input order"""
+        return [
+            embedding if embedding is not None else fresh[text]
+            for text, embedding in zip(texts, cached)
+        ]
+
+
+class OllamaEmbeddingClient(BaseOllamaEmbeddingClient):
+    """Batched, connection-pooled client for Ollama's /api/embed endpoint"""
+
+    def __init__(self, model_name: str = "mxbai-embed-large", **kwargs):
+        super().__init__(model_name, **kwargs)
+
+        # Keep-alive session shared by every batch, sized for the worker pool
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=self.max_concurrency, max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Lazily create the bounded pool used to fan out batches"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency,
+                        thread_name_prefix="ollama-embed",
+                    )
+        return self._executor
+
+    def _post_batch(self, texts: list[str]) -> list[list[float]]:
+        """Embed one batch, retrying transient failures with exponential backoff"""
+        attempt = 0
+        while True:
+            try:
+                response = self.session.post(
+                    f"{self.base_url}/api/embed",
+                    json=self._payload(texts),
+                    timeout=self.timeout,
+                )
+                embeddings, error = self._read_response(texts, response)
+                if error is None:
+                    return embeddings
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+
+            time.sleep(self._retry_delay(attempt, texts, error))
+            attempt += 1
+
+    def embed(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed texts, serving repeated content from the cache when configured.
+
+        :param texts: Texts to embed.
+        :return: One embedding per input text, in input order.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+
+        if self.cache is None:
+            return self._embed_batched(texts)
+
+        cached = self.cache.get_many(self.model, texts)
+        missing = self._missing(texts, cached)
+        if not missing:
+            return cached
+
+        fresh = dict(zip(missing, self._embed_batched(missing)))
+        self.cache.put_many(self.model, list(fresh), list(fresh.values()))
+        return self._merge(texts, cached, fresh)
+
+    def _embed_batched(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts in fixed-size batches over the pooled session"""
+        batches = self._batches(texts)
+
+        if len(batches) == 1:
+            return self._post_batch(batches[0])
+
+        embeddings = []
+        for batch_embeddings in self._get_executor().map(self._post_batch, batches):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    def embed_one(self, text: str) -> list[float]:
+        """Embed a single text"""
+        return self.embed([text])[0]
+
+    def close(self):
+        """Release pooled connections and worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self.session.close()
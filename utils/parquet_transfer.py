@@ -0,0 +1,131 @@
+import json
+from typing import Iterable, Iterator
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Key of the file-level metadata written alongside the columns
+METADATA_KEY = b"chroma_export"
+
+
+def _schema(dimension: int, metadata: dict) -> pa.Schema:
+    return pa.schema(
+        [
+            pa.field("id", pa.string(), nullable=False),
+            pa.field("document", pa.large_string()),
+            pa.field("metadata", pa.large_string()),  # JSON, as keys vary per document
+            pa.field("embedding", pa.list_(pa.float32(), dimension), nullable=False),
+        ],
+        metadata={METADATA_KEY: json.dumps(metadata).encode("utf-8")},
+    )
+
+
+def _embedding_array(embeddings: np.ndarray) -> pa.FixedSizeListArray:
+    """Wrap a 2-D float32 matrix as an Arrow fixed-size list without copying"""
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    return pa.FixedSizeListArray.from_arrays(
+        pa.array(matrix.reshape(-1)), matrix.shape[1]
+    )
+
+
+def write_parquet(
+    path: str,
+    pages: Iterable[tuple[list[str], list[str], list[dict], np.ndarray]],
+    metadata: dict,
+    compression: str = "zstd",
+) -> dict:
+    """
+    Stream (ids, documents, metadatas, embeddings) pages into a Parquet file.
+
+    Each page becomes one row group, so neither side of the transfer ever
+    holds more than a page in memory.
+
+    :param path: Destination file.
+    :param pages: Pages of parallel ids, documents, metadatas and an (n, dim) matrix.
+    :param metadata: Extra information stored in the file's schema metadata.
+    :param compression: Parquet codec.
+    :return: Row count and embedding dimension written.
+    """
+    writer = None
+    rows = 0
+    dimension = None
+
+    try:
+        for ids, documents, metadatas, embeddings in pages:
+            if not ids:
+                continue
+            embedding_array = _embedding_array(embeddings)
+            if writer is None:
+                dimension = embedding_array.type.list_size
+                writer = pq.ParquetWriter(
+                    path,
+                    _schema(dimension, {**metadata, "dimension": dimension}),
+                    compression=compression,
+                )
+            writer.write_batch(
+                pa.record_batch(
+                    [
+                        pa.array(ids, pa.string()),
+                        pa.array(documents, pa.large_string()),
+                        pa.array(
+                            [
+                                json.dumps(item) if item is not None else None
+                                for item in metadatas
+                            ],
+                            pa.large_string(),
+                        ),
+                        embedding_array,
+                    ],
+                    schema=writer.schema,
+                )
+            )
+            rows += len(ids)
+
+        # An empty collection still produces a readable file
+        if writer is None:
+            writer = pq.ParquetWriter(
+                path, _schema(0, {**metadata, "dimension": 0}), compression=compression
+            )
+    finally:
+        if writer is not None:
+            writer.close()
+
+    return {"rows": rows, "dimension": dimension or 0}
+
+
+def read_parquet_metadata(path: str) -> dict:
+    """Return the export metadata stored in a file written by write_parquet"""
+    schema = pq.read_schema(path)
+    raw = (schema.metadata or {}).get(METADATA_KEY)
+    if raw is None:
+        raise ValueError("File is not a collection export.")
+    return {**json.loads(raw), "rows": pq.ParquetFile(path).metadata.num_rows}
+
+
+def iter_parquet(
+    path: str, batch_size: int
+) -> Iterator[tuple[list[str], list[str], list[dict], np.ndarray]]:
+    """
+    Yield (ids, documents, metadatas, embeddings) batches from an export.
+
+    Embeddings come back as a float32 matrix viewing Arrow's buffer directly.
+
+    :param path: File written by write_parquet.
+    :param batch_size: Rows per yielded batch.
+    """
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        embedding_column = batch.column("embedding")
+        dimension = embedding_column.type.list_size
+        # flatten() honours the batch's offset into the shared child buffer
+        embeddings = embedding_column.flatten().to_numpy(zero_copy_only=True)
+        embeddings = embeddings.reshape(-1, dimension)
+        yield (
+            batch.column("id").to_pylist(),
+            batch.column("document").to_pylist(),
+            [
+                json.loads(item) if item is not None else None
+                for item in batch.column("metadata").to_pylist()
+            ],
+            embeddings,
+        )
@@ -0,0 +1,24 @@
+from typing import Hashable
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[Hashable]], rank_constant: int = 60
+) -> list[Hashable]:
+    """
+    Fuse several ranked lists with reciprocal rank fusion.
+
+    Each item scores sum(1 / (rank_constant + rank)) over the lists it appears
+    in (ranks start at 1), so items ranked well by more than one retriever
+    rise to the top without having to calibrate their raw scores.
+
+    :param rankings: Ranked lists of item keys, best first.
+    :param rank_constant: Dampens the weight of top ranks (60 in the original paper).
+    :return: Item keys ordered by fused score, best first.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (rank_constant + rank)
+
+    # Stable sort keeps first-seen order for ties
+    return sorted(scores, key=scores.get, reverse=True)
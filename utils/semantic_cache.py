@@ -0,0 +1,211 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+import numpy as np
+import xxhash
+
+
+class _Scope:
+    """Entries of one cache scope plus a lazily rebuilt embedding matrix"""
+
+    def __init__(self, version: Hashable):
+        self.version = version
+        self.entries = OrderedDict()  # text hash -> (unit vector, value, created_at)
+        self._matrix = None
+        self._keys = None
+
+    def matrix(self):
+        if self._matrix is None:
+            self._keys = list(self.entries)
+            self._matrix = (
+                np.stack([self.entries[key][0] for key in self._keys])
+                if self._keys
+                else None
+            )
+        return self._keys, self._matrix
+
+    def remove(self, key):
+        self.entries.pop(key, None)
+        self._matrix = None
+
+
+class SemanticCache:
+    """
+    Thread-safe similarity cache for generated answers.
+
+    Entries live in scopes (e.g. tenant + collection + model). A lookup first
+    tries an exact match on the normalized text, then the cosine similarity of
+    the query embedding against every entry in the scope. Each scope carries a
+    version; looking it up with a different version drops its entries, which
+    is how callers invalidate answers when the underlying data changes.
+    Entries expire after ``ttl_seconds`` and each scope keeps at most
+    ``max_entries_per_scope`` entries, evicting the least recently used. The
+    number of scopes is bounded the same way.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        ttl_seconds: float = 3600,
+        max_entries_per_scope: int = 512,
+        max_scopes: int = 1024,
+    ):
+        if max_entries_per_scope <= 0 or max_scopes <= 0:
+            raise ValueError("Cache sizes must be positive integers")
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_scope = max_entries_per_scope
+        self.max_scopes = max_scopes
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+        self._scopes = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hash_text(text: str) -> str:
+        normalized = " ".join(text.lower().split())
+        return xxhash.xxh3_128_hexdigest(normalized.encode("utf-8"))
+
+    @staticmethod
+    def _unit(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _get_scope(self, scope_key: Hashable, version: Hashable, create: bool):
+        scope = self._scopes.get(scope_key)
+        if scope is not None and scope.version != version:
+            # The data behind this scope changed, so every answer is stale
+            self.invalidations += len(scope.entries)
+            del self._scopes[scope_key]
+            scope = None
+
+        if scope is None:
+            if not create:
+                return None
+            scope = _Scope(version)
+            self._scopes[scope_key] = scope
+            while len(self._scopes) > self.max_scopes:
+                _, evicted = self._scopes.popitem(last=False)
+                self.evictions += len(evicted.entries)
+
+        self._scopes.move_to_end(scope_key)
+        return scope
+
+    def _take(self, scope: _Scope, key, now: float):
+        """Return a live entry's value, dropping it instead if expired"""
+        _, value, created_at = scope.entries[key]
+        if now - created_at > self.ttl_seconds:
+            scope.remove(key)
+            self.expirations += 1
+            return None
+        scope.entries.move_to_end(key)
+        return value
+
+    def get_exact(self, scope_key: Hashable, version: Hashable, text: str):
+        """
+        Look up an answer by normalized text only, without an embedding.
+
+        Misses are not counted, as callers follow up with ``get``.
+
+        :return: The cached value, or None.
+        """
+        text_hash = self.hash_text(text)
+        with self._lock:
+            scope = self._get_scope(scope_key, version, create=False)
+            if scope is None or text_hash not in scope.entries:
+                return None
+            value = self._take(scope, text_hash, time.time())
+            if value is not None:
+                self.exact_hits += 1
+            return value
+
+    def get(self, scope_key: Hashable, version: Hashable, text: str, embedding):
+        """
+        Look up an answer by exact text, then by embedding similarity.
+
+        :param scope_key: Scope the answer was stored under.
+        :param version: Current version of the data behind the scope.
+        :param text: Query text.
+        :param embedding: Query embedding.
+        :return: The cached value, or None on a miss.
+        """
+        text_hash = self.hash_text(text)
+        query = self._unit(embedding)
+        now = time.time()
+
+        with self._lock:
+            scope = self._get_scope(scope_key, version, create=False)
+            if scope is not None and text_hash in scope.entries:
+                value = self._take(scope, text_hash, now)
+                if value is not None:
+                    self.exact_hits += 1
+                    return value
+
+            if scope is not None:
+                keys, matrix = scope.matrix()
+                if matrix is not None and matrix.shape[1] == query.shape[0]:
+                    similarities = matrix @ query
+                    # Walk candidates best-first, skipping expired ones
+                    for index in np.argsort(-similarities):
+                        if similarities[index] < self.similarity_threshold:
+                            break
+                        value = self._take(scope, keys[index], now)
+                        if value is not None:
+                            self.semantic_hits += 1
+                            return value
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        scope_key: Hashable,
+        version: Hashable,
+        text: str,
+        embedding,
+        value: Any,
+    ):
+        """Store an answer, evicting the scope's least recently used overflow"""
+        text_hash = self.hash_text(text)
+        vector = self._unit(embedding)
+
+        with self._lock:
+            scope = self._get_scope(scope_key, version, create=True)
+            scope.remove(text_hash)
+            scope.entries[text_hash] = (vector, value, time.time())
+
+            while len(scope.entries) > self.max_entries_per_scope:
+                oldest = next(iter(scope.entries))
+                scope.remove(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._scopes.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            lookups = hits + self.misses
+            return {
+                "scopes": len(self._scopes),
+                "entries": sum(len(scope.entries) for scope in self._scopes.values()),
+                "similarity_threshold": self.similarity_threshold,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": hits,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
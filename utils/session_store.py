@@ -0,0 +1,256 @@
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+import redis
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from loguru import logger
+
+# msgpack with LangChain message support, as LangGraph uses for checkpoints
+serde = JsonPlusSerializer()
+
+
+class SessionStore(ABC):
+    """
+    Conversation state keyed by thread_id, expiring ``ttl_seconds`` after its
+    last write.
+
+    Supports the dict operations the chat services use (``in``, ``[]``,
+    ``pop``). Reads return a fresh copy, so changes to a state must be written
+    back. States are stored as msgpack via LangGraph's serializer, which keeps
+    messages intact.
+    """
+
+    backend = "base"
+
+    def __init__(self, ttl_seconds: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @staticmethod
+    def _dumps(state: dict) -> tuple[str, bytes]:
+        return serde.dumps_typed(state)
+
+    @staticmethod
+    def _loads(kind: str, blob: bytes) -> dict:
+        return serde.loads_typed((kind, blob))
+
+    @abstractmethod
+    def get(self, thread_id: str) -> Optional[dict]:
+        """Return the live state of a thread, or None"""
+
+    @abstractmethod
+    def set(self, thread_id: str, state: dict):
+        """Store a thread's state and restart its expiry"""
+
+    @abstractmethod
+    def delete(self, thread_id: str) -> bool:
+        """Remove a thread; return whether it existed"""
+
+    def sweep(self) -> int:
+        """Remove expired sessions; return how many were removed"""
+        return 0
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Return size, hit and expiry figures for the store"""
+
+    def _record_lookup(self, state):
+        if state is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return state
+
+    def __contains__(self, thread_id: str) -> bool:
+        return self.get(thread_id) is not None
+
+    def __getitem__(self, thread_id: str) -> dict:
+        state = self.get(thread_id)
+        if state is None:
+            raise KeyError(thread_id)
+        return state
+
+    def __setitem__(self, thread_id: str, state: dict):
+        self.set(thread_id, state)
+
+    def pop(self, thread_id: str, default=None):
+        state = self.get(thread_id)
+        self.delete(thread_id)
+        return default if state is None else state
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Session store in a local SQLite database in WAL mode.
+
+    Expired rows are ignored on read and deleted by a background sweeper
+    every ``sweep_interval`` seconds. Every worker on the host sharing the
+    file sees the same sessions.
+    """
+
+    backend = "sqlite"
+
+    def __init__(
+        self, path: str, ttl_seconds: float = 3600, sweep_interval: float = 60
+    ):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.sweep_interval = sweep_interval
+        self._lock = threading.Lock()
+        self._sweeper = None
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        # Other workers write the same file; wait for their locks to clear
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                thread_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                state BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS sessions_expires_at
+                ON sessions (expires_at);
+            """)
+
+    def _start_sweeper(self):
+        """Start the sweep loop on first write, so importing the module stays cheap"""
+        if self._sweeper is not None or self.sweep_interval <= 0:
+            return
+        with self._lock:
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(
+                    target=self._sweep_loop, name="session-sweeper", daemon=True
+                )
+                self._sweeper.start()
+
+    def _sweep_loop(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except sqlite3.Error as e:
+                logger.warning(f"⚠️ Session sweep failed: {e}")
+
+    def get(self, thread_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT kind, state FROM sessions WHERE thread_id = ? AND expires_at > ?",
+                (thread_id, time.time()),
+            ).fetchone()
+        return self._record_lookup(self._loads(*row) if row else None)
+
+    def set(self, thread_id: str, state: dict):
+        self._start_sweeper()
+        kind, blob = self._dumps(state)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (thread_id, kind, state, expires_at) VALUES (?, ?, ?, ?)",
+                (thread_id, kind, blob, time.time() + self.ttl_seconds),
+            )
+
+    def delete(self, thread_id: str) -> bool:
+        with self._lock:
+            return (
+                self._conn.execute(
+                    "DELETE FROM sessions WHERE thread_id = ?", (thread_id,)
+                ).rowcount
+                > 0
+            )
+
+    def sweep(self) -> int:
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            self.expired += removed
+        if removed:
+            logger.debug(f"Swept {removed} expired chat sessions")
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            sessions, state_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(LENGTH(state)), 0) FROM sessions WHERE expires_at > ?",
+                (time.time(),),
+            ).fetchone()
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "sessions": sessions,
+            "state_bytes": state_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Session store on a Redis-compatible server, shared by every worker.
+
+    Each session is a hash with its serializer kind and state, and Redis
+    expires it by itself ``ttl_seconds`` after the last write, so no sweeper
+    runs.
+    """
+
+    backend = "redis"
+
+    def __init__(
+        self, url: str, ttl_seconds: float = 3600, prefix: str = "chat:session:"
+    ):
+        super().__init__(ttl_seconds)
+        self.url = url
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, thread_id: str) -> Optional[dict]:
+        kind, blob = self._redis.hmget(self.prefix + thread_id, "kind", "state")
+        return self._record_lookup(self._loads(kind.decode(), blob) if blob else None)
+
+    def set(self, thread_id: str, state: dict):
+        kind, blob = self._dumps(state)
+        key = self.prefix + thread_id
+        pipeline = self._redis.pipeline()
+        pipeline.hset(key, mapping={"kind": kind, "state": blob})
+        pipeline.expire(key, max(int(self.ttl_seconds), 1))
+        pipeline.execute()
+
+    def delete(self, thread_id: str) -> bool:
+        return self._redis.delete(self.prefix + thread_id) > 0
+
+    def stats(self) -> dict:
+        keys = list(self._redis.scan_iter(match=f"{self.prefix}*", count=1000))
+        pipeline = self._redis.pipeline()
+        for key in keys:
+            pipeline.hstrlen(key, "state")
+        return {
+            "backend": self.backend,
+            "prefix": self.prefix,
+            "sessions": len(keys),
+            "state_bytes": sum(pipeline.execute()) if keys else 0,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self._redis.close()
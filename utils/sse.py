@@ -0,0 +1,6 @@
+import json
+
+
+def to_sse_event(event: str, data) -> bytes:
+    """Serialize one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode("utf-8")